@@ -0,0 +1,71 @@
+"""
+CPU and memory cost per Reddit listing page for each ingest mode
+(full HTML parse, SoupStrainer-restricted parse, .json listing).
+
+    python benchmarks/reddit_ingest.py --pages 50 --posts 25 --chrome-kb 150
+
+Pages are rendered by the stand-in server (no network). --chrome-kb pads the
+HTML with sidebar markup so it is closer to the ~200KB real old.reddit pages.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+sys.path.append(os.path.join(PROJECT_ROOT, "scrapers"))
+
+import standin_server
+import reddit_mvp
+
+PARSERS = {
+    "html": lambda body: reddit_mvp.parse_listing_page(body),
+    "strained": lambda body: reddit_mvp.parse_listing_strained(body),
+    "json": lambda body: reddit_mvp.parse_listing_json(json.loads(body)),
+}
+
+
+def render_pages(pages, posts, chrome_kb):
+    html_pages, json_pages = [], []
+    for page in range(pages):
+        params = {"count": page * posts, "limit": posts}
+        html_pages.append(standin_server.reddit_top_html("gadgets", params, posts, chrome_kb))
+        json_pages.append(json.dumps(standin_server.reddit_top_json("gadgets", params, posts)))
+    return html_pages, json_pages
+
+
+def measure(parse, bodies):
+    """Returns (cpu ms per page, peak KiB for one page, parsed output of every page)."""
+    start = time.process_time()
+    outputs = [parse(body) for body in bodies]
+    cpu_ms = (time.process_time() - start) * 1000 / len(bodies)
+
+    tracemalloc.start()
+    parse(bodies[0])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return cpu_ms, peak / 1024, outputs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark Reddit listing ingest paths offline")
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--posts", type=int, default=25, help="Posts per page (same for every mode)")
+    parser.add_argument("--chrome-kb", type=int, default=150, help="Approximate non-post HTML per page")
+    args = parser.parse_args()
+
+    html_pages, json_pages = render_pages(args.pages, args.posts, args.chrome_kb)
+    bodies = {"html": html_pages, "strained": html_pages, "json": json_pages}
+    print(f"{args.pages} pages x {args.posts} posts | html {len(html_pages[0]) / 1024:.0f}KiB/page"
+          f" | json {len(json_pages[0]) / 1024:.0f}KiB/page")
+
+    baseline = None
+    for mode, parse in PARSERS.items():
+        cpu_ms, peak_kib, outputs = measure(parse, bodies[mode])
+        if baseline is None:
+            baseline = outputs
+        same = "same output" if outputs == baseline else "OUTPUT DIFFERS"
+        print(f"{mode:9s} | {cpu_ms:7.2f} ms CPU/page | {peak_kib:8.0f} KiB peak/page | {same}")
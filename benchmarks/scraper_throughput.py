@@ -0,0 +1,55 @@
+"""
+Offline scraper throughput benchmark against the local stand-in server.
+
+    python benchmarks/scraper_throughput.py --queries 40 --workers 1,4,8 --latency-ms 200
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+sys.path.append(os.path.join(PROJECT_ROOT, "scrapers"))
+
+import standin_server
+
+
+def run(queries, workers, fetch):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(fetch, queries))
+    elapsed = time.perf_counter() - start
+    return elapsed, sum(len(r) for r in results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark scraper fetch throughput offline")
+    parser.add_argument("--queries", type=int, default=40)
+    parser.add_argument("--workers", type=str, default="1,4,8")
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--serpapi-rate", type=str, default="1000,1000",
+                        help="rate,capacity for the serpapi token bucket during the run")
+    args = parser.parse_args()
+
+    server, base_url = standin_server.serve_in_thread(
+        latency_ms=args.latency_ms, error_rate=args.error_rate, rate_429=args.rate_429
+    )
+    # Must be set before the scraper modules are imported
+    os.environ["HTTP_BASE_OVERRIDE"] = base_url
+    os.environ["SERP_API_KEYS"] = "bench-key"
+    os.environ["RATE_LIMIT_SERPAPI"] = args.serpapi_rate
+    os.environ["RATE_LIMIT_DB"] = os.path.join(tempfile.mkdtemp(), "rate_limits.sqlite")
+
+    import amazon_mvp
+
+    queries = [f"benchmark query {i}" for i in range(args.queries)]
+    print(f"Stand-in {base_url} | latency={args.latency_ms}ms | {len(queries)} queries")
+    for workers in [int(w) for w in args.workers.split(",") if w.strip()]:
+        elapsed, records = run(queries, workers, amazon_mvp.fetch_serpapi_results)
+        print(f"workers={workers:3d} | {elapsed:6.2f}s | {len(queries) / elapsed:7.1f} req/s | records={records}")
+    server.shutdown()
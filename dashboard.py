@@ -5,6 +5,7 @@ import altair as alt
 import ast
 import os
 import json
+import threading
 
 # =========================
 # Page Configuration
@@ -62,6 +63,9 @@ API_BASE_URL = st.session_state.api_url
 OUTPUT_DIR = "outputs"
 FINAL_OUTPUT_FILE = os.path.join(OUTPUT_DIR, "final_trending_products_deduped.csv")
 FESTIVAL_OUTPUT_FILE = "festival_trending_products.json"
+TRENDS_PAGE_SIZE = 100
+TRENDS_EXPORT_PAGE_SIZE = 2000
+REVALIDATION_CACHE_SIZE = 256
 
 # =========================
 # Helpers
@@ -78,62 +82,115 @@ def normalize_urls(value):
             return []
     return []
 
-CATEGORY_KEYWORDS = {
-    "Electronics": ["earbuds", "headphone", "laptop", "phone", "camera", "charger", "smart", "tech", "device", "usb", "cable"],
-    "Fitness": ["fitness", "gym", "workout", "dumbbell", "yoga", "treadmill", "protein", "supplement", "weight", "training", "sport", "mat", "bottle"],
-    "Beauty": ["skincare", "serum", "cream", "beauty", "makeup", "shampoo", "conditioner", "soap", "lotion", "perfume", "fragrance", "oil", "balm"],
-    "Fashion": ["shoes", "sneaker", "watch", "jacket", "clothing", "sweater", "hoodie", "shirt", "pants", "dress", "jeans", "coat", "wool", "wear"],
-    "Home & Kitchen": ["kitchen", "mixer", "cookware", "vacuum", "air fryer", "decor", "light", "lamp", "desk", "chair", "organizer", "cup", "muga"]
-}
-
-def infer_category(item):
-    text = str(item).lower()
-    for cat, keywords in CATEGORY_KEYWORDS.items():
-        if any(k in text for k in keywords):
-            return cat
-    return "Others"
-
 # =========================
 # Data Loading
 # =========================
+@st.cache_resource
+def _revalidation_cache():
+    """(url, params) -> validators and parsed body of the last 200 response, shared by all sessions."""
+    return {}
+
+@st.cache_resource
+def _revalidation_lock():
+    """Guards _revalidation_cache(); the script reruns per session, so the lock is a shared resource too."""
+    return threading.Lock()
+
+def conditional_get(url, params=None, parse=pd.DataFrame, timeout=2):
+    """
+    GET with If-None-Match / If-Modified-Since from the last 200 response for
+    the same url and params. Returns (status, parsed body, response headers);
+    a 304 is answered with the previous body and headers (or, when there is
+    none to reuse, by asking again without validators). Raises for errors
+    other than 404.
+    """
+    params = {k: v for k, v in (params or {}).items() if v is not None}
+    key = (url, json.dumps(params, sort_keys=True, default=str))
+    cache = _revalidation_cache()
+    lock = _revalidation_lock()
+    with lock:
+        cached = cache.get(key)
+    headers = {}
+    if cached:
+        if cached["etag"]:
+            headers["If-None-Match"] = cached["etag"]
+        if cached["last_modified"]:
+            headers["If-Modified-Since"] = cached["last_modified"]
+    response = requests.get(url, params=params, headers=headers, timeout=timeout)
+    if response.status_code == 304:
+        if cached:
+            return 200, cached["body"], cached["headers"]
+        # Nothing to reuse (e.g. a proxy answered for us): fetch the full body
+        response = requests.get(url, params=params, headers={"Cache-Control": "no-cache"}, timeout=timeout)
+    if response.status_code == 404:
+        return 404, None, {}
+    response.raise_for_status()
+    body = parse(response.json())
+    response_headers = response.headers
+    if response.headers.get("ETag") or response.headers.get("Last-Modified"):
+        with lock:
+            if key not in cache and len(cache) >= REVALIDATION_CACHE_SIZE:
+                cache.pop(next(iter(cache)), None)
+            cache[key] = {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "body": body,
+                "headers": response_headers,
+            }
+    return 200, body, response_headers
+
+def _trend_filter_params(country, categories, market_types, marketplaces, lifecycle):
+    params = {"category": list(categories), "market_type": list(market_types), "marketplace": list(marketplaces), "lifecycle_stage": list(lifecycle)}
+    if country and country != "All":
+        params["country"] = country
+    return params
+
 @st.cache_data(ttl=60)
-def fetch_trends(country=None):
-    # Try API first
+def fetch_trends_page(country="All", categories=(), market_types=(), marketplaces=(), lifecycle=(), item=None, cursor=None, limit=TRENDS_PAGE_SIZE, fields=()):
+    """(DataFrame, next cursor or None, total matching rows) for one /trends page."""
+    params = _trend_filter_params(country, categories, market_types, marketplaces, lifecycle)
     try:
-        params = {"limit": 2000}
-        if country and country != "All":
-            params["country"] = country
-        
-        response = requests.get(f"{API_BASE_URL}/trends", params=params, timeout=2)
-        response.raise_for_status()
-        return pd.DataFrame(response.json())
-    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout, requests.exceptions.RequestException):
-        # Fallback to local file
-        if os.path.exists(FINAL_OUTPUT_FILE):
-            try:
-                df = pd.read_csv(FINAL_OUTPUT_FILE)
-                if country and country != "All":
-                    df = df[df["country"].str.lower() == country.lower()]
-                
-                # Apply same processing as API
-                if "market_type" not in df.columns:
-                    df["market_type"] = "Global"
-                else:
-                     df["market_type"] = df["market_type"].fillna("Global")
+        status, page, headers = conditional_get(
+            f"{API_BASE_URL}/trends",
+            params={**params, "item": item, "cursor": cursor, "limit": limit, "fields": ",".join(fields) or None},
+        )
+        if status == 404: return pd.DataFrame(), None, 0
+        return page, headers.get("X-Next-Cursor"), int(headers.get("X-Total-Count", 0))
+    except Exception:
+        # Fallback: page the local CSV with the same snapshot code the API uses
+        try:
+            import trend_snapshot
+            snapshot = trend_snapshot.load(FINAL_OUTPUT_FILE)
+            positions = snapshot.select(item=item, **params)
+            page, next_cursor = snapshot.page(positions, cursor, limit)
+            rows = snapshot.df.iloc[page]
+            if fields:
+                rows = rows[[f for f in fields if f in rows.columns]]
+            return rows, next_cursor, len(positions)
+        except Exception:
+            return pd.DataFrame(), None, 0
 
-                if "category" not in df.columns:
-                    df["category"] = df["item"].apply(infer_category)
-                
-                if "urls" in df.columns:
-                    df["urls"] = df["urls"].apply(normalize_urls)
-                    
-                return df
-            except Exception as e:
-                st.error(f"Error reading local file: {e}")
-                return pd.DataFrame()
-        return pd.DataFrame()
+def fetch_all_trends(**filters):
+    """Every matching row, page by page (for exports)."""
+    pages, cursor = [], None
+    while True:
+        page, cursor, _ = fetch_trends_page(**filters, cursor=cursor, limit=TRENDS_EXPORT_PAGE_SIZE)
+        pages.append(page)
+        if not cursor:
+            return pd.concat(pages, ignore_index=True)
+
+@st.cache_data(ttl=60)
+def fetch_trend_summary(country=None, categories=(), market_types=(), marketplaces=(), lifecycle=()):
+    params = _trend_filter_params(country, categories, market_types, marketplaces, lifecycle)
+    try:
+        status, summary, _ = conditional_get(f"{API_BASE_URL}/trends/summary", params=params, parse=dict)
+        return summary if status == 200 else {}
     except Exception:
-        return pd.DataFrame()
+        # Fallback: same aggregation the API runs, over the local CSV
+        try:
+            import trend_snapshot
+            return trend_snapshot.summarize(FINAL_OUTPUT_FILE, **params)
+        except Exception:
+            return {}
 
 @st.cache_data(ttl=60)
 def fetch_festivals(country=None):
@@ -141,10 +198,9 @@ def fetch_festivals(country=None):
         params = {}
         if country and country != "All":
             params["country"] = country
-        response = requests.get(f"{API_BASE_URL}/festivals", params=params, timeout=2)
-        if response.status_code == 404: return pd.DataFrame()
-        response.raise_for_status()
-        return pd.DataFrame(response.json())
+        status, festivals, _ = conditional_get(f"{API_BASE_URL}/festivals", params=params)
+        if status == 404: return pd.DataFrame()
+        return festivals
     except (requests.exceptions.ConnectionError, requests.exceptions.Timeout, requests.exceptions.RequestException):
         # Fallback
         if os.path.exists(FESTIVAL_OUTPUT_FILE):
@@ -160,6 +216,57 @@ def fetch_festivals(country=None):
     except Exception:
         return pd.DataFrame()
 
+@st.cache_data(ttl=600)
+def fetch_upcoming_festivals(future_days=60):
+    try:
+        response = requests.get(f"{API_BASE_URL}/festivals/upcoming", params={"future_days": future_days}, timeout=2)
+        response.raise_for_status()
+        return pd.DataFrame(response.json())
+    except Exception:
+        # Fallback: same compiled calendar the API uses
+        try:
+            import seasonal_calendar
+            festivals = seasonal_calendar.get_calendar().upcoming(future_days=future_days)
+            return pd.DataFrame([f.to_dict() for f in festivals])
+        except Exception:
+            return pd.DataFrame()
+
+def follow_job(job_id, label):
+    """Show a job's progress from its SSE stream (one request, no re-polling) until it finishes."""
+    with st.status(label, expanded=True) as box:
+        bar = st.progress(0.0)
+        event = None
+        try:
+            with requests.get(f"{API_BASE_URL}/jobs/{job_id}/events", stream=True, timeout=(3, 60)) as resp:
+                resp.raise_for_status()
+                for line in resp.iter_lines(decode_unicode=True):
+                    if line.startswith("event: "):
+                        event = line[len("event: "):]
+                        continue
+                    if not line.startswith("data: ") or not event:
+                        continue
+                    data = json.loads(line[len("data: "):])
+                    if event == "progress":
+                        bar.progress(data["fraction"], text=data.get("message") or "")
+                    elif event == "step_finished":
+                        icon = "✅" if data["status"] == "done" else "❌"
+                        st.write(f"{icon} {data['name']} ({data['seconds']}s)")
+                    elif event == "records" and data.get("query"):
+                        st.write(f"• {data['source']} | {data['query']}: +{data['new']} ({data['records']} total)")
+                    elif event == "country":
+                        st.write(f"• {data['country']}: {data['products']} products from {data['attempts']} searches")
+                    elif event == "status" and data["status"] in ("done", "failed"):
+                        bar.progress(1.0)
+                        if data["status"] == "done":
+                            box.update(label=f"{label}: done", state="complete", expanded=False)
+                            st.cache_data.clear()  # show the new data on the next render
+                        else:
+                            box.update(label=f"{label}: failed ({data.get('error')})", state="error")
+                        return data["status"]
+        except Exception as e:
+            box.update(label=f"{label}: lost the progress stream ({e})", state="error")
+    return None
+
 @st.cache_data(ttl=300)
 def check_api_health():
     try:
@@ -186,64 +293,52 @@ with st.sidebar:
     st.divider()
     
     st.subheader("Global Filters")
-    # Load Data for Filters
-    df = fetch_trends()
+    # Filter options come from the unfiltered summary
+    trend_overview = fetch_trend_summary()
+    filter_options = trend_overview.get("options", {})
     
-    if df.empty:
+    if not trend_overview.get("signals"):
         st.warning("No data found.")
         selected_country = "All"
         selected_categories = []
         selected_market = []
+        selected_marketplaces = []
         selected_lifecycle = []
     else:
         # Country Filter
-        all_countries = sorted(df["country"].dropna().unique().tolist())
-        selected_country = st.selectbox("Geography", ["All"] + all_countries)
+        selected_country = st.selectbox("Geography", ["All"] + filter_options.get("country", []))
         
         # Category Filter
-        if "category" not in df.columns: df["category"] = "Others"
-        cats = sorted(df["category"].dropna().unique().tolist())
+        cats = filter_options.get("category", [])
         selected_categories = st.multiselect("Category", cats, default=cats)
         
         # Market Type
-        if "market_type" in df.columns:
-            mkts = sorted(df["market_type"].dropna().unique().tolist())
-            selected_market = st.multiselect("Market Type", mkts, default=mkts)
-        else:
-            selected_market = []
+        mkts = filter_options.get("market_type", [])
+        selected_market = st.multiselect("Market Type", mkts, default=mkts) if mkts else []
         
         # Marketplace Filter (Amazon, eBay, etc.)
-        if "marketplace" in df.columns:
-            marketplaces = sorted(df["marketplace"].dropna().unique().tolist())
-            selected_marketplaces = st.multiselect("Marketplace", marketplaces, default=marketplaces)
-        else:
-            selected_marketplaces = []
+        marketplaces = filter_options.get("marketplace", [])
+        selected_marketplaces = st.multiselect("Marketplace", marketplaces, default=marketplaces) if marketplaces else []
             
         # Lifecycle
-        if "lifecycle_stage" in df.columns:
-            stages = sorted(df["lifecycle_stage"].dropna().unique().tolist())
-            selected_lifecycle = st.multiselect("Lifecycle", stages, default=stages)
-        else:
-            selected_lifecycle = []
+        stages = filter_options.get("lifecycle_stage", [])
+        selected_lifecycle = st.multiselect("Lifecycle", stages, default=stages) if stages else []
 
 
 # Main Filtering Logic
 # =========================
-if not df.empty:
-    filtered_df = df.copy()
-    if selected_country != "All":
-        filtered_df = filtered_df[filtered_df["country"] == selected_country]
-    
-    if selected_categories:
-        filtered_df = filtered_df[filtered_df["category"].isin(selected_categories)]
-    if selected_market and "market_type" in filtered_df.columns:
-        filtered_df = filtered_df[filtered_df["market_type"].isin(selected_market)]
-    if selected_marketplaces and "marketplace" in filtered_df.columns:
-        filtered_df = filtered_df[filtered_df["marketplace"].isin(selected_marketplaces)]
-    if selected_lifecycle and "lifecycle_stage" in filtered_df.columns:
-        filtered_df = filtered_df[filtered_df["lifecycle_stage"].isin(selected_lifecycle)]
-else:
-    filtered_df = pd.DataFrame()
+def narrowed(selected, options):
+    """Selected values to filter on; () when all (or none) are selected, i.e. no filter."""
+    return () if set(selected) >= set(options) else tuple(sorted(selected))
+
+has_trends = bool(trend_overview.get("signals"))
+trend_filters = {
+    "country": selected_country,
+    "categories": narrowed(selected_categories, filter_options.get("category", [])),
+    "market_types": narrowed(selected_market, filter_options.get("market_type", [])),
+    "marketplaces": narrowed(selected_marketplaces, filter_options.get("marketplace", [])),
+    "lifecycle": narrowed(selected_lifecycle, filter_options.get("lifecycle_stage", [])),
+}
 
 # =========================
 # Application Tabs
@@ -259,21 +354,18 @@ tab_overview, tab_market, tab_festival, tab_ops = st.tabs([
 # TAB 1: EXECUTIVE OVERVIEW
 # -------------------------
 with tab_overview:
-    if filtered_df.empty:
+    summary = fetch_trend_summary(**trend_filters) if has_trends else {}
+    if not summary.get("signals"):
         st.info("Awaiting Data...")
     else:
         # Top Level Metrics
         m1, m2, m3, m4, m5 = st.columns(5)
-        m1.metric("Active Signals", len(filtered_df), delta_color="normal")
-        m2.metric("Countries Analyzed", filtered_df["country"].nunique())
-        
-        # Marketplace count
-        marketplace_count = filtered_df["marketplace"].nunique() if "marketplace" in filtered_df.columns else 0
-        m3.metric("Marketplaces", marketplace_count)
-        
-        m4.metric("Avg Trend Strength", f"{filtered_df['trend_strength'].mean():.1f}")
-        validated_count = len(filtered_df[filtered_df["lifecycle_stage"] == "Validated"]) if "lifecycle_stage" in filtered_df else 0
-        m5.metric("Validated Opportunities", validated_count)
+        m1.metric("Active Signals", summary["signals"], delta_color="normal")
+        m2.metric("Countries Analyzed", summary["countries"])
+        m3.metric("Marketplaces", summary["marketplaces"])
+        avg_strength = summary.get("avg_trend_strength")
+        m4.metric("Avg Trend Strength", f"{avg_strength:.1f}" if avg_strength is not None else "n/a")
+        m5.metric("Validated Opportunities", summary["validated"])
 
         st.divider()
         
@@ -282,8 +374,7 @@ with tab_overview:
         
         with c1:
             st.subheader("Category Distribution")
-            cat_counts = filtered_df["category"].value_counts().reset_index()
-            cat_counts.columns = ["category", "count"]
+            cat_counts = pd.DataFrame(list(summary["category_counts"].items()), columns=["category", "count"])
             chart_cat = alt.Chart(cat_counts).mark_arc(innerRadius=50).encode(
                 theta="count",
                 color="category",
@@ -293,20 +384,21 @@ with tab_overview:
             
         with c2:
             st.subheader("Trend Strength by Lifecycle")
-            if "lifecycle_stage" in filtered_df:
-                chart_life = alt.Chart(filtered_df).mark_bar().encode(
+            if summary["lifecycle_counts"]:
+                life_counts = pd.DataFrame(list(summary["lifecycle_counts"].items()), columns=["lifecycle_stage", "count"])
+                chart_life = alt.Chart(life_counts).mark_bar().encode(
                     x="lifecycle_stage",
-                    y="count()",
+                    y="count",
                     color="lifecycle_stage",
-                    tooltip=["lifecycle_stage", "count()"]
+                    tooltip=["lifecycle_stage", "count"]
                 ).interactive()
                 st.altair_chart(chart_life, use_container_width=True)
 
         st.subheader("Top Performers (Strength > 80)")
-        top_performers = filtered_df[filtered_df["trend_strength"] >= 80].head(5)
+        top_performers = pd.DataFrame(summary["top_performers"])
         if not top_performers.empty:
             st.dataframe(
-                top_performers[["item", "category", "country", "trend_strength"]],
+                top_performers,
                 hide_index=True,
                 use_container_width=True
             )
@@ -317,51 +409,71 @@ with tab_overview:
 with tab_market:
     st.subheader("Deep Dive Analysis")
     
-    if filtered_df.empty:
+    # Keyset pagination: a stack of cursors, reset whenever the filters change
+    filter_key = json.dumps(trend_filters, sort_keys=True)
+    if st.session_state.get("trend_filter_key") != filter_key:
+        st.session_state.trend_filter_key = filter_key
+        st.session_state.trend_cursors = [None]
+    trend_cursors = st.session_state.trend_cursors
+
+    # List view skips the urls lists; the inspector fetches them per product
+    list_fields = ["item", "trend_strength", "category", "country", "market_type"]
+    if filter_options.get("marketplace"):
+        list_fields.insert(4, "marketplace")
+    if filter_options.get("lifecycle_stage"):
+        list_fields.insert(-1, "lifecycle_stage")
+    page_df, next_cursor, total_matches = (
+        fetch_trends_page(**trend_filters, cursor=trend_cursors[-1], fields=tuple(list_fields))
+        if has_trends else (pd.DataFrame(), None, 0)
+    )
+
+    if page_df.empty:
         st.warning("No data available based on current filters.")
     else:
         col_list, col_detail = st.columns([1.5, 1])
         
         with col_list:
-            st.caption("Select a product to view detailed intelligence.")
-            
-            # Formatted Table
-            display_cols = ["item", "trend_strength", "category", "country"]
-            if "marketplace" in filtered_df: 
-                display_cols.append("marketplace")
-            if "lifecycle_stage" in filtered_df:
-                display_cols.append("lifecycle_stage")
-            if "market_type" in filtered_df: 
-                display_cols.append("market_type")
-            
-            # Use dataframe with selection if possible, else selectbox
-            # st.dataframe with on_select is newer, sticking to safe selectbox for compatibility unless confirmed
+            first = (len(trend_cursors) - 1) * TRENDS_PAGE_SIZE + 1
+            st.caption(
+                f"Showing {first}-{first + len(page_df) - 1} of {total_matches} products. "
+                "Select a product to view detailed intelligence."
+            )
             
-            # Let's show the table first
             st.dataframe(
-                filtered_df[display_cols].sort_values("trend_strength", ascending=False),
+                page_df,
                 use_container_width=True,
                 height=500,
                 hide_index=True
             )
+
+            p1, p2 = st.columns(2)
+            if p1.button("◀ Previous", disabled=len(trend_cursors) == 1, use_container_width=True):
+                trend_cursors.pop()
+                st.rerun()
+            if p2.button("Next ▶", disabled=not next_cursor, use_container_width=True):
+                trend_cursors.append(next_cursor)
+                st.rerun()
             
-            # Export
-            csv = filtered_df.to_csv(index=False).encode('utf-8')
-            st.download_button(
-                "📥 Export Filtered Data",
-                csv,
-                "trend_intelligence_export.csv",
-                "text/csv",
-                key='download-csv'
-            )
+            # Export pulls every matching page, only on request
+            if st.button("📥 Prepare Export of Filtered Data"):
+                csv = fetch_all_trends(**trend_filters).to_csv(index=False).encode('utf-8')
+                st.download_button(
+                    "📥 Download CSV",
+                    csv,
+                    "trend_intelligence_export.csv",
+                    "text/csv",
+                    key='download-csv'
+                )
 
         with col_detail:
             st.markdown("### 🕵️ Product Inspector")
-            product_list = filtered_df["item"].unique().tolist()
+            product_list = page_df["item"].unique().tolist()
             selected_product_name = st.selectbox("Search / Select Product", product_list)
             
             if selected_product_name:
-                product_rows = filtered_df[filtered_df["item"] == selected_product_name]
+                product_rows, _, _ = fetch_trends_page(**trend_filters, item=selected_product_name, limit=TRENDS_EXPORT_PAGE_SIZE)
+                if product_rows.empty:
+                    product_rows = page_df[page_df["item"] == selected_product_name]
 
                 # If multiple countries exist and user is viewing "All", allow an aggregate view or a country drilldown
                 if selected_country == "All" and "country" in product_rows.columns:
@@ -444,6 +556,31 @@ with tab_market: # Keeping consistent
 
 with tab_festival:
     st.subheader("Seasonal & Cultural Event Signals")
+
+    upcoming_df = fetch_upcoming_festivals()
+    if not upcoming_df.empty:
+        with st.expander(f"📅 Upcoming festivals (next 60 days): {len(upcoming_df)}"):
+            st.dataframe(
+                upcoming_df[["expected_start_date", "festival_name", "country", "days_until"]],
+                hide_index=True,
+                use_container_width=True,
+            )
+            if api_ok and st.button("🔎 Search products for these festivals"):
+                # One batch request (top keyword per festival) instead of one request per festival
+                items = [
+                    {"keyword": row["related_keywords"][0], "festival_name": row["festival_name"], "country": row["country"]}
+                    for _, row in upcoming_df.head(50).iterrows()
+                    if isinstance(row.get("related_keywords"), list) and row["related_keywords"]
+                ]
+                try:
+                    r = requests.post(f"{API_BASE_URL}/festivals/search/batch", json={"items": items}, timeout=5)
+                    if r.status_code == 200:
+                        st.toast(f"Batch search started for {r.json()['items']} festivals", icon="🎉")
+                        follow_job(r.json()["job_id"], "Festival batch search")
+                    else:
+                        st.error(f"Failed: {r.text}")
+                except Exception as e:
+                    st.error(f"Error: {e}")
     
     festival_df = fetch_festivals()
     
@@ -521,7 +658,8 @@ with tab_ops:
                  try:
                      r = requests.post(f"{API_BASE_URL}/pipeline/run", json={"queries": queries_list}, timeout=5)
                      if r.status_code == 200:
-                         st.toast("Pipeline Triggered Successfully!", icon="🚀")
+                         st.toast(r.json().get("message", "Pipeline Triggered Successfully!"), icon="🚀")
+                         follow_job(r.json()["job_id"], "Trend pipeline")
                      else:
                          st.error(f"Failed: {r.text}")
                  except Exception as e:
@@ -549,10 +687,25 @@ with tab_ops:
                         r = requests.post(f"{API_BASE_URL}/festivals/search", json=payload, timeout=5)
                         if r.status_code == 200:
                             st.toast("Festival Search Started!", icon="🎉")
+                            follow_job(r.json()["job_id"], f"Festival search: {fest_kw}")
                         else:
                             st.error(f"Failed: {r.text}")
                     except Exception as e:
                         st.error(f"Error: {e}")
 
+        with st.expander("🧾 Recent jobs"):
+            try:
+                jobs = requests.get(f"{API_BASE_URL}/jobs", params={"limit": 20}, timeout=2).json()
+                if jobs:
+                    st.dataframe(
+                        pd.DataFrame(jobs)[["kind", "status", "progress", "message", "queue_wait_sec", "duration_sec", "error"]],
+                        hide_index=True,
+                        use_container_width=True,
+                    )
+                else:
+                    st.caption("No jobs yet.")
+            except Exception as e:
+                st.caption(f"Could not load jobs: {e}")
+
 st.divider()
 st.caption("Trend Intelligence Platform v2.0 | Deepmind Advanced Co-Pilot Optimized")
@@ -0,0 +1,118 @@
+"""
+Off-peak SerpAPI cache prewarming for upcoming festivals.
+
+Festivals whose expected_start_date falls within PREWARM_LEAD_DAYS get their
+top keywords searched on the country's Amazon domain (best-sellers sort, as
+/festivals/search uses) and stored in serp_cache, so live merchandiser searches
+are mostly cache hits. Runs only during PREWARM_OFF_PEAK_HOURS and spends at
+most the "serpapi_prewarm" daily budget in quota_ledger, charged per SerpAPI
+request (key rotation and retries included), not per planned search.
+
+Schedule hourly from cron:  python festival_prewarm.py
+Preview / run now:          python festival_prewarm.py --dry-run | --force
+"""
+import argparse
+import os
+from datetime import datetime, timedelta, timezone
+
+import festival_product_discovery as fpd
+import festival_store
+import quota_ledger
+import seasonal_calendar
+import serp_cache
+from logger import logger
+
+PREWARM_LEAD_DAYS = int(os.getenv("PREWARM_LEAD_DAYS", "30"))
+PREWARM_KEYWORDS_PER_FESTIVAL = int(os.getenv("PREWARM_KEYWORDS_PER_FESTIVAL", "3"))
+# Local hours [start, end) considered off-peak, e.g. "1-6"
+PREWARM_OFF_PEAK_HOURS = os.getenv("PREWARM_OFF_PEAK_HOURS", "1-6")
+PREWARM_QUOTA_PROVIDER = "serpapi_prewarm"
+# Re-warm entries that would expire before the next nightly run
+REFRESH_MARGIN_SECONDS = 24 * 3600
+PREWARM_SORT_BESTSELLERS = True
+
+
+def is_off_peak(now=None):
+    now = now or datetime.now()
+    start, end = (int(h) for h in PREWARM_OFF_PEAK_HOURS.split("-", 1))
+    if start <= end:
+        return start <= now.hour < end
+    return now.hour >= start or now.hour < end  # window wraps midnight, e.g. "22-4"
+
+
+def plan_prewarm(today=None, lead_days=PREWARM_LEAD_DAYS, keywords_per_festival=PREWARM_KEYWORDS_PER_FESTIVAL):
+    """
+    [(festival, keyword, domain), ...] soonest festival first: each festival's top
+    keywords (previous yield first, then calendar order), one search per
+    (keyword, domain), skipping entries that are still fresh in the cache.
+    """
+    today = today or datetime.now(timezone.utc).date()
+    calendar = seasonal_calendar.get_calendar()
+    yield_history = fpd.keyword_yield_history(festival_store.query())
+
+    plan = []
+    seen = set()
+    for festival in calendar.in_window(today, today + timedelta(days=lead_days)):
+        domain = fpd.resolve_amazon_domain(festival.country)
+        if not domain or domain == "EU_AGGREGATED":
+            continue
+        keywords = sorted(
+            festival.keywords,
+            key=lambda kw: -yield_history[(festival.country, kw.strip().lower())],
+        )[:keywords_per_festival]
+        for keyword in keywords:
+            key = (keyword.strip().lower(), domain)
+            if key in seen:
+                continue
+            seen.add(key)
+            if serp_cache.is_fresh(keyword, domain, PREWARM_SORT_BESTSELLERS, min_remaining=REFRESH_MARGIN_SECONDS):
+                continue
+            plan.append((festival, keyword, domain))
+    return plan
+
+
+def run_prewarm(force=False, dry_run=False):
+    """Warm the cache for the current plan. Returns a summary dict."""
+    summary = {"off_peak": is_off_peak(), "planned": 0, "warmed": 0, "empty": 0, "failed": 0, "quota_stopped": False}
+    if not force and not summary["off_peak"]:
+        logger.info(f"Prewarm skipped | outside off-peak hours {PREWARM_OFF_PEAK_HOURS}")
+        return summary
+
+    if not fpd.SERP_API_KEYS and not dry_run:
+        logger.warning("Prewarm skipped | no SERP_API_KEYS configured")
+        return summary
+
+    plan = plan_prewarm()
+    summary["planned"] = len(plan)
+    logger.info(f"Prewarm | {len(plan)} searches for festivals in the next {PREWARM_LEAD_DAYS} days")
+    if dry_run:
+        for festival, keyword, domain in plan:
+            print(f"{festival.start}  {festival.country:15s} {festival.name:35s} {keyword!r} @ {domain}")
+        return summary
+
+    for festival, keyword, domain in plan:
+        try:
+            results = fpd.warm_search(keyword, domain, PREWARM_SORT_BESTSELLERS, quota_provider=PREWARM_QUOTA_PROVIDER)
+        except quota_ledger.QuotaExceededError as e:
+            logger.warning(f"Prewarm stopped | {e}")
+            summary["quota_stopped"] = True
+            break
+        except fpd.CircuitOpenError as e:
+            logger.warning(f"Prewarm stopped | {e}")
+            break
+        except fpd.SearchFailed as e:
+            logger.warning(f"Prewarm search failed | {e}")
+            summary["failed"] += 1
+            continue
+        summary["warmed" if results else "empty"] += 1
+
+    logger.info(f"Prewarm done | warmed: {summary['warmed']} | empty: {summary['empty']} | failed: {summary['failed']} | planned: {summary['planned']}")
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prewarm the SerpAPI cache for upcoming festivals")
+    parser.add_argument("--force", action="store_true", help="Run even outside off-peak hours")
+    parser.add_argument("--dry-run", action="store_true", help="Only print the planned searches")
+    args = parser.parse_args()
+    print(run_prewarm(force=args.force or args.dry_run, dry_run=args.dry_run))
@@ -1,10 +1,22 @@
 import json
 
-import random
 import requests
 import argparse
+import contextvars
+import threading
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, TimeoutError as FutureTimeout, wait
 from datetime import datetime, timedelta, timezone
 from country_config import COUNTRIES
+import festival_store
+import keyword_quality
+import progress
+import rate_limiter
+import seasonal_calendar
+import serp_cache
+from logger import logger
+from resilience import resilient_get, CircuitOpenError, SERPAPI_TRANSIENT_STATUSES
 
 import os
 from dotenv import load_dotenv
@@ -33,6 +45,31 @@ TARGET_COUNTRIES = None  # set by CLI args (None = allow all countries)
 DATE_WINDOW_PAST_DAYS = 7
 DATE_WINDOW_FUTURE_DAYS = 180
 
+# Keyword plan: each lower-ranked keyword of a festival counts as this many days further away,
+# so the nearest festivals' best keywords go first and later festivals still get a turn.
+KEYWORD_RANK_DAYS = 30
+COUNTRY_WORKERS = 8  # countries planned/fetched concurrently
+SERPAPI_CONCURRENCY = 4  # SerpAPI calls in flight at once across all countries
+# Interactive searches (rate_limiter.priority) get free slots before bulk ones
+_serpapi_slots = rate_limiter.PrioritySemaphore(SERPAPI_CONCURRENCY)
+# Identical (keyword, domain, sort) searches share one SerpAPI call: concurrent callers wait for
+# the in-flight one, later callers reuse its results for this long.
+SEARCH_MEMO_SECONDS = 900
+# Hedged fetch for user-facing searches (opt-in): start the amazon.com fallback if the country's
+# domain has not produced products after this many seconds (0 = both at once). SerpAPI Amazon
+# searches often take longer than a couple of seconds, so a short delay doubles the calls and
+# favours amazon.com results. Empty/"off" (default) = sequential only.
+_hedge_env = os.getenv("FESTIVAL_HEDGE_DELAY", "off").strip().lower()
+HEDGE_DELAY_SECONDS = None if _hedge_env in ("", "off", "none") else float(_hedge_env)
+_hedge_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="serp-hedge")
+# Skip generic / low-yield keywords in run_pipeline (see keyword_quality.py). "0" plans every keyword.
+KEYWORD_QUALITY = os.getenv("FESTIVAL_KEYWORD_QUALITY", "1") != "0"
+BATCH_SEARCH_WORKERS = 4  # searches of one /festivals/search/batch job in flight at once
+
+
+class SearchFailed(Exception):
+    """No SerpAPI search completed (circuit open, every key exhausted or failing), as opposed to no results."""
+
 
 def _is_quota_or_rate_limit_error(status_code, data):
     if status_code in (401, 403, 429):
@@ -55,16 +92,8 @@ def _is_quota_or_rate_limit_error(status_code, data):
 
 
 def load_seasonal_data(path):
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-def is_festival_near(start, end):
-    if SKIP_DATE_FILTER:
-        return True
-    today = datetime.now(timezone.utc).date()
-    window_start = today - timedelta(days=DATE_WINDOW_PAST_DAYS)
-    window_end = today + timedelta(days=DATE_WINDOW_FUTURE_DAYS)
-    return not (end < window_start or start > window_end)
+    """Raw seasonal_config data, parsed once per file change (see seasonal_calendar)."""
+    return seasonal_calendar.get_calendar(path).data
 
 def resolve_amazon_domain(country):
     c = COUNTRY_ALIASES.get(country, country)
@@ -92,75 +121,254 @@ def fetch_top_amazon_product(keyword, amazon_domain):
     return products[0] if products else None
 
 
-def fetch_amazon_products(keyword, amazon_domain, limit=8, sort_by_bestsellers=False):
-    """Fetch up to `limit` products from Amazon search (SerpAPI).
-    If sort_by_bestsellers=True, uses Best Sellers sort (s=exact-aware-popularity-rank).
+class SingleFlight:
+    """
+    Collapse concurrent identical calls into one and remember results for `ttl`
+    seconds. Results failing `remember` (default: empty ones) and exceptions
+    are shared with current waiters only.
+    """
+
+    def __init__(self, ttl, remember=bool):
+        self.ttl = ttl
+        self.remember = remember
+        self.stats = Counter()
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._done = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            now = time.monotonic()
+            done = self._done.get(key)
+            if done and now - done[0] < self.ttl:
+                self.stats["memo_hits"] += 1
+                return done[1]
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+                self.stats["calls"] += 1
+            else:
+                self.stats["coalesced"] += 1
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            # Failures are shared with current waiters only, never remembered
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            del self._in_flight[key]
+            now = time.monotonic()
+            self._done = {k: v for k, v in self._done.items() if now - v[0] < self.ttl}
+            if self.remember(result):
+                self._done[key] = (now, result)
+        future.set_result(result)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._done.clear()
+
+
+_searches = SingleFlight(SEARCH_MEMO_SECONDS)
+
+
+def _search_domain(keyword, domain, sort_by_bestsellers=False, quota_provider=None):
     """
-    for domain in (amazon_domain, "amazon.com"):
-        base_params = {"engine": "amazon", "amazon_domain": domain, "k": keyword}
-        if sort_by_bestsellers:
-            base_params["s"] = "exact-aware-popularity-rank"
+    One Amazon search on one domain, rotating SerpAPI keys on quota errors.
+    Returns the raw result dicts ([] when a search completed without usable
+    results); raises SearchFailed when no key got a search through.
+    CircuitOpenError propagates so callers can stop early. With quota_provider
+    set, every SerpAPI attempt is charged to that daily budget and
+    QuotaExceededError propagates too.
+    """
+    base_params = {"engine": "amazon", "amazon_domain": domain, "k": keyword}
+    if sort_by_bestsellers:
+        base_params["s"] = "exact-aware-popularity-rank"
+
+    empty_results = 0
+    last_error = "no SERP_API_KEYS configured"
+    for key_idx, api_key in enumerate(SERP_API_KEYS or []):
+        params = dict(base_params)
+        params["api_key"] = api_key
+        try:
+            with _serpapi_slots:
+                response = resilient_get(
+                    "serpapi", SERP_ENDPOINT, params=params, timeout=8,
+                    retry_statuses=SERPAPI_TRANSIENT_STATUSES,
+                    quota_endpoint="search" if quota_provider else None, quota_provider=quota_provider,
+                )
+            status = response.status_code
+            data = response.json()
+        except CircuitOpenError:
+            if DEBUG_SERP:
+                print(f"[SerpAPI circuit open] domain={domain} keyword={keyword!r}")
+            raise
+        except (requests.RequestException, ValueError) as e:
+            if DEBUG_SERP:
+                print(f"[SerpAPI exception] domain={domain} keyword={keyword!r} key_idx={key_idx}")
+            last_error = str(e)
+            continue
 
-        keys = SERP_API_KEYS or []
-        if not keys:
+        if data.get("error") and _is_quota_or_rate_limit_error(status, data):
+            if DEBUG_SERP:
+                print(f"[SerpAPI rotate key] domain={domain} keyword={keyword!r} key_idx={key_idx} -> {data.get('error')}")
+            last_error = data.get("error")
+            continue
+        if status >= 400:
+            if DEBUG_SERP:
+                print(f"[SerpAPI error] domain={domain} keyword={keyword!r} key_idx={key_idx} status={status} -> {data.get('error')}")
+            raise SearchFailed(f"SerpAPI HTTP {status} for {keyword!r} on {domain}: {data.get('error')}")
+        if data.get("error"):
+            # e.g. "Amazon hasn't returned any results for this query."
+            if DEBUG_SERP:
+                print(f"[SerpAPI error] domain={domain} keyword={keyword!r} key_idx={key_idx} status={status} -> {data.get('error')}")
             return []
-        empty_results = 0
-        for key_idx, api_key in enumerate(keys):
-            params = dict(base_params)
-            params["api_key"] = api_key
-            try:
-                response = requests.get(SERP_ENDPOINT, params=params, timeout=8)
-                status = response.status_code
-                data = response.json()
-            except (requests.RequestException, ValueError):
-                if DEBUG_SERP:
-                    print(f"[SerpAPI exception] domain={domain} keyword={keyword!r} key_idx={key_idx}")
-                continue
 
-            if data.get("error") and _is_quota_or_rate_limit_error(status, data):
-                if DEBUG_SERP:
-                    print(f"[SerpAPI rotate key] domain={domain} keyword={keyword!r} key_idx={key_idx} -> {data.get('error')}")
-                continue
-            if status >= 400 or data.get("error"):
-                if DEBUG_SERP:
-                    print(f"[SerpAPI error] domain={domain} keyword={keyword!r} key_idx={key_idx} status={status} -> {data.get('error')}")
-                break
-
-            results = (
-                data.get("organic_results")
-                or data.get("product_results")
-                or data.get("shopping_results")
-                or (data.get("products") if isinstance(data.get("products"), list) else None)
-                or []
-            )
-            if not results:
-                empty_results += 1
-                if empty_results >= MAX_EMPTY_RESULTS_PER_DOMAIN:
-                    break
-                continue
+        results = (
+            data.get("organic_results")
+            or data.get("product_results")
+            or data.get("shopping_results")
+            or (data.get("products") if isinstance(data.get("products"), list) else None)
+            or []
+        )
+        if not results:
+            empty_results += 1
+            if empty_results >= MAX_EMPTY_RESULTS_PER_DOMAIN:
+                return []
+            continue
+        return results
+    if empty_results:
+        return []
+    raise SearchFailed(f"SerpAPI search for {keyword!r} on {domain} failed: {last_error}")
+
+
+def _cached_search(keyword, domain, sort_by_bestsellers=False):
+    """Persistent cache first (see festival_prewarm.py), then a live SerpAPI search."""
+    cached = serp_cache.get(keyword, domain, sort_by_bestsellers)
+    if cached is not None:
+        return cached
+    return warm_search(keyword, domain, sort_by_bestsellers)
+
+
+def warm_search(keyword, domain, sort_by_bestsellers=False, quota_provider=None):
+    """Live search that refreshes the persistent cache (empty results are not cached)."""
+    results = _search_domain(keyword, domain, sort_by_bestsellers, quota_provider=quota_provider)
+    if results:
+        serp_cache.put(keyword, domain, sort_by_bestsellers, results)
+    return results
+
+
+def search_domain(keyword, domain, sort_by_bestsellers=False):
+    """_cached_search() coalesced across countries, festivals and concurrent API requests."""
+    key = (str(keyword).strip().lower(), domain, bool(sort_by_bestsellers))
+    return _searches.do(key, lambda: _cached_search(keyword, domain, sort_by_bestsellers))
+
+
+def _parse_results(results, limit):
+    # Parse all results, then prioritize Prime products (more likely to ship internationally)
+    parsed_products = []
+    seen_urls = set()
+    for item in results[:limit * 3]:
+        if not isinstance(item, dict):
+            continue
+        parsed = _parse_product(item)
+        if not parsed or (not parsed.get("product_title") and not parsed.get("product_url")):
+            continue
+        url = parsed.get("product_url")
+        if url and url in seen_urls:
+            continue
+        if url:
+            seen_urls.add(url)
+        parsed_products.append(parsed)
+
+    # Sort: Prime products first (more likely to ship to various locations)
+    parsed_products.sort(key=lambda p: (not p.get("is_prime", False)))
+    return parsed_products[:limit]
+
+
+def _domain_products(keyword, domain, limit, sort_by_bestsellers):
+    return _parse_results(search_domain(keyword, domain, sort_by_bestsellers), limit)
+
 
-            # Parse all results, then prioritize Prime products (more likely to ship internationally)
-            parsed_products = []
-            seen_urls = set()
-            for item in results[:limit * 3]:
-                if not isinstance(item, dict):
-                    continue
-                parsed = _parse_product(item)
-                if not parsed or (not parsed.get("product_title") and not parsed.get("product_url")):
-                    continue
-                url = parsed.get("product_url")
-                if url and url in seen_urls:
-                    continue
-                if url:
-                    seen_urls.add(url)
-                parsed_products.append(parsed)
-
-            # Sort: Prime products first (more likely to ship to various locations)
-            parsed_products.sort(key=lambda p: (not p.get("is_prime", False)))
-            output = parsed_products[:limit]
+def _submit(pool, fn, *args):
+    """pool.submit that carries the caller's context (request priority) into the worker thread."""
+    return pool.submit(contextvars.copy_context().run, fn, *args)
+
+
+def _fetch_hedged(keyword, domains, limit, sort_by_bestsellers, delay):
+    """
+    Start the primary domain, add the fallback after `delay` seconds (or once the
+    primary comes back empty) and return (first non-empty product list, domain
+    that produced it). The slower search is cancelled if it has not started,
+    otherwise ignored (its results still land in the search memo).
+    """
+    primary = _submit(_hedge_pool, _domain_products, keyword, domains[0], limit, sort_by_bestsellers)
+    try:
+        output = primary.result(timeout=delay)
+        if output:
+            return output, domains[0]
+    except FutureTimeout:
+        pass
+    except CircuitOpenError as e:
+        raise SearchFailed(str(e)) from e
+    except SearchFailed:
+        pass
+
+    fallback = _submit(_hedge_pool, _domain_products, keyword, domains[1], limit, sort_by_bestsellers)
+    domain_of = {primary: domains[0], fallback: domains[1]}
+    pending = {primary, fallback}
+    failure = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                output = future.result()
+            except (CircuitOpenError, SearchFailed) as e:
+                failure, output = e, []
             if output:
-                return output
-            break
+                for loser in pending:
+                    loser.cancel()
+                return output, domain_of[future]
+    if failure:
+        raise SearchFailed(str(failure)) from failure
+    return [], None
+
+
+def fetch_amazon_products(keyword, amazon_domain, limit=8, sort_by_bestsellers=False, hedge_delay=None):
+    """Fetch up to `limit` products from Amazon search (SerpAPI).
+    If sort_by_bestsellers=True, uses Best Sellers sort (s=exact-aware-popularity-rank).
+    hedge_delay (seconds) races the amazon.com fallback against the country's domain
+    instead of trying them one after the other. Each product carries the
+    "amazon_domain" that answered.
+    [] means every domain was searched and had nothing; SearchFailed means at
+    least one of them could not be searched, so the keyword was not really tried.
+    """
+    if not SERP_API_KEYS:
+        return []
+    domains = list(dict.fromkeys((amazon_domain, "amazon.com")))
+    if hedge_delay is not None and len(domains) > 1:
+        output, domain = _fetch_hedged(keyword, domains, limit, sort_by_bestsellers, hedge_delay)
+        return [{**product, "amazon_domain": domain} for product in output]
+    failure = None
+    for domain in domains:
+        try:
+            results = search_domain(keyword, domain, sort_by_bestsellers)
+        except CircuitOpenError as e:
+            raise SearchFailed(str(e)) from e
+        except SearchFailed as e:
+            failure = e
+            continue
+        output = _parse_results(results, limit)
+        if output:
+            return [{**product, "amazon_domain": domain} for product in output]
+    if failure:
+        raise failure
     return []
 
 def _parse_festival_filter(value):
@@ -185,82 +393,188 @@ def _parse_festival_filter(value):
     return country_map
 
 
-def run_pipeline(target_countries=None, festival_filter=None):
-    seasonal_data = load_seasonal_data("seasonal_config.json")
-    output = []
+def days_until_festival(start, end, today=None):
+    """0 while a festival is on, otherwise days to its next (yearly) start."""
+    today = today or datetime.now(timezone.utc).date()
+    if start <= today <= end:
+        return 0
+    if start > today:
+        return (start - today).days
+    return max(0, (start + timedelta(days=365) - today).days)
 
-    for country, country_data in seasonal_data.items():
+
+def keyword_yield_history(results):
+    """(country, keyword) -> products previously stored for it (mock rows excluded)."""
+    return Counter(
+        (r.get("country"), str(r.get("keyword_used", "")).strip().lower())
+        for r in results
+        if isinstance(r, dict) and not r.get("_mock")
+    )
+
+
+def plan_country_keywords(
+    country, eligible, yield_history=None, today=None, limit=MAX_FETCH_ATTEMPTS_PER_COUNTRY, scorer=None, skipped=None
+):
+    """
+    Deterministic fetch plan for one country: [(festival, keyword), ...] where
+    festivals are seasonal_calendar.Festival entries.
+    Keywords are deduplicated across festivals (the nearest festival keeps a
+    shared keyword), ordered by festival proximity and keyword yield, and capped
+    at `limit` attempts.
+    With a keyword_quality.KeywordScorer, low scorers are dropped (and appended
+    to `skipped`) and the rest ordered by score instead of raw yield.
+    """
+    yield_history = yield_history or Counter()
+    candidates = []
+    seen = set()
+    dated = sorted(
+        ((days_until_festival(f.start, f.end, today), f) for f in eligible),
+        key=lambda x: x[0],
+    )  # stable: calendar order breaks ties
+
+    for days, festival in dated:
+        keywords = []
+        for keyword in festival.keywords:
+            norm = str(keyword).strip().lower()
+            if not norm or norm in seen:
+                continue
+            seen.add(norm)
+            keywords.append(keyword)
+        if scorer is not None:
+            keywords, dropped = scorer.rank(country, festival, keywords)
+            if skipped is not None:
+                skipped.extend({**entry, "festival_name": festival.name} for entry in dropped)
+        else:
+            # Keywords that produced products before first, then the calendar's own order
+            keywords.sort(key=lambda kw: -yield_history[(country, kw.strip().lower())])
+        for rank, keyword in enumerate(keywords):
+            candidates.append((days + rank * KEYWORD_RANK_DAYS, len(candidates), festival, keyword))
+
+    candidates.sort(key=lambda c: (c[0], c[1]))
+    return [(festival, keyword) for _, _, festival, keyword in candidates[:limit]]
+
+
+def _eligible_festivals(calendar, country, festival_filter, today=None):
+    """Festivals for a country that have keywords, pass the filter and (unless skipped) the date window."""
+    if SKIP_DATE_FILTER:
+        festivals = calendar.festivals(country)
+    else:
+        festivals = calendar.upcoming(today, DATE_WINDOW_PAST_DAYS, DATE_WINDOW_FUTURE_DAYS, country)
+    # If a festival filter is provided, enforce it.
+    allowed = festival_filter.get(country) if festival_filter else None
+    return [f for f in festivals if f.keywords and (not allowed or f.name in allowed)]
+
+
+def _country_candidates(calendar, target_countries, festival_filter):
+    """(country, amazon_domain, eligible festivals) for every country the pipeline can fetch."""
+    for country in calendar.countries():
         if target_countries and country not in target_countries:
             continue
-        festivals = (country_data.get("festivals") or []) if isinstance(country_data, dict) else []
 
         amazon_domain = resolve_amazon_domain(country)
         if not amazon_domain or amazon_domain == "EU_AGGREGATED":
             continue
 
-        # Pre-filter eligible festivals for this country.
-        eligible = []
-        for festival in festivals:
-            if not isinstance(festival, dict):
-                continue
-            try:
-                start = datetime.strptime(
-                    festival.get("expected_start_date") or "", "%Y-%m-%d"
-                ).date()
-                end = datetime.strptime(
-                    festival.get("expected_end_date") or "", "%Y-%m-%d"
-                ).date()
-            except (ValueError, TypeError):
-                continue
-            if not is_festival_near(start, end):
-                continue
-            # If a festival filter is provided, enforce it.
-            if festival_filter:
-                allowed = festival_filter.get(country)
-                if allowed and festival.get("festival_name") not in allowed:
-                    continue
-            keywords = festival.get("related_keywords") or []
-            if not keywords:
-                continue
-            eligible.append(festival)
+        eligible = _eligible_festivals(calendar, country, festival_filter)
+        if eligible:
+            yield country, amazon_domain, eligible
 
-        if not eligible:
-            continue
 
-        country_products = 0
-        attempts = 0
-        seen_urls = set()
-        while country_products < MAX_PRODUCTS_PER_COUNTRY and attempts < MAX_FETCH_ATTEMPTS_PER_COUNTRY:
-            attempts += 1
-            festival = random.choice(eligible)
-            keywords = festival.get("related_keywords") or []
-            keyword = random.choice(keywords)
+def keyword_plan_report(calendar, scorer, target_countries=None, festival_filter=None, yield_history=None, today=None):
+    """
+    Scored plan per country next to the unscored one. calls_saved counts the
+    unscored plan's attempts that went to keywords the scorer skips.
+    """
+    yield_history = yield_history or Counter()
+    report = {"countries": {}, "planned_before": 0, "planned_after": 0, "calls_saved": 0, "skipped": 0}
+    for country, amazon_domain, eligible in _country_candidates(calendar, target_countries, festival_filter):
+        skipped = []
+        plan = plan_country_keywords(country, eligible, yield_history, today, scorer=scorer, skipped=skipped)
+        baseline = plan_country_keywords(country, eligible, yield_history, today)
+        dropped = {(entry["festival_name"], entry["keyword"]) for entry in skipped}
+        saved = sum(1 for festival, keyword in baseline if (festival.name, keyword) in dropped)
+        report["countries"][country] = {
+            "amazon_domain": amazon_domain,
+            "plan": plan,
+            "planned_before": len(baseline),
+            "calls_saved": saved,
+            "skipped": skipped,
+        }
+        report["planned_before"] += len(baseline)
+        report["planned_after"] += len(plan)
+        report["calls_saved"] += saved
+        report["skipped"] += len(skipped)
+    return report
+
+
+def _run_country(country, amazon_domain, plan):
+    """Walk a country's plan in order until MAX_PRODUCTS_PER_COUNTRY unique products are found."""
+    output = []
+    seen_urls = set()
+    attempts = []
+    for festival, keyword in plan:
+        if len(output) >= MAX_PRODUCTS_PER_COUNTRY:
+            break
+        try:
             product = fetch_top_amazon_product(keyword, amazon_domain)
-            if not product:
-                continue
-
-            url = product.get("product_url")
-            if url and url in seen_urls:
-                continue
-            if url:
-                seen_urls.add(url)
+        except SearchFailed as e:
+            # Outages are not misses: nothing is recorded against the keyword
+            logger.warning(f"Festival search failed | {country} | {keyword!r} | {e}")
+            continue
+        attempts.append((country, keyword, bool(product)))
+        if not product:
+            continue
 
-            output.append({
-                "country": country,
-                "festival_name": festival.get("festival_name", "?"),
-                "keyword_used": keyword,
-                "amazon_domain": amazon_domain,
-                "product_title": product.get("product_title"),
-                "price": product.get("price"),
-                "rating": product.get("rating"),
-                "product_url": url,
-                "fetch_timestamp": datetime.now(timezone.utc).isoformat()
-            })
-            country_products += 1
+        url = product.get("product_url")
+        if url and url in seen_urls:
+            continue
+        if url:
+            seen_urls.add(url)
 
+        output.append({
+            "country": country,
+            "festival_name": festival.name,
+            "keyword_used": keyword,
+            "amazon_domain": product.get("amazon_domain") or amazon_domain,
+            "product_title": product.get("product_title"),
+            "price": product.get("price"),
+            "rating": product.get("rating"),
+            "product_url": url,
+            "fetch_timestamp": datetime.now(timezone.utc).isoformat()
+        })
+    if SERP_API_KEYS:
+        keyword_quality.record_attempts(attempts)
+    progress.emit("country", country=country, attempts=len(attempts), products=len(output))
     return output
 
 
+def run_pipeline(target_countries=None, festival_filter=None):
+    calendar = seasonal_calendar.get_calendar("seasonal_config.json")
+    stored = festival_store.query()
+    yield_history = keyword_yield_history(stored)
+
+    if KEYWORD_QUALITY:
+        scorer = keyword_quality.KeywordScorer(calendar, stored, keyword_quality.attempt_stats())
+        report = keyword_plan_report(calendar, scorer, target_countries, festival_filter, yield_history)
+        jobs = [(country, info["amazon_domain"], info["plan"]) for country, info in report["countries"].items()]
+        logger.info(
+            f"Festival keyword plan | {report['planned_after']} attempts planned | "
+            f"{report['skipped']} low-value keywords skipped | {report['calls_saved']} calls saved"
+        )
+    else:
+        jobs = [
+            (country, amazon_domain, plan_country_keywords(country, eligible, yield_history))
+            for country, amazon_domain, eligible in _country_candidates(calendar, target_countries, festival_filter)
+        ]
+
+    # Countries run concurrently; SerpAPI calls are bounded by _serpapi_slots and the shared token bucket.
+    # Results keep seasonal_config order regardless of completion order.
+    with ThreadPoolExecutor(max_workers=COUNTRY_WORKERS) as pool:
+        per_country = [f.result() for f in [_submit(pool, _run_country, *job) for job in jobs]]
+
+    return [row for rows in per_country for row in rows]
+
+
 def _mock_products(seasonal_data):
     """Return a few sample rows when SerpAPI gives no results (e.g. Amazon not on plan)."""
     out = []
@@ -290,32 +604,6 @@ def _mock_products(seasonal_data):
     return out
 
 
-def _load_existing_results(path):
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        if isinstance(data, list):
-            return data
-    except Exception:
-        return []
-    return []
-
-
-def _dedupe_results(items):
-    """Deduplicate by (country, product_url) to avoid repeats across runs."""
-    seen = set()
-    deduped = []
-    for item in items:
-        if not isinstance(item, dict):
-            continue
-        key = (item.get("country"), item.get("product_url"))
-        if key in seen:
-            continue
-        seen.add(key)
-        deduped.append(item)
-    return deduped
-
-
 def _parse_countries_arg(value):
     if value is None:
         return None
@@ -325,11 +613,8 @@ def _parse_countries_arg(value):
     return {c.strip() for c in value.split(",") if c.strip()}
 
 
-def run_custom_festival_search(keyword, festival_name, country):
-    """
-    User-driven festival search: keyword + festival name + Amazon country/domain.
-    Runs SerpAPI Amazon search and appends results to festival_trending_products.json.
-    """
+def resolve_search_target(country):
+    """(amazon_domain, country_label) for a country name or raw Amazon domain; domain None if unsupported."""
     amazon_domain = None
     country_label = country
 
@@ -349,20 +634,22 @@ def run_custom_festival_search(keyword, festival_name, country):
                     country_label = cnt
                     break
 
-    if not amazon_domain or amazon_domain == "EU_AGGREGATED":
-        return []
+    if amazon_domain == "EU_AGGREGATED":
+        amazon_domain = None
+    return amazon_domain, country_label
 
-    products = fetch_amazon_products(keyword, amazon_domain, limit=8, sort_by_bestsellers=True)
-    if not products:
-        return []
 
+def _custom_search_rows(keyword, festival_name, country_label, amazon_domain):
+    products = fetch_amazon_products(
+        keyword, amazon_domain, limit=8, sort_by_bestsellers=True, hedge_delay=HEDGE_DELAY_SECONDS
+    )
     output = []
     for product in products:
         output.append({
             "country": country_label,
             "festival_name": festival_name or "Custom",
             "keyword_used": keyword,
-            "amazon_domain": amazon_domain,
+            "amazon_domain": product.get("amazon_domain") or amazon_domain,
             "product_title": product.get("product_title"),
             "price": product.get("price"),
             "rating": product.get("rating"),
@@ -370,16 +657,90 @@ def run_custom_festival_search(keyword, festival_name, country):
             "is_prime": product.get("is_prime", False),
             "fetch_timestamp": datetime.now(timezone.utc).isoformat(),
         })
+    return output
 
-    # Append to existing file and dedupe
-    existing = _load_existing_results("festival_trending_products.json")
-    combined = _dedupe_results(existing + output)
-    with open("festival_trending_products.json", "w", encoding="utf-8") as f:
-        json.dump(combined, f, indent=2)
+
+def run_custom_festival_search(keyword, festival_name, country):
+    """
+    User-driven festival search: keyword + festival name + Amazon country/domain.
+    Runs SerpAPI Amazon search and appends results to the festival store
+    (exported to festival_trending_products.json by festival_store.compact).
+    Raises SearchFailed when SerpAPI could not be searched at all.
+    """
+    amazon_domain, country_label = resolve_search_target(country)
+    if not amazon_domain:
+        return []
+
+    output = _custom_search_rows(keyword, festival_name, country_label, amazon_domain)
+    if not output:
+        return []
+
+    # Append-only: duplicates (country, product_url) are ignored by the store's unique index
+    festival_store.append(output)
+    festival_store.compact()
 
     return output
 
 
+def dedupe_search_items(items):
+    """
+    Unique (keyword, festival_name, country) triples in first-seen order, compared
+    case-insensitively and after resolving the country to its Amazon domain
+    (so "India" and "amazon.in" are the same search).
+    """
+    unique = {}
+    for item in items:
+        keyword = str(item.get("keyword") or "").strip()
+        festival_name = str(item.get("festival_name") or "").strip()
+        country = str(item.get("country") or "").strip()
+        amazon_domain, _ = resolve_search_target(country)
+        key = (keyword.lower(), festival_name.lower(), amazon_domain or country.lower())
+        unique.setdefault(key, {"keyword": keyword, "festival_name": festival_name, "country": country})
+    return list(unique.values())
+
+
+def run_custom_festival_batch(items, on_update=None, workers=BATCH_SEARCH_WORKERS):
+    """
+    Run several custom festival searches concurrently (at most `workers` at once;
+    SerpAPI calls are still bounded by _serpapi_slots and the shared token bucket)
+    and append all their rows to the store in one transaction.
+
+    `items` should already be deduplicated (dedupe_search_items). on_update(index,
+    fields) is called as item `index` moves through running -> done / empty /
+    skipped / failed. Returns (per-item results, rows added to the store).
+    """
+    results = [{"status": "pending", "products": 0, "error": None} for _ in items]
+
+    def update(index, **fields):
+        results[index].update(fields)
+        if on_update:
+            on_update(index, fields)
+
+    def run_one(index):
+        item = items[index]
+        amazon_domain, country_label = resolve_search_target(item["country"])
+        if not item["keyword"] or not amazon_domain:
+            update(index, status="skipped", error="missing keyword" if not item["keyword"] else "unsupported marketplace")
+            return []
+        update(index, status="running")
+        try:
+            rows = _custom_search_rows(item["keyword"], item["festival_name"], country_label, amazon_domain)
+        except Exception as e:
+            update(index, status="failed", error=str(e))
+            return []
+        update(index, status="done" if rows else "empty", products=len(rows))
+        return rows
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="festival-batch") as pool:
+        per_item = [f.result() for f in [_submit(pool, run_one, index) for index in range(len(items))]]
+
+    rows = [row for item_rows in per_item for row in item_rows]
+    added = festival_store.append(rows) if rows else 0
+    if added:
+        festival_store.compact()
+    return results, added
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Fetch festival-related products via SerpAPI.")
     parser.add_argument("--country", type=str, default=None, help="Single country name (e.g. 'Iceland').")
@@ -396,14 +757,14 @@ if __name__ == "__main__":
     festival_filter = _parse_festival_filter(args.festival_filter)
 
     results = run_pipeline(target_countries=target, festival_filter=festival_filter)
+    stats = _searches.stats
+    print(f"SerpAPI searches: {stats['calls']} unique, {stats['coalesced'] + stats['memo_hits']} served from shared results")
     if USE_MOCK_IF_NO_RESULTS and len(results) == 0:
         seasonal_data = load_seasonal_data("seasonal_config.json")
         results = _mock_products(seasonal_data)
         print("SerpAPI returned no products; added MOCK samples. Check API key / Amazon plan.")
 
-    # Append to existing file instead of overwriting, then dedupe.
-    existing = _load_existing_results("festival_trending_products.json")
-    combined = _dedupe_results(existing + results)
-    with open("festival_trending_products.json", "w", encoding="utf-8") as f:
-        json.dump(combined, f, indent=2)
-    print(f"Fetched {len(results)} new festival products; total stored: {len(combined)} -> festival_trending_products.json")
+    # Append to the store (duplicates ignored), then export the JSON snapshot.
+    added = festival_store.append(results)
+    festival_store.compact(force=True)
+    print(f"Fetched {len(results)} festival products ({added} new); total stored: {festival_store.count()} -> festival_trending_products.json")
@@ -0,0 +1,244 @@
+"""
+Append-only festival results store.
+
+Rows live in SQLite (WAL) with a UNIQUE (country, product_url) index, so a
+duplicate check is an index probe and concurrent background tasks append
+atomically instead of rewriting the whole JSON file. festival_trending_products.json
+is still produced for the dashboard / GitHub sync, but only by compact(),
+at most every EXPORT_INTERVAL_SECONDS, and always via an atomic rename. Rows
+held back by that throttle are exported by a trailing compact() once the
+window ends (or at interpreter exit), so the file never stays stale.
+
+An existing festival_trending_products.json is imported the first time the
+store is opened.
+"""
+import atexit
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from logger import logger
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+STATE_DIR = os.path.join(PROJECT_ROOT, "state")
+FESTIVAL_STORE_DB = os.getenv("FESTIVAL_STORE_DB", os.path.join(STATE_DIR, "festival_results.sqlite"))
+FESTIVAL_OUTPUT_FILE = os.getenv("FESTIVAL_OUTPUT_FILE", os.path.join(PROJECT_ROOT, "festival_trending_products.json"))
+
+EXPORT_INTERVAL_SECONDS = 60
+
+_trailing_lock = threading.Lock()
+_trailing_export = None  # threading.Timer for the export deferred by the throttle
+
+
+def _connect():
+    os.makedirs(os.path.dirname(FESTIVAL_STORE_DB), exist_ok=True)
+    conn = sqlite3.connect(FESTIVAL_STORE_DB, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS results ("
+        " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+        " country TEXT NOT NULL,"
+        " url_key TEXT NOT NULL,"  # product_url, '' when missing (one such row per country, as before)
+        " payload TEXT NOT NULL,"
+        " UNIQUE (country, url_key))"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_results_country ON results (country COLLATE NOCASE, id)")
+    conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+    _migrate_json(conn)
+    return conn
+
+
+def _get_meta(conn, key, default=None):
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else default
+
+
+def _set_meta(conn, key, value):
+    conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+
+def _insert(conn, items):
+    added = 0
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO results (country, url_key, payload) VALUES (?, ?, ?)",
+            (item.get("country") or "", item.get("product_url") or "", json.dumps(item, ensure_ascii=False)),
+        )
+        added += cursor.rowcount
+    return added
+
+
+def _migrate_json(conn):
+    """Import the legacy JSON file once, keeping its order."""
+    if _get_meta(conn, "migrated_json"):
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if not _get_meta(conn, "migrated_json"):
+            legacy = []
+            if os.path.exists(FESTIVAL_OUTPUT_FILE):
+                try:
+                    with open(FESTIVAL_OUTPUT_FILE, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                    legacy = data if isinstance(data, list) else []
+                except (OSError, ValueError):
+                    legacy = []
+            if _insert(conn, legacy):
+                _set_meta(conn, "updated_at", time.time())
+            _set_meta(conn, "migrated_json", 1)
+        conn.execute("COMMIT")
+    except Exception:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+
+
+def append(items):
+    """Add result rows in one transaction; duplicates are ignored. Returns rows added."""
+    conn = _connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        added = _insert(conn, items)
+        if added:
+            _set_meta(conn, "updated_at", time.time())
+        conn.execute("COMMIT")
+        return added
+    except Exception:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+
+def query(country=None):
+    """Stored rows in insertion order, optionally for one country (case-insensitive)."""
+    conn = _connect()
+    try:
+        if country:
+            rows = conn.execute(
+                "SELECT payload FROM results WHERE country = ? COLLATE NOCASE ORDER BY id", (country,)
+            )
+        else:
+            rows = conn.execute("SELECT payload FROM results ORDER BY id")
+        return [json.loads(payload) for (payload,) in rows]
+    finally:
+        conn.close()
+
+
+def count():
+    conn = _connect()
+    try:
+        return conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def version():
+    """
+    (version, updated_at) of the stored rows. Rows are only ever added, so
+    "<max id>-<count>" changes exactly when the contents do; updated_at is the
+    time of the last append that added rows (the database file's mtime for
+    stores written before that was recorded).
+    """
+    conn = _connect()
+    try:
+        max_id, total = conn.execute("SELECT COALESCE(MAX(id), 0), COUNT(*) FROM results").fetchone()
+        updated_at = _get_meta(conn, "updated_at")
+    finally:
+        conn.close()
+    if updated_at is None and total:
+        updated_at = os.path.getmtime(FESTIVAL_STORE_DB)
+    return f"{max_id}-{total}", float(updated_at) if updated_at is not None else None
+
+
+def _schedule_trailing_export(delay, path):
+    global _trailing_export
+    with _trailing_lock:
+        if _trailing_export is not None:
+            return
+        _trailing_export = threading.Timer(delay, _run_trailing_export, args=(path,))
+        _trailing_export.daemon = True
+        _trailing_export.start()
+
+
+def _run_trailing_export(path):
+    global _trailing_export
+    with _trailing_lock:
+        _trailing_export = None
+    try:
+        compact(path=path)
+    except Exception as e:
+        logger.warning(f"Festival export failed | {e}")
+
+
+def flush_pending_export():
+    """Run a throttled export now instead of waiting for its timer. Returns True if one was pending."""
+    global _trailing_export
+    with _trailing_lock:
+        pending, _trailing_export = _trailing_export, None
+    if pending is None:
+        return False
+    pending.cancel()
+    compact(force=True, path=pending.args[0])
+    return True
+
+
+atexit.register(flush_pending_export)
+
+
+def compact(force=False, path=None):
+    """
+    Export the store to festival_trending_products.json if rows were added since
+    the last export, at most every EXPORT_INTERVAL_SECONDS unless forced.
+    A throttled export is scheduled for the end of the window.
+    Returns True if a file was written.
+    """
+    path = path or FESTIVAL_OUTPUT_FILE
+    conn = _connect()
+    try:
+        exported_id = int(_get_meta(conn, "exported_id", 0))
+        last = float(_get_meta(conn, "last_export", 0))
+        latest_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM results").fetchone()[0]
+        if not force and latest_id <= exported_id:
+            return False
+        wait = last + EXPORT_INTERVAL_SECONDS - time.time()
+        if not force and wait > 0:
+            _schedule_trailing_export(wait, path)
+            return False
+
+        # Rows are never deleted, so everything up to snapshot_id is a consistent export
+        conn.execute("BEGIN")
+        snapshot_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM results").fetchone()[0]
+        rows = [
+            json.loads(payload)
+            for (payload,) in conn.execute("SELECT payload FROM results WHERE id <= ? ORDER BY id", (snapshot_id,))
+        ]
+        conn.execute("COMMIT")
+
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+        os.chmod(tmp_path, 0o644)  # mkstemp creates 0600 files
+        os.replace(tmp_path, path)
+
+        conn.execute("BEGIN IMMEDIATE")
+        if snapshot_id > int(_get_meta(conn, "exported_id", 0)):
+            _set_meta(conn, "exported_id", snapshot_id)
+        _set_meta(conn, "last_export", time.time())
+        conn.execute("COMMIT")
+        return True
+    finally:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        conn.close()
+
+
+if __name__ == "__main__":
+    compact(force=True)
+    print(f"Exported {count()} festival results -> {FESTIVAL_OUTPUT_FILE}")
@@ -0,0 +1,93 @@
+"""
+Record/replay layer for outbound scraper HTTP calls.
+
+HTTP_FIXTURE_MODE=record  saves every response under HTTP_FIXTURE_DIR
+HTTP_FIXTURE_MODE=replay  serves saved responses and never touches the network
+HTTP_BASE_OVERRIDE=http://127.0.0.1:8765  sends every call to the local stand-in
+(standin_server.py) instead of serpapi.com / googleapis / etsy / old.reddit.
+"""
+import hashlib
+import json
+import os
+from urllib.parse import urlsplit, urlunsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+HTTP_FIXTURE_MODE = os.getenv("HTTP_FIXTURE_MODE", "off").lower()
+HTTP_FIXTURE_DIR = os.getenv("HTTP_FIXTURE_DIR", os.path.join(PROJECT_ROOT, "fixtures", "http"))
+HTTP_BASE_OVERRIDE = os.getenv("HTTP_BASE_OVERRIDE", "")
+
+# Credentials never become part of a fixture key or file
+SECRET_PARAMS = {"api_key", "key"}
+KEPT_HEADERS = ("Content-Type", "Retry-After", "ETag", "Last-Modified")
+
+
+class FixtureMissingError(requests.RequestException):
+    """Replay mode found no recording for a request."""
+
+
+def recording():
+    return HTTP_FIXTURE_MODE == "record"
+
+
+def replaying():
+    return HTTP_FIXTURE_MODE == "replay"
+
+
+def rewrite_url(url):
+    """Point a provider URL at HTTP_BASE_OVERRIDE, keeping path and query."""
+    if not HTTP_BASE_OVERRIDE:
+        return url
+    base = urlsplit(HTTP_BASE_OVERRIDE)
+    parts = urlsplit(url)
+    return urlunsplit((base.scheme, base.netloc, parts.path, parts.query, parts.fragment))
+
+
+def fixture_key(url, params=None):
+    """Stable key for a request: host + path + sorted non-secret params."""
+    parts = urlsplit(url)
+    clean = sorted(
+        (str(k), str(v)) for k, v in (params or {}).items() if k not in SECRET_PARAMS
+    )
+    raw = json.dumps([parts.netloc, parts.path, parts.query, clean])
+    digest = hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+    host = parts.netloc.replace(":", "_") or "local"
+    return f"{host}_{digest}"
+
+
+def _fixture_path(url, params):
+    return os.path.join(HTTP_FIXTURE_DIR, fixture_key(url, params) + ".json")
+
+
+def save_fixture(url, params, response):
+    """Store a response so it can be replayed offline."""
+    os.makedirs(HTTP_FIXTURE_DIR, exist_ok=True)
+    record = {
+        "url": url,
+        "params": {k: v for k, v in (params or {}).items() if k not in SECRET_PARAMS},
+        "status_code": response.status_code,
+        "headers": {h: response.headers[h] for h in KEPT_HEADERS if h in response.headers},
+        "body": response.text,
+    }
+    with open(_fixture_path(url, params), "w", encoding="utf-8") as f:
+        json.dump(record, f, indent=2)
+
+
+def load_fixture(url, params=None):
+    """Build a requests.Response from a recording, or raise FixtureMissingError."""
+    path = _fixture_path(url, params)
+    if not os.path.exists(path):
+        raise FixtureMissingError(f"No HTTP fixture for {url} params={params} ({path})")
+    with open(path, "r", encoding="utf-8") as f:
+        record = json.load(f)
+
+    response = requests.Response()
+    response.status_code = record["status_code"]
+    response.headers = CaseInsensitiveDict(record.get("headers") or {})
+    response._content = record.get("body", "").encode("utf-8")
+    response.encoding = "utf-8"
+    response.url = record.get("url", url)
+    return response
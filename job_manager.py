@@ -0,0 +1,451 @@
+"""
+Background jobs for the API: pipeline runs, festival fetches and searches.
+
+Jobs are recorded in SQLite (state/jobs.sqlite) with status, progress, per-step
+timings and a JSON detail blob, so /jobs/{id} can be polled from any worker
+process. Submitting a job whose (kind, params) match a queued or running job
+returns that job instead of starting a second one. At most JOB_WORKERS jobs run
+at once (KIND_CONCURRENCY caps individual kinds, e.g. one full pipeline at a
+time since steps rewrite the same CSVs); the rest wait as "queued", up to
+MAX_QUEUED_JOBS. Interactive jobs start before queued batch jobs and make their
+outbound requests in rate_limiter's "interactive" class.
+
+Progress is also appended to an events table (status changes, step start/finish,
+progress, per-query record counts) that GET /jobs/{id}/events streams as SSE.
+emit() works inside a job's threads and in subprocesses started with
+TREND_JOB_ID=<job id> in their environment (run_all steps). Importing this
+module subscribes emit() to progress.emit(), which is what scrapers, the
+pipeline and festival discovery report through; subprocess_env() also names
+it in PROGRESS_SUBSCRIBERS so a subprocess loads it on its first event.
+"""
+import bisect
+import contextvars
+import hashlib
+import itertools
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import progress
+import rate_limiter
+from logger import logger
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+STATE_DIR = os.path.join(PROJECT_ROOT, "state")
+JOBS_DB = os.getenv("JOBS_DB", os.path.join(STATE_DIR, "jobs.sqlite"))
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+MAX_QUEUED_JOBS = 100
+# Jobs of these kinds never run concurrently with each other (within this process)
+KIND_CONCURRENCY = {"pipeline": 1, "festival_fetch": 1}
+JOB_RETENTION_DAYS = 7
+JOB_ID_ENV = "TREND_JOB_ID"
+TERMINAL_STATUSES = ("done", "failed")
+
+_OWNER = f"{socket.gethostname()}:{os.getpid()}"
+_current_job = contextvars.ContextVar("current_job", default=None)
+
+
+class JobQueueFullError(Exception):
+    """Raised by submit() when MAX_QUEUED_JOBS jobs are already waiting."""
+
+
+def _connect():
+    os.makedirs(os.path.dirname(JOBS_DB), exist_ok=True)
+    conn = sqlite3.connect(JOBS_DB, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS jobs ("
+        " id TEXT PRIMARY KEY,"
+        " kind TEXT NOT NULL,"
+        " params TEXT NOT NULL,"
+        " dedupe_key TEXT NOT NULL,"
+        " status TEXT NOT NULL,"
+        " progress REAL NOT NULL DEFAULT 0,"
+        " message TEXT,"
+        " steps TEXT NOT NULL DEFAULT '[]',"
+        " detail TEXT NOT NULL DEFAULT '{}',"
+        " result TEXT,"
+        " error TEXT,"
+        " owner TEXT NOT NULL,"
+        " created_at REAL NOT NULL,"
+        " started_at REAL,"
+        " finished_at REAL)"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_dedupe ON jobs (dedupe_key, status)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_created ON jobs (created_at)")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS events ("
+        " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+        " job_id TEXT NOT NULL,"
+        " type TEXT NOT NULL,"
+        " data TEXT NOT NULL,"
+        " created_at REAL NOT NULL)"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_events_job ON events (job_id, id)")
+    return conn
+
+
+def _write(sql, args):
+    conn = _connect()
+    try:
+        conn.execute(sql, args)
+    finally:
+        conn.close()
+
+
+def _add_event(job_id, event_type, data):
+    _write(
+        "INSERT INTO events (job_id, type, data, created_at) VALUES (?, ?, ?, ?)",
+        (job_id, event_type, json.dumps(data, default=str), time.time()),
+    )
+
+
+def current_job_id():
+    return _current_job.get() or os.getenv(JOB_ID_ENV) or None
+
+
+def emit(event_type, **data):
+    """
+    Append an event to the current job's stream (no-op outside a job).
+    Never raises: progress reporting must not break the work itself.
+    """
+    job_id = current_job_id()
+    if not job_id:
+        return
+    try:
+        _add_event(job_id, event_type, data)
+    except sqlite3.Error as e:
+        logger.warning(f"Job event dropped | {job_id} | {event_type} | {e}")
+
+
+progress.subscribe(emit)
+
+
+def subprocess_env(job_id):
+    """Environment for a subprocess whose progress events belong to job_id."""
+    return {
+        **os.environ,
+        JOB_ID_ENV: job_id,
+        "JOBS_DB": JOBS_DB,
+        progress.SUBSCRIBERS_ENV: "job_manager",
+    }
+
+
+def get_events(job_id, after_id=0, limit=500):
+    """[(event id, type, data)] for a job with id > after_id, oldest first."""
+    conn = _connect()
+    try:
+        rows = conn.execute(
+            "SELECT id, type, data FROM events WHERE job_id = ? AND id > ? ORDER BY id LIMIT ?",
+            (job_id, int(after_id), int(limit)),
+        ).fetchall()
+    finally:
+        conn.close()
+    return [(event_id, event_type, json.loads(data)) for event_id, event_type, data in rows]
+
+
+def dedupe_key(kind, params):
+    canonical = json.dumps(params, sort_keys=True, default=str)
+    return f"{kind}:{hashlib.sha1(canonical.encode('utf-8')).hexdigest()}"
+
+
+def _row_to_job(row):
+    job = dict(row)
+    job["job_id"] = job.pop("id")
+    for field, default in (("params", {}), ("steps", []), ("detail", {}), ("result", None)):
+        job[field] = json.loads(job[field]) if job[field] else default
+    job.pop("dedupe_key", None)
+    now = time.time()
+    started, finished = job["started_at"], job["finished_at"]
+    job["queue_wait_sec"] = round((started or now) - job["created_at"], 3)
+    job["duration_sec"] = round((finished or now) - started, 3) if started else None
+    return job
+
+
+def get_job(job_id):
+    conn = _connect()
+    conn.row_factory = sqlite3.Row
+    try:
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    finally:
+        conn.close()
+    return _row_to_job(row) if row else None
+
+
+def list_jobs(kind=None, status=None, limit=50):
+    """Most recent jobs first."""
+    query = "SELECT * FROM jobs"
+    clauses, args = [], []
+    if kind:
+        clauses.append("kind = ?")
+        args.append(kind)
+    if status:
+        clauses.append("status = ?")
+        args.append(status)
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    query += " ORDER BY created_at DESC LIMIT ?"
+    args.append(int(limit))
+    conn = _connect()
+    conn.row_factory = sqlite3.Row
+    try:
+        return [_row_to_job(row) for row in conn.execute(query, args)]
+    finally:
+        conn.close()
+
+
+class JobContext:
+    """Handed to a job function to report steps, progress and detail."""
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self._steps = []
+        self._detail = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def step(self, name):
+        """Time a step; a step that raises is recorded as failed and the exception propagates."""
+        entry = {"name": name, "status": "running", "started_at": time.time(), "seconds": None}
+        with self._lock:
+            self._steps.append(entry)
+            self._flush_steps()
+        self.emit("step_started", name=name)
+        try:
+            yield entry
+            entry["status"] = "done"
+        except BaseException:
+            entry["status"] = "failed"
+            raise
+        finally:
+            entry["seconds"] = round(time.time() - entry["started_at"], 3)
+            with self._lock:
+                self._flush_steps()
+            self.emit("step_finished", name=name, status=entry["status"], seconds=entry["seconds"])
+
+    def progress(self, fraction, message=None):
+        fraction = max(0.0, min(1.0, float(fraction)))
+        _write(
+            "UPDATE jobs SET progress = ?, message = COALESCE(?, message) WHERE id = ?",
+            (fraction, message, self.job_id),
+        )
+        self.emit("progress", fraction=round(fraction, 3), message=message)
+
+    def emit(self, event_type, **data):
+        _add_event(self.job_id, event_type, data)
+
+    def update_detail(self, **fields):
+        with self._lock:
+            self._detail.update(fields)
+            detail = json.dumps(self._detail, default=str)
+        _write("UPDATE jobs SET detail = ? WHERE id = ?", (detail, self.job_id))
+
+    def _flush_steps(self):
+        _write("UPDATE jobs SET steps = ? WHERE id = ?", (json.dumps(self._steps), self.job_id))
+
+
+class _Scheduler:
+    """In-process queue in front of a fixed pool; honours KIND_CONCURRENCY."""
+
+    def __init__(self, workers):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._workers = workers
+        self._lock = threading.Lock()
+        self._queue = []  # [(priority rank, arrival, job_id, kind, fn, priority)], kept sorted
+        self._arrivals = itertools.count()
+        self._running = {}  # kind -> count
+        self._done_events = {}
+
+    def queued(self):
+        with self._lock:
+            return len(self._queue)
+
+    def enqueue(self, job_id, kind, fn, priority):
+        with self._lock:
+            if len(self._queue) >= MAX_QUEUED_JOBS:
+                raise JobQueueFullError(f"{len(self._queue)} jobs already queued")
+            rank = rate_limiter.PRIORITY_CLASSES.index(priority)
+            # (rank, arrival) is unique, so ordering never compares the rest
+            bisect.insort(self._queue, (rank, next(self._arrivals), job_id, kind, fn, priority))
+            self._done_events[job_id] = threading.Event()
+        self._dispatch()
+
+    def event(self, job_id):
+        with self._lock:
+            return self._done_events.get(job_id)
+
+    def _dispatch(self):
+        with self._lock:
+            started = []
+            for entry in list(self._queue):
+                if sum(self._running.values()) >= self._workers:
+                    break
+                kind = entry[3]
+                limit = KIND_CONCURRENCY.get(kind)
+                if limit is not None and self._running.get(kind, 0) >= limit:
+                    continue
+                self._queue.remove(entry)
+                self._running[kind] = self._running.get(kind, 0) + 1
+                started.append(entry)
+        for _, _, job_id, kind, fn, priority in started:
+            self._pool.submit(self._run, job_id, kind, fn, priority)
+
+    def _run(self, job_id, kind, fn, priority):
+        ctx = JobContext(job_id)
+        token = _current_job.set(job_id)
+        _write("UPDATE jobs SET status = 'running', started_at = ? WHERE id = ?", (time.time(), job_id))
+        ctx.emit("status", status="running")
+        try:
+            with rate_limiter.priority(priority):
+                result = fn(ctx)
+            _write(
+                "UPDATE jobs SET status = 'done', progress = 1, result = ?, finished_at = ? WHERE id = ?",
+                (json.dumps(result, default=str), time.time(), job_id),
+            )
+            ctx.emit("status", status="done", result=result)
+            logger.info(f"Job done | {kind} | {job_id}")
+        except Exception as e:
+            logger.error(f"Job failed | {kind} | {job_id} | {e}\n{traceback.format_exc()}")
+            error = str(e) or type(e).__name__
+            _write(
+                "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+                (error, time.time(), job_id),
+            )
+            ctx.emit("status", status="failed", error=error)
+        finally:
+            _current_job.reset(token)
+            with self._lock:
+                self._running[kind] -= 1
+                event = self._done_events.pop(job_id, None)
+            if event:
+                event.set()
+            self._dispatch()
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def _get_scheduler():
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _recover_orphans()
+            _scheduler = _Scheduler(JOB_WORKERS)
+        return _scheduler
+
+
+def _pid_alive(owner):
+    host, _, pid = owner.rpartition(":")
+    if host != socket.gethostname():
+        return True  # can't tell; leave it alone
+    try:
+        os.kill(int(pid), 0)
+    except (ValueError, ProcessLookupError):
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _recover_orphans():
+    """Fail jobs left queued/running by a process that no longer exists, and prune old ones."""
+    conn = _connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        orphans = [
+            job_id
+            for job_id, owner in conn.execute(
+                "SELECT id, owner FROM jobs WHERE status IN ('queued', 'running')"
+            ).fetchall()
+            if owner != _OWNER and not _pid_alive(owner)
+        ]
+        now = time.time()
+        conn.executemany(
+            "UPDATE jobs SET status = 'failed', error = 'interrupted (server restarted)', finished_at = ? WHERE id = ?",
+            [(now, job_id) for job_id in orphans],
+        )
+        conn.executemany(
+            "INSERT INTO events (job_id, type, data, created_at) VALUES (?, 'status', ?, ?)",
+            [(job_id, json.dumps({"status": "failed", "error": "interrupted (server restarted)"}), now) for job_id in orphans],
+        )
+        conn.execute(
+            "DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?",
+            (now - JOB_RETENTION_DAYS * 86400,),
+        )
+        conn.execute("DELETE FROM events WHERE job_id NOT IN (SELECT id FROM jobs)")
+        conn.execute("COMMIT")
+    except Exception:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+    if orphans:
+        logger.warning(f"Marked {len(orphans)} interrupted jobs as failed")
+
+
+def submit(kind, params, fn, dedupe=True, priority="batch"):
+    """
+    Queue fn(ctx) as a job in a rate_limiter priority class. Returns (job, created):
+    if an identical job is already queued or running, that job is returned with
+    created=False. Raises JobQueueFullError when the queue is full.
+    """
+    scheduler = _get_scheduler()
+    key = dedupe_key(kind, params)
+    job_id = uuid.uuid4().hex
+    conn = _connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        if dedupe:
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE dedupe_key = ? AND status IN ('queued', 'running')"
+                " ORDER BY created_at LIMIT 1",
+                (key,),
+            ).fetchone()
+            if row:
+                conn.execute("COMMIT")
+                return get_job(row[0]), False
+        if scheduler.queued() >= MAX_QUEUED_JOBS:
+            conn.execute("ROLLBACK")
+            raise JobQueueFullError(f"{MAX_QUEUED_JOBS} jobs already queued")
+        conn.execute(
+            "INSERT INTO jobs (id, kind, params, dedupe_key, status, owner, created_at)"
+            " VALUES (?, ?, ?, ?, 'queued', ?, ?)",
+            (job_id, kind, json.dumps(params, default=str), key, _OWNER, time.time()),
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+    try:
+        _add_event(job_id, "status", {"status": "queued", "kind": kind})
+        scheduler.enqueue(job_id, kind, fn, priority)
+    except JobQueueFullError as e:
+        _write(
+            "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+            (str(e), time.time(), job_id),
+        )
+        raise
+    logger.info(f"Job queued | {kind} | {job_id}")
+    return get_job(job_id), True
+
+
+def wait(job_id, timeout=None):
+    """Block until a job of this process finishes (or timeout). Returns the job."""
+    event = _get_scheduler().event(job_id)
+    if event is not None:
+        event.wait(timeout)
+    return get_job(job_id)
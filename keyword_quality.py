@@ -0,0 +1,262 @@
+"""
+Keyword quality scores for the festival fetch plan.
+
+seasonal_config.json lists generic tokens ("new", "year", "day", "celebration")
+and name fragments ("makar", "republic") next to useful phrases. Each
+(country, festival, keyword) gets a score in [0, 1] from:
+
+  hit rate     - share of past SerpAPI attempts that returned a product
+                 (smoothed towards PRIOR_HIT_RATE while there is little history;
+                 old attempts fade with a STATS_HALF_LIFE_DAYS half-life, so a
+                 skipped keyword drifts back above the cut-off and is re-probed)
+  relevance    - overlap with the festival name, directly and via the titles
+                 of products this keyword produced before
+  specificity  - 1 - genericness, where genericness is the keyword's document
+                 frequency across all festivals in the calendar (log-scaled)
+
+Keywords scoring under MIN_KEYWORD_SCORE, stopwords and single-word fragments
+of a longer keyword of the same festival are left out of the plan.
+
+Report for the current calendar:  python keyword_quality.py [--countries India,Japan]
+"""
+import argparse
+import math
+import os
+import re
+import sqlite3
+import time
+from collections import Counter, defaultdict
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+STATE_DIR = os.path.join(PROJECT_ROOT, "state")
+KEYWORD_STATS_DB = os.getenv("KEYWORD_STATS_DB", os.path.join(STATE_DIR, "keyword_stats.sqlite"))
+
+MIN_KEYWORD_SCORE = float(os.getenv("MIN_KEYWORD_SCORE", "0.4"))
+WEIGHTS = {"hit_rate": 0.55, "relevance": 0.15, "specificity": 0.3}
+# Smoothing: an unseen keyword starts at PRIOR_HIT_RATE as if tried PRIOR_ATTEMPTS times
+PRIOR_ATTEMPTS = 2
+PRIOR_HIT_RATE = 0.5
+# Recorded attempts and hits halve every this many days
+STATS_HALF_LIFE_DAYS = float(os.getenv("KEYWORD_STATS_HALF_LIFE_DAYS", "30"))
+
+STOPWORDS = {"a", "al", "and", "de", "del", "der", "des", "di", "du", "el", "en", "la", "le", "of", "s", "the", "to"}
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokens(text):
+    return {t for t in _TOKEN_RE.findall(str(text or "").lower()) if t not in STOPWORDS}
+
+
+def normalize(keyword):
+    return str(keyword).strip().lower()
+
+
+def _connect():
+    os.makedirs(os.path.dirname(KEYWORD_STATS_DB), exist_ok=True)
+    conn = sqlite3.connect(KEYWORD_STATS_DB, timeout=30, isolation_level=None)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS keyword_attempts ("
+        " country TEXT NOT NULL,"
+        " keyword TEXT NOT NULL,"
+        " attempts REAL NOT NULL DEFAULT 0,"
+        " hits REAL NOT NULL DEFAULT 0,"
+        " updated_at REAL NOT NULL DEFAULT 0,"
+        " PRIMARY KEY (country, keyword))"
+    )
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(keyword_attempts)")}
+    if "updated_at" not in columns:
+        # Tables from before decay: their counters start fading from now
+        conn.execute("ALTER TABLE keyword_attempts ADD COLUMN updated_at REAL NOT NULL DEFAULT 0")
+        conn.execute("UPDATE keyword_attempts SET updated_at = ?", (time.time(),))
+    return conn
+
+
+def decay(count, updated_at, now):
+    """`count` recorded at `updated_at`, faded to `now`."""
+    if STATS_HALF_LIFE_DAYS <= 0:
+        return count
+    age_days = max(0.0, now - updated_at) / 86400
+    return count * 0.5 ** (age_days / STATS_HALF_LIFE_DAYS)
+
+
+def record_attempts(attempts):
+    """
+    Add [(country, keyword, got_product), ...] to the per-keyword counters in
+    one transaction. Only record searches that completed: a request that
+    failed says nothing about the keyword.
+    """
+    totals = defaultdict(lambda: [0, 0])
+    for country, keyword, hit in attempts:
+        counts = totals[(country, normalize(keyword))]
+        counts[0] += 1
+        counts[1] += 1 if hit else 0
+    if not totals:
+        return
+    conn = _connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        now = time.time()
+        rows = []
+        for (country, keyword), (n, hits) in totals.items():
+            old = conn.execute(
+                "SELECT attempts, hits, updated_at FROM keyword_attempts WHERE country = ? AND keyword = ?",
+                (country, keyword),
+            ).fetchone()
+            if old:
+                n += decay(old[0], old[2], now)
+                hits += decay(old[1], old[2], now)
+            rows.append((country, keyword, n, hits, now))
+        conn.executemany(
+            "INSERT OR REPLACE INTO keyword_attempts (country, keyword, attempts, hits, updated_at) VALUES (?, ?, ?, ?, ?)",
+            rows,
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+
+def attempt_stats(now=None):
+    """(country, keyword) -> (attempts, hits), decayed to `now`."""
+    now = time.time() if now is None else now
+    conn = _connect()
+    try:
+        rows = conn.execute("SELECT country, keyword, attempts, hits, updated_at FROM keyword_attempts").fetchall()
+    finally:
+        conn.close()
+    return {
+        (country, keyword): (round(decay(attempts, updated_at, now), 3), round(decay(hits, updated_at, now), 3))
+        for country, keyword, attempts, hits, updated_at in rows
+    }
+
+
+def keyword_document_frequency(calendar):
+    """(festival count, Counter of normalized keyword -> festivals listing it)."""
+    df = Counter()
+    total = 0
+    for country in calendar.countries():
+        for festival in calendar.festivals(country):
+            total += 1
+            df.update({normalize(kw) for kw in festival.keywords if normalize(kw)})
+    return total, df
+
+
+def fragment_of(keyword, festival_keywords):
+    """The longer keyword of the same festival that already covers this single word, if any."""
+    words = tokens(keyword)
+    if len(words) != 1:
+        return None
+    for other in festival_keywords:
+        other_words = tokens(other)
+        if len(other_words) > 1 and words < other_words:
+            return other
+    return None
+
+
+class KeywordScorer:
+    """
+    Scores keywords against a compiled seasonal calendar, stored results
+    (festival_store rows) and recorded attempts (record_attempts).
+    """
+
+    def __init__(self, calendar, results=(), stats=None, min_score=None):
+        self.min_score = MIN_KEYWORD_SCORE if min_score is None else min_score
+        self.total_festivals, self.df = keyword_document_frequency(calendar)
+        self.stats = dict(stats or {})
+        self.yields = Counter()
+        self.titles = defaultdict(list)
+        for row in results:
+            if not isinstance(row, dict) or row.get("_mock"):
+                continue
+            key = (row.get("country"), normalize(row.get("keyword_used", "")))
+            self.yields[key] += 1
+            if row.get("product_title"):
+                self.titles[key].append(tokens(row["product_title"]))
+
+    def hit_rate(self, country, keyword):
+        key = (country, normalize(keyword))
+        attempts, hits = self.stats.get(key, (0, 0))
+        if not attempts and self.yields[key]:
+            # Results stored before attempts were recorded: count them as hits
+            attempts = hits = self.yields[key]
+        return (hits + PRIOR_HIT_RATE * PRIOR_ATTEMPTS) / (attempts + PRIOR_ATTEMPTS)
+
+    def relevance(self, country, festival, keyword):
+        name = tokens(festival.name)
+        words = tokens(keyword)
+        if not name or not words:
+            return 0.0
+        direct = len(words & name) / len(words)
+        titles = self.titles.get((country, normalize(keyword)))
+        if not titles:
+            return direct
+        via_products = sum(1 for title in titles if title & name) / len(titles)
+        return max(direct, via_products)
+
+    def specificity(self, keyword):
+        df = self.df.get(normalize(keyword), 0)
+        if self.total_festivals <= 1 or df <= 1:
+            return 1.0
+        return 1.0 - math.log(df) / math.log(self.total_festivals)
+
+    def score(self, country, festival, keyword):
+        parts = {
+            "hit_rate": self.hit_rate(country, keyword),
+            "relevance": self.relevance(country, festival, keyword),
+            "specificity": self.specificity(keyword),
+        }
+        total = sum(WEIGHTS[name] * value for name, value in parts.items())
+        return {"keyword": keyword, "score": round(total, 3), **{k: round(v, 3) for k, v in parts.items()}}
+
+    def rank(self, country, festival, keywords):
+        """
+        (kept, skipped): kept keywords best score first (ties keep calendar
+        order); skipped entries carry the score details plus a "reason".
+        """
+        kept, skipped = [], []
+        for keyword in keywords:
+            details = self.score(country, festival, keyword)
+            covered_by = fragment_of(keyword, festival.keywords)
+            if not tokens(keyword):
+                skipped.append({**details, "reason": "stopword"})
+            elif covered_by:
+                skipped.append({**details, "reason": f"fragment of {covered_by!r}"})
+            elif details["score"] < self.min_score:
+                skipped.append({**details, "reason": f"score below {self.min_score}"})
+            else:
+                kept.append((details["score"], keyword))
+        kept.sort(key=lambda item: -item[0])  # stable
+        return [keyword for _, keyword in kept], skipped
+
+
+def load_scorer(calendar, min_score=None):
+    import festival_store
+
+    return KeywordScorer(calendar, festival_store.query(), attempt_stats(), min_score)
+
+
+if __name__ == "__main__":
+    import festival_product_discovery as fpd
+    import seasonal_calendar
+
+    parser = argparse.ArgumentParser(description="Report which festival keywords the planner skips")
+    parser.add_argument("--countries", type=str, default=None, help="Comma-separated list (default: all)")
+    parser.add_argument("--min-score", type=float, default=None)
+    args = parser.parse_args()
+
+    calendar = seasonal_calendar.get_calendar()
+    scorer = load_scorer(calendar, args.min_score)
+    report = fpd.keyword_plan_report(calendar, scorer, fpd._parse_countries_arg(args.countries))
+    for country, info in report["countries"].items():
+        if not info["skipped"]:
+            continue
+        print(f"{country}: {info['calls_saved']} calls saved | skipped {len(info['skipped'])} keywords")
+        for entry in info["skipped"]:
+            print(f"    {entry['keyword']!r:28s} score={entry['score']:.2f} ({entry['reason']})")
+    print(
+        f"Planned SerpAPI calls: {report['planned_before']} -> {report['planned_after']} "
+        f"({report['calls_saved']} saved) | {report['skipped']} low-value keywords skipped"
+    )
@@ -1,12 +1,25 @@
-from fastapi import FastAPI, BackgroundTasks, HTTPException, Query, Body
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, HTTPException, Query, Body, Header, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from email.utils import formatdate, parsedate_to_datetime
 from pydantic import BaseModel
 import pandas as pd
+import asyncio
 import json
 import os
+import threading
+import time
 from typing import List, Optional, Dict, Any
 import pipeline
 import festival_product_discovery as festival_module
+import festival_store
+import job_manager
+import quota_ledger
+import rate_limiter
+import resilience
+import seasonal_calendar
+import serp_cache
+import trend_snapshot
 
 from pydantic import BaseModel, Field
 
@@ -49,6 +62,13 @@ class FestivalSearchRequest(BaseModel):
     )
 
 
+class FestivalSearchBatchRequest(BaseModel):
+    items: List[FestivalSearchRequest] = Field(
+        ...,
+        description="Keyword / festival / country triples; duplicates are searched once.",
+    )
+
+
 app = FastAPI(
     title="Trend Intelligence API",
     description="API for accessing global trend intelligence data and triggering collection pipelines.",
@@ -64,18 +84,72 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allows all methods
     allow_headers=["*"],  # Allows all headers
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "ETag", "Last-Modified"],  # /trends pagination, revalidation
 )
 
+# Response compression: gzip only. GZipMiddleware leaves text/event-stream responses
+# (the SSE job event stream) uncompressed so events are not buffered.
+from fastapi.middleware.gzip import GZipMiddleware
+
+COMPRESS_MIN_BYTES = 1000
+app.add_middleware(GZipMiddleware, minimum_size=COMPRESS_MIN_BYTES)
+
 # Constants
 OUTPUT_DIR = "outputs"
 FINAL_OUTPUT_FILE = os.path.join(OUTPUT_DIR, "final_trending_products_deduped.csv")
-FESTIVAL_OUTPUT_FILE = "festival_trending_products.json"
+MAX_BATCH_ITEMS = 50
+MAX_TRENDS_PAGE = 2000
+SSE_POLL_SECONDS = 0.5
+SSE_KEEPALIVE_SECONDS = 15
+
+def _validators(tag, version, last_modified=None):
+    """ETag / Last-Modified / Cache-Control headers for a snapshot version (no ETag when unknown)."""
+    headers = {"Cache-Control": "no-cache"}
+    if version is not None:
+        headers["ETag"] = f'W/"{tag}-{version}"'
+    if last_modified is not None:
+        headers["Last-Modified"] = formatdate(last_modified, usegmt=True)
+    return headers
+
+
+def _not_modified(request, headers):
+    """
+    True if the request's If-None-Match (or, without it, If-Modified-Since)
+    still matches the validators in headers.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        etag = headers.get("ETag")
+        opaque = lambda tag: tag[2:] if tag.startswith("W/") else tag  # weak comparison
+        tags = [opaque(t.strip()) for t in if_none_match.split(",")]
+        return etag is not None and ("*" in tags or opaque(etag) in tags)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and "Last-Modified" in headers:
+        try:
+            # HTTP dates have one-second resolution
+            return parsedate_to_datetime(headers["Last-Modified"]) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
 
 @app.get("/health")
 def health_check():
     return {"status": "ok"}
 
 
+@app.get("/providers/status")
+def providers_status():
+    """Current outbound API budget (shared token buckets, daily quota), queue wait per priority class and circuit breaker states."""
+    return {
+        "rate_limits": rate_limiter.get_token_levels(),
+        "queue_wait": rate_limiter.get_wait_stats(),
+        "quota": quota_ledger.usage_today(),
+        "serp_cache": serp_cache.cache_stats(),
+        "circuit_breakers": resilience.breaker_states(),
+    }
+
+
 @app.get("/queries")
 def get_queries():
     """Get current scraper queries configuration."""
@@ -106,110 +180,223 @@ def update_queries(
 
 @app.get("/trends")
 def get_trends(
+    request: Request,
     country: Optional[str] = Query(None, description="Filter by country"),
-    category: Optional[str] = Query(None, description="Filter by category (inferred)"),
-    limit: int = Query(50, description="Max number of records to return")
+    category: Optional[List[str]] = Query(None, description="Filter by category (inferred), repeatable"),
+    marketplace: Optional[List[str]] = Query(None, description="Filter by marketplace, repeatable"),
+    market_type: Optional[List[str]] = Query(None, description="Filter by market type, repeatable"),
+    lifecycle_stage: Optional[List[str]] = Query(None, description="Filter by lifecycle stage, repeatable"),
+    item: Optional[str] = Query(None, description="Exact product name (all countries / marketplaces)"),
+    min_strength: Optional[float] = Query(None, description="Minimum trend_strength"),
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return, e.g. item,country,trend_strength"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    limit: int = Query(50, ge=1, le=MAX_TRENDS_PAGE, description="Max number of records to return")
 ):
     """
-    Retrieve trending products from the deduplicated output CSV.
+    Retrieve trending products from the deduplicated output CSV, strongest
+    first. Pages are keyset-paginated: pass the X-Next-Cursor response header
+    back as `cursor` for the next page (absent on the last page);
+    X-Total-Count is the number of matching rows. Answers 304 to
+    If-None-Match / If-Modified-Since while the snapshot is unchanged.
     """
     if not os.path.exists(FINAL_OUTPUT_FILE):
         raise HTTPException(status_code=404, detail="Trend data not found. Please run the pipeline first.")
     
     try:
-        df = pd.read_csv(FINAL_OUTPUT_FILE)
-        
-        # Apply filters
-        if country:
-            df = df[df["country"].str.lower() == country.lower()]
-
-        # Fill missing market_type with 'Global' for Reddit/YouTube items
-        if "market_type" in df.columns:
-            df["market_type"] = df["market_type"].fillna("Global")
-        else:
-            df["market_type"] = "Global"
-            
-        # Category inference (reusing logic from dashboard or just relying on what's available if we saved it)
-        # The CSV might not have 'category' column if it was only calculated in dashboard.py.
-        # Let's check if we need to add category inference here or if we should update pipeline to save it.
-        # For now, let's include the simple inference logic here to ensure filtering works as expected by the dashboard logic.
-        
-        CATEGORY_KEYWORDS = {
-            "Electronics": ["earbuds", "headphone", "laptop", "phone", "camera", "charger", "smart", "tech", "device", "usb", "cable"],
-            "Fitness": ["fitness", "gym", "workout", "dumbbell", "yoga", "treadmill", "protein", "supplement", "weight", "training", "sport", "mat", "bottle"],
-            "Beauty": ["skincare", "serum", "cream", "beauty", "makeup", "shampoo", "conditioner", "soap", "lotion", "perfume", "fragrance", "oil", "balm"],
-            "Fashion": ["shoes", "sneaker", "watch", "jacket", "clothing", "sweater", "hoodie", "shirt", "pants", "dress", "jeans", "coat", "wool", "wear"],
-            "Home & Kitchen": ["kitchen", "mixer", "cookware", "vacuum", "air fryer", "decor", "light", "lamp", "desk", "chair", "organizer", "cup", "muga"]
-        }
-
-        def infer_category(item):
-            text = str(item).lower()
-            for cat, keywords in CATEGORY_KEYWORDS.items():
-                if any(k in text for k in keywords):
-                    return cat
-            return "Others"
-
-        if "category" not in df.columns:
-            df["category"] = df["item"].apply(infer_category)
-
-        if category:
-             df = df[df["category"].str.lower() == category.lower()]
-             
-        # Normalize urls field from string representation of list to actual list
-        # The CSV saves lists as strings like "['url1', 'url2']"
-        def parse_urls(url_str):
-            try:
-                # Basic safety check before eval or use json.loads if format allows
-                # given the previous code used eval(), we might need to be careful.
-                # Ideally, we should fix the pipeline to save as valid JSON string or handle it safely.
-                # For this MVP, we'll try basic string manipulation or ast.literal_eval
-                import ast
-                return ast.literal_eval(url_str)
-            except:
-                return []
-
-        if "urls" in df.columns:
-             df["urls"] = df["urls"].apply(parse_urls)
-
-        # Sort and limit
-        if "trend_strength" in df.columns:
-            df = df.sort_values("trend_strength", ascending=False)
-            
-        # Handle NaN values automatically via to_json (NaN -> null)
-        data = json.loads(df.head(limit).to_json(orient="records"))
-        return data
+        snapshot = trend_snapshot.load(FINAL_OUTPUT_FILE)
+        validators = _validators("trends", snapshot.version, snapshot.last_modified)
+        if _not_modified(request, validators):
+            return Response(status_code=304, headers=validators)
+
+        columns = list(snapshot.df.columns)
+        if fields:
+            columns = [f.strip() for f in fields.split(",") if f.strip()]
+            unknown = [f for f in columns if f not in snapshot.df.columns]
+            if unknown:
+                raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+
+        positions = snapshot.select(
+            min_strength=min_strength,
+            country=country,
+            category=category,
+            marketplace=marketplace,
+            market_type=market_type,
+            lifecycle_stage=lifecycle_stage,
+            item=item,
+        )
+        page, next_cursor = snapshot.page(positions, cursor, limit)
 
+        # Handle NaN values automatically via to_json (NaN -> null)
+        data = json.loads(snapshot.df.iloc[page][columns].to_json(orient="records"))
+        headers = {**validators, "X-Total-Count": str(len(positions))}
+        if next_cursor:
+            headers["X-Next-Cursor"] = next_cursor
+        return JSONResponse(content=data, headers=headers)
+
+    except trend_snapshot.InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error reading trend data: {str(e)}")
 
+@app.get("/trends/summary")
+def get_trends_summary(
+    request: Request,
+    country: Optional[str] = Query(None, description="Filter by country"),
+    category: Optional[List[str]] = Query(None, description="Categories to include (repeatable)"),
+    market_type: Optional[List[str]] = Query(None, description="Market types to include (repeatable)"),
+    marketplace: Optional[List[str]] = Query(None, description="Marketplaces to include (repeatable)"),
+    lifecycle_stage: Optional[List[str]] = Query(None, description="Lifecycle stages to include (repeatable)"),
+):
+    """
+    Overview aggregates (counts, averages, category / lifecycle distributions,
+    top performers, filter options) for the trend snapshot, cached per snapshot
+    version and filter set. Supports conditional requests like /trends.
+    """
+    if not os.path.exists(FINAL_OUTPUT_FILE):
+        raise HTTPException(status_code=404, detail="Trend data not found. Please run the pipeline first.")
+    try:
+        snapshot = trend_snapshot.load(FINAL_OUTPUT_FILE)
+        validators = _validators("summary", snapshot.version, snapshot.last_modified)
+        if _not_modified(request, validators):
+            return Response(status_code=304, headers=validators)
+        summary = trend_snapshot.summarize(
+            FINAL_OUTPUT_FILE,
+            country=country,
+            category=category,
+            market_type=market_type,
+            marketplace=marketplace,
+            lifecycle_stage=lifecycle_stage,
+        )
+        return JSONResponse(content=summary, headers=validators)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error summarizing trend data: {str(e)}")
+
 @app.get("/festivals")
 def get_festivals(
+    request: Request,
     country: Optional[str] = Query(None, description="Filter by country")
 ):
     """
-    Retrieve festival trend data.
+    Retrieve festival trend data (from the festival store, per-country index).
+    Answers 304 to If-None-Match / If-Modified-Since while no rows were added.
     """
-    if not os.path.exists(FESTIVAL_OUTPUT_FILE):
-         raise HTTPException(status_code=404, detail="Festival data not found.")
-         
     try:
-        with open(FESTIVAL_OUTPUT_FILE, "r") as f:
-            data = json.load(f)
-            
-        if country:
-            data = [item for item in data if item.get("country", "").lower() == country.lower()]
-            
-        return data
+        if festival_store.count() == 0:
+            raise HTTPException(status_code=404, detail="Festival data not found.")
+        validators = _validators("festivals", *festival_store.version())
+        if _not_modified(request, validators):
+            return Response(status_code=304, headers=validators)
+        return JSONResponse(content=festival_store.query(country), headers=validators)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error reading festival data: {str(e)}")
 
+@app.get("/festivals/upcoming")
+def get_upcoming_festivals(
+    country: Optional[str] = Query(None, description="Filter by country (seasonal_config name)"),
+    past_days: int = Query(seasonal_calendar.DEFAULT_PAST_DAYS, ge=0, le=366),
+    future_days: int = Query(seasonal_calendar.DEFAULT_FUTURE_DAYS, ge=0, le=366),
+):
+    """
+    Festivals overlapping [today - past_days, today + future_days], soonest first.
+    Served from the compiled calendar index, not the raw seasonal_config.json.
+    """
+    try:
+        calendar = seasonal_calendar.get_calendar()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error reading seasonal calendar: {str(e)}")
+
+    if country:
+        match = next((c for c in calendar.countries() if c.lower() == country.lower()), None)
+        if match is None:
+            return []
+        country = match
+    return [f.to_dict() for f in calendar.upcoming(past_days=past_days, future_days=future_days, country=country)]
+
+def _submit_job(kind, params, fn, message, priority="batch"):
+    """Queue a job and build the POST response (identical in-flight jobs are reused)."""
+    try:
+        job, created = job_manager.submit(kind, params, fn, priority=priority)
+    except job_manager.JobQueueFullError as e:
+        raise HTTPException(status_code=429, detail=f"Job queue is full, try again later ({e})")
+    if not created:
+        message = f"Identical {kind} job already {job['status']}"
+    return {"message": message, "job_id": job["job_id"], "status": job["status"], "deduplicated": not created}
+
+
+@app.get("/jobs")
+def get_jobs(
+    kind: Optional[str] = Query(None, description="pipeline, festival_fetch, festival_search or festival_search_batch"),
+    status: Optional[str] = Query(None, description="queued, running, done or failed"),
+    limit: int = Query(50, ge=1, le=500),
+):
+    """Most recent background jobs first."""
+    return job_manager.list_jobs(kind=kind, status=status, limit=limit)
+
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    """Status, progress, per-step timings and result of a background job."""
+    job = job_manager.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@app.get("/jobs/{job_id}/events")
+def stream_job_events(
+    job_id: str,
+    last_event_id: Optional[str] = Header(None, description="Resume after this event id (sent by EventSource on reconnect)"),
+):
+    """
+    Server-sent events for a job: status changes, step start/finish, progress
+    and per-query record counts, as they happen. The stream ends after the
+    job's final status event.
+    """
+    if job_manager.get_job(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    after = int(last_event_id) if (last_event_id or "").isdigit() else 0
+
+    async def event_stream():
+        # Async so a connected client holds no threadpool thread between polls;
+        # the short SQLite reads still run in the threadpool
+        last_id = after
+        last_sent = time.monotonic()
+        yield "retry: 3000\n\n"
+        while True:
+            events = await run_in_threadpool(job_manager.get_events, job_id, last_id)
+            for event_id, event_type, data in events:
+                last_id = event_id
+                yield f"id: {event_id}\nevent: {event_type}\ndata: {json.dumps(data, default=str)}\n\n"
+                if event_type == "status" and data.get("status") in job_manager.TERMINAL_STATUSES:
+                    return
+            if events:
+                last_sent = time.monotonic()
+                continue
+            job = await run_in_threadpool(job_manager.get_job, job_id)
+            if job is None or job["status"] in job_manager.TERMINAL_STATUSES:
+                return  # final event was delivered before a reconnect
+            if time.monotonic() - last_sent >= SSE_KEEPALIVE_SECONDS:
+                yield ": keepalive\n\n"
+                last_sent = time.monotonic()
+            await asyncio.sleep(SSE_POLL_SECONDS)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.post("/pipeline/run")
 def trigger_pipeline(
-    background_tasks: BackgroundTasks,
     request: Optional[PipelineRunRequest] = Body(None),
 ):
     """
-    Trigger the main trend analysis pipeline in the background.
+    Trigger the main trend analysis pipeline as a background job.
     Optionally pass custom queries for scrapers in the request body.
     """
     queries_str = None
@@ -229,23 +416,27 @@ def trigger_pipeline(
                 f"{k}:{','.join(v)}" for k, v in request.subreddits.items()
             )
 
-    def run_full_pipeline():
+    def run_full_pipeline(ctx):
         import subprocess
         import run_all
         steps = run_all.build_steps(queries=queries_str, subreddits=subreddits_str)
-        for step_name, cmd in steps:
-            result = subprocess.run(cmd, cwd=os.path.dirname(os.path.abspath(__file__)))
-            if result.returncode != 0:
-                return
+        for i, (step_name, cmd) in enumerate(steps):
+            ctx.progress(i / len(steps), f"Running {step_name}")
+            with ctx.step(step_name):
+                # Scrapers report per-query record counts to this job's event stream
+                env = job_manager.subprocess_env(ctx.job_id)
+                result = subprocess.run(cmd, cwd=os.path.dirname(os.path.abspath(__file__)), env=env)
+                if result.returncode != 0:
+                    raise RuntimeError(f"{step_name} exited with code {result.returncode}")
+        return {"steps": len(steps)}
 
-    background_tasks.add_task(run_full_pipeline)
     msg = "Pipeline started in background"
     if queries_str:
         msg += f" with queries: {queries_str}"
-    return {"message": msg}
+    return _submit_job("pipeline", {"queries": queries_str, "subreddits": subreddits_str}, run_full_pipeline, msg)
 
 @app.post("/festivals/fetch")
-def fetch_festivals(request: FestivalFetchRequest, background_tasks: BackgroundTasks):
+def fetch_festivals(request: FestivalFetchRequest):
     """
     Trigger the festival product discovery pipeline for specific countries.
     """
@@ -256,53 +447,119 @@ def fetch_festivals(request: FestivalFetchRequest, background_tasks: BackgroundT
     if request.festival_filter:
         festival_filter = {k: set(v) for k, v in request.festival_filter.items()}
         
-    def run_wrapper():
-        # Wrapper to handle the actual execution and file saving which is normally done in __main__ block of the script
-        # The run_pipeline function returns results but doesn't save them inside the function itself unless we modifying it.
-        # Checking festival_product_discovery.py:
-        # It returns 'output'. The saving logic is in `if __name__ == "__main__":`.
-        # We need to reimplement the saving logic here or extract it.
-        
-        results = festival_module.run_pipeline(target_countries=target_countries, festival_filter=festival_filter)
+    def run_wrapper(ctx):
+        with ctx.step("discover"):
+            results = festival_module.run_pipeline(target_countries=target_countries, festival_filter=festival_filter)
         
         # Mock logic if needed (matching the script's behavior)
         if festival_module.USE_MOCK_IF_NO_RESULTS and len(results) == 0:
              seasonal_data = festival_module.load_seasonal_data("seasonal_config.json")
              results = festival_module._mock_products(seasonal_data)
         
-        # Save results
-        existing = festival_module._load_existing_results("festival_trending_products.json")
-        combined = festival_module._dedupe_results(existing + results)
-        with open("festival_trending_products.json", "w", encoding="utf-8") as f:
-            json.dump(combined, f, indent=2)
-            
-    background_tasks.add_task(run_wrapper)
-    
+        # Save results: append-only store, JSON snapshot refreshed by compaction
+        with ctx.step("store"):
+            added = festival_store.append(results)
+            festival_store.compact(force=True)
+        return {"products": len(results), "added": added}
+
+    params = {
+        "countries": sorted(target_countries) if target_countries else None,
+        "festival_filter": {k: sorted(v) for k, v in festival_filter.items()} if festival_filter else None,
+    }
     msg = "Festival fetch started"
     if target_countries:
-        msg += f" for countries: {', '.join(target_countries)}"
-    return {"message": msg}
+        msg += f" for countries: {', '.join(sorted(target_countries))}"
+    return _submit_job("festival_fetch", params, run_wrapper, msg)
 
 
 @app.post("/festivals/search")
-def festival_search(request: FestivalSearchRequest, background_tasks: BackgroundTasks):
+def festival_search(request: FestivalSearchRequest):
     """
     User-driven festival search: keyword + festival name + Amazon country.
-    Results are saved to festival_trending_products.json and appear in Festival Intelligence.
+    Results are saved to the festival store and appear in Festival Intelligence.
     """
-    print(f"Starting background festival search: {request.keyword} | {request.festival_name} | {request.country}")
-    def run_search():
-        try:
-            festival_module.run_custom_festival_search(
+    def run_search(ctx):
+        with ctx.step("search"):
+            output = festival_module.run_custom_festival_search(
                 keyword=request.keyword,
                 festival_name=request.festival_name,
                 country=request.country,
             )
-            print(f"Finished background festival search for {request.keyword}")
-        except Exception as e:
-            print(f"ERROR in background festival search: {e}")
+        return {"products": len(output)}
+
+    params = {
+        "keyword": request.keyword.strip().lower(),
+        "festival_name": request.festival_name.strip().lower(),
+        "country": request.country.strip().lower(),
+    }
+    return _submit_job(
+        "festival_search", params, run_search,
+        f"Festival search started for '{request.keyword}' on {request.country}",
+        priority="interactive",
+    )
+
 
-    background_tasks.add_task(run_search)
+@app.post("/festivals/search/batch")
+def festival_search_batch(request: FestivalSearchBatchRequest):
+    """
+    Several festival searches in one background job: duplicate triples are
+    searched once, searches run concurrently and all rows are appended to the
+    festival store in one transaction. Poll GET /festivals/search/batch/{job_id}.
+    """
+    if not request.items:
+        raise HTTPException(status_code=422, detail="items must not be empty")
+    if len(request.items) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=422, detail=f"At most {MAX_BATCH_ITEMS} items per batch")
+
+    items = festival_module.dedupe_search_items(
+        {"keyword": i.keyword, "festival_name": i.festival_name, "country": i.country} for i in request.items
+    )
+    duplicates = len(request.items) - len(items)
+
+    def run_batch(ctx):
+        statuses = [{**item, "status": "pending", "products": 0, "error": None} for item in items]
+        lock = threading.Lock()
+        ctx.update_detail(items=statuses, duplicates=duplicates)
+
+        def on_update(index, fields):
+            with lock:
+                statuses[index].update(fields)
+                finished = sum(1 for s in statuses if s["status"] not in ("pending", "running"))
+                ctx.update_detail(items=statuses)
+            ctx.emit("item", index=index, **fields)
+            ctx.progress(finished / len(statuses))
+
+        with ctx.step("search"):
+            _, added = festival_module.run_custom_festival_batch(items, on_update=on_update)
+        return {"added": added}
+
+    params = {"items": [[i["keyword"].lower(), i["festival_name"].lower(), i["country"].lower()] for i in items]}
+    response = _submit_job(
+        "festival_search_batch", params, run_batch,
+        f"Batch festival search started for {len(items)} items",
+        priority="interactive",
+    )
+    response.update(items=len(items), duplicates=duplicates)
+    return response
+
+
+@app.get("/festivals/search/batch/{job_id}")
+def festival_search_batch_status(job_id: str):
+    """Status of a batch search job with per-item status and product counts."""
+    job = job_manager.get_job(job_id)
+    if job is None or job["kind"] != "festival_search_batch":
+        raise HTTPException(status_code=404, detail="Batch job not found")
+    items = job["detail"].get("items") or []
+    counts = {}
+    for item in items:
+        counts[item["status"]] = counts.get(item["status"], 0) + 1
     return {
-        "message": f"Festival search started for '{request.keyword}' on {request.country}",
-    }
\ No newline at end of file
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "progress": job["progress"],
+        "error": job["error"],
+        "duplicates": job["detail"].get("duplicates", 0),
+        "added": (job["result"] or {}).get("added", 0),
+        "items": items,
+        "summary": counts,
+    }
@@ -1,9 +1,13 @@
 import pandas as pd
 import re
 import os
+import json
+import time
 from difflib import SequenceMatcher
 from datetime import date
 
+import progress
+
 # =============================
 # CONFIGURATION
 # =============================
@@ -124,8 +128,11 @@ def extract_brand(text):
     return None
 
 def deduplicate(df):
-    df["normalized_item"] = df["item"].apply(normalize_text)
-    df["brand"] = df["normalized_item"].apply(extract_brand)
+    # The streaming aggregator canonicalizes items on arrival; only compute what's missing
+    if "normalized_item" not in df.columns:
+        df["normalized_item"] = df["item"].apply(normalize_text)
+    if "brand" not in df.columns:
+        df["brand"] = df["normalized_item"].apply(extract_brand)
 
     groups, used = [], set()
 
@@ -209,13 +216,153 @@ def save_history(df):
     df.to_csv(HISTORY_FILE, index=False)
 
 # =============================
-# MAIN PIPELINE
+# STREAMING (PIPELINED) MODE
 # =============================
-def run_pipeline():
-    print("Pipeline started")
-
-    merged = load_and_merge()
-    scored = aggregate_and_score(merged)
+# Scrapers stream rows into outputs/<source>_trending.ndjson (record_sink.py).
+# In pipelined mode those files are tailed while the scrapers run: rows are
+# normalized, canonicalized and pre-aggregated on arrival, so only the final
+# scoring + dedup remain once the last scraper exits.
+STREAM_SOURCES = {
+    "Amazon": os.path.join(OUTPUT_DIR, "amazon_trending.ndjson"),
+    "eBay": os.path.join(OUTPUT_DIR, "ebay_trending.ndjson"),
+}
+STREAM_POLL_SECONDS = 0.5
+
+# Values pandas.read_csv turns into NaN; the batch path drops those rows when grouping
+_MISSING_VALUES = {"", "N/A", "NA", "n/a", "NaN", "nan", "None", "NULL", "null"}
+
+
+def _present(value):
+    if value is None:
+        return False
+    if isinstance(value, float) and value != value:
+        return False
+    return not (isinstance(value, str) and value in _MISSING_VALUES)
+
+
+class NDJSONTail:
+    """Incrementally read complete lines appended to an NDJSON file."""
+
+    def __init__(self, path):
+        self.path = path
+        self.offset = 0
+        self._partial = b""
+
+    def read_new(self):
+        if not os.path.exists(self.path):
+            return []
+        if os.path.getsize(self.path) < self.offset:
+            # File was recreated by a new scraper run
+            self.offset, self._partial = 0, b""
+        # Bytes, not text: a flush can end in the middle of a multibyte UTF-8 character
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            chunk = f.read()
+            self.offset = f.tell()
+
+        lines = (self._partial + chunk).split(b"\n")
+        self._partial = lines.pop()  # incomplete trailing line, if any
+        records = []
+        for line in lines:
+            if line.strip():
+                try:
+                    records.append(json.loads(line.decode("utf-8")))
+                except (UnicodeDecodeError, json.JSONDecodeError):
+                    continue
+        return records
+
+
+class StreamingAggregator:
+    """
+    Running equivalent of load_and_merge() + aggregate_and_score().
+    Per-source min/max normalization is linear, so keeping per-group
+    counts and raw-score sums per source is enough to finish exactly.
+    """
+
+    def __init__(self):
+        self.groups = {}  # (item, country, market_type) -> {"sources": {src: [n, sum]}, "urls": set()}
+        self.bounds = {}  # source -> [min_raw, max_raw]
+        self.canonical = {}  # item -> (normalized_item, brand)
+        self.records = 0
+
+    def add(self, source, record):
+        item = record.get("product_title")
+        country = record.get("country")
+        market_type = record.get("amazon_market_type", record.get("market_type"))
+        raw = record.get("trend_score")
+        if not _present(raw):
+            return
+        raw = float(raw)
+
+        # Normalization bounds include rows that are later dropped for missing keys
+        bounds = self.bounds.setdefault(source, [raw, raw])
+        bounds[0] = min(bounds[0], raw)
+        bounds[1] = max(bounds[1], raw)
+        if not all(_present(v) for v in (item, country, market_type)):
+            return
+
+        group = self.groups.setdefault((item, country, market_type), {"sources": {}, "urls": set()})
+        stats = group["sources"].setdefault(source, [0, 0.0])
+        stats[0] += 1
+        stats[1] += raw
+        url = record.get("product_url")
+        if _present(url):
+            group["urls"].add(url)
+
+        if item not in self.canonical:
+            normalized = normalize_text(item)
+            self.canonical[item] = (normalized, extract_brand(normalized))
+        self.records += 1
+
+    def finalize(self):
+        """Scored frame in the same shape and order as aggregate_and_score()."""
+        rows = []
+        for (item, country, market_type), group in sorted(self.groups.items(), key=lambda kv: kv[0]):
+            base_strength = 0.0
+            for source, (count, total) in group["sources"].items():
+                low, high = self.bounds[source]
+                if high != low:
+                    base_strength += (total - count * low) / (high - low) * 100
+            normalized, brand = self.canonical[item]
+            rows.append({
+                "item": item,
+                "country": country,
+                "amazon_market_type": market_type,
+                "base_strength": base_strength,
+                "platform_count": len(group["sources"]),
+                "sources": ", ".join(sorted(group["sources"])),
+                "urls": list(group["urls"]),
+                "normalized_item": normalized,
+                "brand": brand,
+            })
+
+        agg = pd.DataFrame(rows, columns=[
+            "item", "country", "amazon_market_type", "base_strength", "platform_count",
+            "sources", "urls", "normalized_item", "brand",
+        ])
+        agg["confidence_multiplier"] = 1.0
+        agg["trend_strength"] = (agg["base_strength"] * agg["confidence_multiplier"]).round(2)
+        return agg.sort_values("trend_strength", ascending=False)
+
+
+def consume_stream(producers_running, sources=None, poll_interval=STREAM_POLL_SECONDS):
+    """
+    Tail the scraper sinks into a StreamingAggregator until producers_running()
+    returns False, then drain what's left. Returns the aggregator.
+    """
+    tails = {source: NDJSONTail(path) for source, path in (sources or STREAM_SOURCES).items()}
+    aggregator = StreamingAggregator()
+    while True:
+        running = producers_running()
+        for source, tail in tails.items():
+            for record in tail.read_new():
+                aggregator.add(source, record)
+        if not running:
+            return aggregator
+        time.sleep(poll_interval)
+
+
+def finish_pipeline(scored):
     deduped = deduplicate(scored)
     lifecycle = assign_lifecycle(deduped)
 
@@ -225,6 +372,26 @@ def run_pipeline():
         save_history(lifecycle)
 
     print("Pipeline complete | Records:", len(lifecycle))
+    progress.emit("records", source="pipeline", records=len(lifecycle))
+    return lifecycle
+
+
+def run_streaming_pipeline(producers_running, sources=None):
+    """Pipelined variant of run_pipeline() fed by the scrapers' NDJSON sinks."""
+    print("Pipeline started (streaming)")
+    aggregator = consume_stream(producers_running, sources=sources)
+    print("Stream drained | Records:", aggregator.records)
+    return finish_pipeline(aggregator.finalize())
+
+# =============================
+# MAIN PIPELINE
+# =============================
+def run_pipeline():
+    print("Pipeline started")
+
+    merged = load_and_merge()
+    scored = aggregate_and_score(merged)
+    return finish_pipeline(scored)
 
 if __name__ == "__main__":
     run_pipeline()
@@ -0,0 +1,61 @@
+"""
+Progress events from scrapers, the pipeline and festival discovery.
+
+Work code calls emit(event_type, **data) without knowing who is listening;
+job_manager subscribes so events land in the current job's stream. A
+subprocess started with PROGRESS_SUBSCRIBERS=<module>[,<module>] in its
+environment (run_all steps) imports those modules on its first emit, and they
+subscribe themselves the same way.
+"""
+import importlib
+import os
+import threading
+
+from logger import logger
+
+SUBSCRIBERS_ENV = "PROGRESS_SUBSCRIBERS"
+
+_lock = threading.Lock()
+_subscribers = []
+_env_loaded = False
+
+
+def subscribe(callback):
+    """Call callback(event_type, **data) for every emitted event."""
+    with _lock:
+        if callback not in _subscribers:
+            _subscribers.append(callback)
+
+
+def unsubscribe(callback):
+    with _lock:
+        if callback in _subscribers:
+            _subscribers.remove(callback)
+
+
+def _load_env_subscribers():
+    global _env_loaded
+    with _lock:
+        if _env_loaded:
+            return
+        _env_loaded = True
+    for name in filter(None, (n.strip() for n in os.getenv(SUBSCRIBERS_ENV, "").split(","))):
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            logger.warning(f"Progress subscriber {name!r} not loaded | {e}")
+
+
+def emit(event_type, **data):
+    """
+    Hand an event to every subscriber (no-op without any).
+    Never raises: progress reporting must not break the work itself.
+    """
+    _load_env_subscribers()
+    with _lock:
+        subscribers = list(_subscribers)
+    for callback in subscribers:
+        try:
+            callback(event_type, **data)
+        except Exception as e:
+            logger.warning(f"Progress event dropped | {event_type} | {e}")
@@ -0,0 +1,203 @@
+"""
+Daily API unit ledger shared across processes, plus a small conditional-request
+cache (ETag + last body) for endpoints that are re-fetched every run.
+
+Units are reserved before each call goes out, so concurrent scrapers cannot
+overspend the day's budget together; a call that would exceed the budget raises
+QuotaExceededError instead of being sent.
+"""
+import os
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+from logger import logger
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:  # Python < 3.9
+    ZoneInfo = None
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+STATE_DIR = os.path.join(PROJECT_ROOT, "state")
+QUOTA_DB = os.getenv("QUOTA_DB", os.path.join(STATE_DIR, "quota_ledger.sqlite"))
+
+# Units per call. YouTube Data API v3: search.list = 100, videos.list = 1.
+ENDPOINT_COSTS = {
+    ("youtube", "search.list"): 100,
+    ("youtube", "videos.list"): 1,
+}
+DEFAULT_COST = 1
+
+# Units per day; providers without a budget are only recorded.
+# Override with e.g. QUOTA_BUDGET_YOUTUBE=5000.
+PROVIDER_BUDGETS = {
+    "youtube": 10000,
+    "serpapi_prewarm": 200,  # searches/day festival_prewarm.py may spend warming the SERP cache
+}
+
+# YouTube quotas reset at midnight Pacific time
+QUOTA_DAY_TZ = "America/Los_Angeles"
+
+
+class QuotaExceededError(Exception):
+    """Raised instead of making a call that would go over the provider's daily budget."""
+
+    def __init__(self, provider, endpoint, spent, budget, resets_in):
+        super().__init__(
+            f"Quota exhausted for {provider} {endpoint}: {spent}/{budget} units used today "
+            f"(resets in {resets_in / 3600:.1f}h)"
+        )
+        self.provider = provider
+        self.endpoint = endpoint
+        self.spent = spent
+        self.budget = budget
+        self.resets_in = resets_in
+
+
+def get_cost(provider, endpoint):
+    return ENDPOINT_COSTS.get((provider, endpoint), DEFAULT_COST)
+
+
+def get_budget(provider):
+    """Daily unit budget for a provider (None = unlimited), honoring env overrides."""
+    override = os.getenv(f"QUOTA_BUDGET_{provider.upper()}", "")
+    if override:
+        try:
+            return int(override)
+        except ValueError:
+            logger.warning(f"Ignoring malformed QUOTA_BUDGET_{provider.upper()}={override!r}")
+    return PROVIDER_BUDGETS.get(provider)
+
+
+def _now():
+    if ZoneInfo is not None:
+        try:
+            return datetime.now(ZoneInfo(QUOTA_DAY_TZ))
+        except Exception:
+            pass
+    return datetime.utcnow()
+
+
+def quota_day():
+    return _now().strftime("%Y-%m-%d")
+
+
+def seconds_until_reset():
+    now = _now()
+    tomorrow = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return (tomorrow - now).total_seconds()
+
+
+def _connect():
+    os.makedirs(os.path.dirname(QUOTA_DB), exist_ok=True)
+    conn = sqlite3.connect(QUOTA_DB, timeout=30, isolation_level=None)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS usage ("
+        " provider TEXT NOT NULL,"
+        " endpoint TEXT NOT NULL,"
+        " day TEXT NOT NULL,"
+        " units INTEGER NOT NULL DEFAULT 0,"
+        " calls INTEGER NOT NULL DEFAULT 0,"
+        " PRIMARY KEY (provider, endpoint, day))"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS conditional_cache ("
+        " key TEXT PRIMARY KEY,"
+        " etag TEXT NOT NULL,"
+        " body TEXT NOT NULL,"
+        " updated REAL NOT NULL)"
+    )
+    return conn
+
+
+def reserve(provider, endpoint, units=None):
+    """
+    Record `units` (default: the endpoint cost) against today's budget.
+    Raises QuotaExceededError without recording anything if it would go over.
+    """
+    units = get_cost(provider, endpoint) if units is None else units
+    budget = get_budget(provider)
+    day = quota_day()
+    conn = _connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        spent = conn.execute(
+            "SELECT COALESCE(SUM(units), 0) FROM usage WHERE provider = ? AND day = ?", (provider, day)
+        ).fetchone()[0]
+        if budget is not None and spent + units > budget:
+            conn.execute("ROLLBACK")
+            raise QuotaExceededError(provider, endpoint, spent, budget, seconds_until_reset())
+        conn.execute(
+            "INSERT INTO usage (provider, endpoint, day, units, calls) VALUES (?, ?, ?, ?, 1)"
+            " ON CONFLICT(provider, endpoint, day) DO UPDATE SET"
+            " units = units + excluded.units, calls = calls + 1",
+            (provider, endpoint, day, units),
+        )
+        conn.execute("COMMIT")
+        return spent + units
+    except Exception:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+
+def remaining(provider):
+    """Units left today, or None when the provider has no budget."""
+    budget = get_budget(provider)
+    if budget is None:
+        return None
+    return max(0, budget - usage_today(provider).get(provider, {}).get("units", 0))
+
+
+def usage_today(provider=None):
+    """{provider: {"units", "budget", "endpoints": {endpoint: {"units", "calls"}}}} for today."""
+    day = quota_day()
+    conn = _connect()
+    try:
+        query = "SELECT provider, endpoint, units, calls FROM usage WHERE day = ?"
+        args = [day]
+        if provider:
+            query += " AND provider = ?"
+            args.append(provider)
+        rows = conn.execute(query, args).fetchall()
+    finally:
+        conn.close()
+
+    providers = sorted({p for p, *_ in rows} | ({provider} if provider else set(PROVIDER_BUDGETS)))
+    usage = {p: {"day": day, "units": 0, "budget": get_budget(p), "endpoints": {}} for p in providers}
+    for p, endpoint, units, calls in rows:
+        usage[p]["units"] += units
+        usage[p]["endpoints"][endpoint] = {"units": units, "calls": calls}
+    return usage
+
+
+def get_cached_response(key):
+    """Last (etag, body) stored for a conditional request, or None."""
+    conn = _connect()
+    try:
+        row = conn.execute("SELECT etag, body FROM conditional_cache WHERE key = ?", (key,)).fetchone()
+    finally:
+        conn.close()
+    return {"etag": row[0], "body": row[1]} if row else None
+
+
+def store_cached_response(key, etag, body):
+    conn = _connect()
+    try:
+        conn.execute(
+            "INSERT OR REPLACE INTO conditional_cache (key, etag, body, updated) VALUES (?, ?, ?, ?)",
+            (key, etag, body, time.time()),
+        )
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    for name, info in usage_today().items():
+        budget = info["budget"] if info["budget"] is not None else "unlimited"
+        print(f"{name:10s} {info['units']}/{budget} units on {info['day']}")
+        for endpoint, stats in sorted(info["endpoints"].items()):
+            print(f"    {endpoint:14s} units={stats['units']} calls={stats['calls']}")
@@ -0,0 +1,393 @@
+"""
+Per-provider token-bucket rate limiter shared across processes.
+Bucket state lives in a small SQLite file so concurrent run_all steps,
+the API and ad-hoc scripts all draw from the same buckets.
+
+Requests carry a priority class ("interactive" or "batch", see priority()).
+Waiting requests register in a shared waiters table; a batch request does not
+take a token while an interactive one is waiting for the same provider, and
+leaves INTERACTIVE_RESERVE tokens in the bucket once DEEP_QUEUE_DEPTH requests
+are queued. Queue wait per class is recorded for /providers/status.
+"""
+import contextvars
+import heapq
+import itertools
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from logger import logger
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+STATE_DIR = os.path.join(PROJECT_ROOT, "state")
+RATE_LIMIT_DB = os.getenv("RATE_LIMIT_DB", os.path.join(STATE_DIR, "rate_limits.sqlite"))
+
+# rate = tokens refilled per second, capacity = burst size.
+# Override per provider with e.g. RATE_LIMIT_SERPAPI="2,5" (rate,capacity).
+PROVIDER_LIMITS = {
+    "serpapi": {"rate": 2.0, "capacity": 5},
+    "reddit": {"rate": 0.5, "capacity": 3},  # unauthenticated old.reddit
+    "youtube": {"rate": 10.0, "capacity": 10},
+    "etsy": {"rate": 10.0, "capacity": 10},  # Etsy v3: 10 requests/second
+}
+DEFAULT_LIMIT = {"rate": 1.0, "capacity": 1}
+DEFAULT_RETRY_AFTER = 5  # seconds, used when a 429 carries no Retry-After header
+MAX_SLEEP_STEP = 1.0  # re-check shared state at least this often while waiting
+
+PRIORITY_CLASSES = ("interactive", "batch")  # highest first
+# Class for code that does not set one (run_all steps, scripts); the API marks user requests interactive
+DEFAULT_PRIORITY = os.getenv("REQUEST_PRIORITY", "batch")
+DEEP_QUEUE_DEPTH = 3
+INTERACTIVE_RESERVE = 1
+WAITER_STALE_SECONDS = 10  # waiters not seen for this long belong to dead processes
+
+_priority = contextvars.ContextVar("request_priority", default=None)
+
+
+def current_priority():
+    value = _priority.get() or DEFAULT_PRIORITY
+    return value if value in PRIORITY_CLASSES else PRIORITY_CLASSES[-1]
+
+
+@contextmanager
+def priority(value):
+    """Run the block's outbound requests (in this thread / context) in the given class."""
+    token = _priority.set(value)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def get_limits(provider):
+    """Return {"rate", "capacity"} for a provider, honoring env overrides."""
+    limits = dict(PROVIDER_LIMITS.get(provider, DEFAULT_LIMIT))
+    override = os.getenv(f"RATE_LIMIT_{provider.upper()}", "")
+    if override:
+        try:
+            rate, capacity = [float(x) for x in override.split(",", 1)]
+            limits = {"rate": rate, "capacity": capacity}
+        except ValueError:
+            logger.warning(f"Ignoring malformed RATE_LIMIT_{provider.upper()}={override!r}")
+    return limits
+
+
+def _connect():
+    os.makedirs(os.path.dirname(RATE_LIMIT_DB), exist_ok=True)
+    conn = sqlite3.connect(RATE_LIMIT_DB, timeout=30, isolation_level=None)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS buckets ("
+        " provider TEXT PRIMARY KEY,"
+        " tokens REAL NOT NULL,"
+        " updated REAL NOT NULL,"
+        " blocked_until REAL NOT NULL DEFAULT 0)"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS waiters ("
+        " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+        " provider TEXT NOT NULL,"
+        " priority TEXT NOT NULL,"
+        " since REAL NOT NULL,"
+        " seen REAL NOT NULL)"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS wait_stats ("
+        " provider TEXT NOT NULL,"
+        " priority TEXT NOT NULL,"
+        " requests INTEGER NOT NULL DEFAULT 0,"
+        " waited INTEGER NOT NULL DEFAULT 0,"
+        " total_wait REAL NOT NULL DEFAULT 0,"
+        " max_wait REAL NOT NULL DEFAULT 0,"
+        " PRIMARY KEY (provider, priority))"
+    )
+    return conn
+
+
+def _load_bucket(conn, provider, limits, now):
+    """Read a bucket inside an open transaction and apply the refill since last update."""
+    row = conn.execute(
+        "SELECT tokens, updated, blocked_until FROM buckets WHERE provider = ?", (provider,)
+    ).fetchone()
+    if row is None:
+        return limits["capacity"], 0.0
+    tokens, updated, blocked_until = row
+    if now > updated:
+        tokens = min(limits["capacity"], tokens + (now - updated) * limits["rate"])
+    return tokens, blocked_until
+
+
+def _save_bucket(conn, provider, tokens, now, blocked_until):
+    conn.execute(
+        "INSERT OR REPLACE INTO buckets (provider, tokens, updated, blocked_until) VALUES (?, ?, ?, ?)",
+        (provider, tokens, now, blocked_until),
+    )
+
+
+def _refill_wait(limits, needed):
+    return needed / limits["rate"] if limits["rate"] > 0 else MAX_SLEEP_STEP
+
+
+def _live_waiters(conn, provider, now, exclude_id=None):
+    """{priority: count} of live waiters for a provider."""
+    rows = conn.execute(
+        "SELECT priority, COUNT(*) FROM waiters WHERE provider = ? AND seen >= ? AND id != ? GROUP BY priority",
+        (provider, now - WAITER_STALE_SECONDS, exclude_id or 0),
+    ).fetchall()
+    return dict(rows)
+
+
+def _record_wait(conn, provider, priority_class, waited):
+    conn.execute(
+        "INSERT INTO wait_stats (provider, priority, requests, waited, total_wait, max_wait) VALUES (?, ?, 1, ?, ?, ?)"
+        " ON CONFLICT(provider, priority) DO UPDATE SET"
+        " requests = requests + 1, waited = waited + excluded.waited,"
+        " total_wait = total_wait + excluded.total_wait, max_wait = MAX(max_wait, excluded.max_wait)",
+        (provider, priority_class, 1 if waited > 0 else 0, waited, waited),
+    )
+
+
+def try_acquire(provider, tokens=1, priority_class=None, waiter_id=None):
+    """
+    Take `tokens` from the provider bucket if available and no higher-priority
+    request is waiting for it. Returns 0 on success, otherwise the number of
+    seconds to wait before retrying. `waiter_id` (from acquire) is heartbeated
+    while waiting and removed on success.
+    """
+    priority_class = priority_class or current_priority()
+    limits = get_limits(provider)
+    conn = _connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        now = time.time()
+        available, blocked_until = _load_bucket(conn, provider, limits, now)
+        reserve = 0
+        yield_to_higher = False
+        if priority_class != PRIORITY_CLASSES[0]:
+            waiting = _live_waiters(conn, provider, now, waiter_id)
+            rank = PRIORITY_CLASSES.index(priority_class)
+            yield_to_higher = any(waiting.get(cls) for cls in PRIORITY_CLASSES[:rank])
+            if sum(waiting.values()) + 1 >= DEEP_QUEUE_DEPTH:
+                reserve = max(0, min(INTERACTIVE_RESERVE, limits["capacity"] - tokens))
+
+        if blocked_until > now:
+            wait = blocked_until - now
+        elif yield_to_higher:
+            wait = min(MAX_SLEEP_STEP, _refill_wait(limits, 1))
+        elif available >= tokens + reserve:
+            available -= tokens
+            wait = 0.0
+        else:
+            wait = _refill_wait(limits, tokens + reserve - available)
+        _save_bucket(conn, provider, available, now, blocked_until)
+
+        if wait <= 0:
+            since = None
+            if waiter_id is not None:
+                row = conn.execute("SELECT since FROM waiters WHERE id = ?", (waiter_id,)).fetchone()
+                since = row[0] if row else None
+                conn.execute("DELETE FROM waiters WHERE id = ?", (waiter_id,))
+            _record_wait(conn, provider, priority_class, max(0.0, now - since) if since else 0.0)
+        elif waiter_id is not None:
+            conn.execute("UPDATE waiters SET seen = ? WHERE id = ?", (now, waiter_id))
+        conn.execute("COMMIT")
+        return wait
+    except Exception:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+
+def _register_waiter(provider, priority_class):
+    conn = _connect()
+    try:
+        now = time.time()
+        conn.execute("DELETE FROM waiters WHERE seen < ?", (now - WAITER_STALE_SECONDS,))
+        return conn.execute(
+            "INSERT INTO waiters (provider, priority, since, seen) VALUES (?, ?, ?, ?)",
+            (provider, priority_class, now, now),
+        ).lastrowid
+    finally:
+        conn.close()
+
+
+def _remove_waiter(waiter_id):
+    conn = _connect()
+    try:
+        conn.execute("DELETE FROM waiters WHERE id = ?", (waiter_id,))
+    finally:
+        conn.close()
+
+
+def acquire(provider, tokens=1):
+    """
+    Block until `tokens` are available for the provider, in the current
+    priority class. Returns seconds waited.
+    """
+    start = time.monotonic()
+    priority_class = current_priority()
+    wait = try_acquire(provider, tokens, priority_class)
+    if wait <= 0:
+        return time.monotonic() - start
+
+    waiter_id = _register_waiter(provider, priority_class)
+    try:
+        while wait > 0:
+            time.sleep(min(wait, MAX_SLEEP_STEP))
+            wait = try_acquire(provider, tokens, priority_class, waiter_id)
+        waiter_id = None
+    finally:
+        if waiter_id is not None:
+            _remove_waiter(waiter_id)
+    return time.monotonic() - start
+
+
+class PrioritySemaphore:
+    """
+    In-process concurrency cap that hands a free slot to the highest-priority
+    waiter first (FIFO within a class), using the caller's priority().
+    """
+
+    def __init__(self, value):
+        self._value = value
+        self._cond = threading.Condition()
+        self._waiters = []  # heap of (class rank, arrival)
+        self._arrivals = itertools.count()
+
+    def acquire(self):
+        entry = (PRIORITY_CLASSES.index(current_priority()), next(self._arrivals))
+        with self._cond:
+            heapq.heappush(self._waiters, entry)
+            while not (self._value > 0 and self._waiters[0] == entry):
+                self._cond.wait()
+            heapq.heappop(self._waiters)
+            self._value -= 1
+            self._cond.notify_all()
+
+    def release(self):
+        with self._cond:
+            self._value += 1
+            self._cond.notify_all()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def get_wait_stats():
+    """{provider: {priority: {"requests", "waited", "avg_wait_sec", "max_wait_sec", "queued"}}} across processes."""
+    conn = _connect()
+    try:
+        now = time.time()
+        stats_rows = conn.execute(
+            "SELECT provider, priority, requests, waited, total_wait, max_wait FROM wait_stats"
+        ).fetchall()
+        queued_rows = conn.execute(
+            "SELECT provider, priority, COUNT(*) FROM waiters WHERE seen >= ? GROUP BY provider, priority",
+            (now - WAITER_STALE_SECONDS,),
+        ).fetchall()
+    finally:
+        conn.close()
+
+    empty = {"requests": 0, "waited": 0, "avg_wait_sec": 0.0, "max_wait_sec": 0.0, "queued": 0}
+    stats = {}
+    for provider, priority_class, requests, waited, total_wait, max_wait in stats_rows:
+        entry = stats.setdefault(provider, {}).setdefault(priority_class, dict(empty))
+        entry.update(
+            requests=requests,
+            waited=waited,
+            avg_wait_sec=round(total_wait / requests, 3) if requests else 0.0,
+            max_wait_sec=round(max_wait, 3),
+        )
+    for provider, priority_class, queued in queued_rows:
+        stats.setdefault(provider, {}).setdefault(priority_class, dict(empty))["queued"] = queued
+    return stats
+
+
+def parse_retry_after(value):
+    """Parse a Retry-After header (delta-seconds or HTTP date) into seconds."""
+    if value is None or value == "":
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        when = parsedate_to_datetime(str(value))
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def note_retry_after(provider, value=None, default=DEFAULT_RETRY_AFTER):
+    """
+    Pause the provider bucket for every process after a 429.
+    `value` is the raw Retry-After header; returns the pause length in seconds.
+    """
+    delay = parse_retry_after(value)
+    if delay is None:
+        delay = default
+    limits = get_limits(provider)
+    conn = _connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        now = time.time()
+        _, blocked_until = _load_bucket(conn, provider, limits, now)
+        _save_bucket(conn, provider, 0.0, now, max(blocked_until, now + delay))
+        conn.execute("COMMIT")
+    except Exception:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+    logger.warning(f"Rate limit | {provider} | paused for {delay:.1f}s (Retry-After={value!r})")
+    return delay
+
+
+def get_token_levels():
+    """Snapshot of every known bucket: current tokens, limits and remaining pause."""
+    conn = _connect()
+    try:
+        rows = {
+            provider: (tokens, updated, blocked_until)
+            for provider, tokens, updated, blocked_until in conn.execute(
+                "SELECT provider, tokens, updated, blocked_until FROM buckets"
+            )
+        }
+    finally:
+        conn.close()
+
+    now = time.time()
+    levels = {}
+    for provider in sorted(set(PROVIDER_LIMITS) | set(rows)):
+        limits = get_limits(provider)
+        tokens, updated, blocked_until = rows.get(provider, (limits["capacity"], now, 0.0))
+        tokens = min(limits["capacity"], tokens + max(0.0, now - updated) * limits["rate"])
+        levels[provider] = {
+            "tokens": round(tokens, 2),
+            "capacity": limits["capacity"],
+            "rate_per_sec": limits["rate"],
+            "paused_for_sec": round(max(0.0, blocked_until - now), 2),
+        }
+    return levels
+
+
+if __name__ == "__main__":
+    for name, level in get_token_levels().items():
+        print(f"{name:10s} tokens={level['tokens']}/{level['capacity']} "
+              f"rate={level['rate_per_sec']}/s paused={level['paused_for_sec']}s")
+    for name, classes in sorted(get_wait_stats().items()):
+        for priority_class, info in sorted(classes.items()):
+            print(f"{name:10s} {priority_class:12s} requests={info['requests']} avg_wait={info['avg_wait_sec']}s "
+                  f"max_wait={info['max_wait_sec']}s queued={info['queued']}")
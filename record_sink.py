@@ -0,0 +1,117 @@
+"""
+Append-only NDJSON record sinks for scrapers.
+
+Scrapers write each parsed row as soon as it is produced and flush once per
+query, so a crash mid-run keeps everything collected so far. compact() turns
+the NDJSON file into the usual <name>_trending.csv / .json that
+pipeline.load_and_merge reads. When run as part of an API job, each flush and
+compaction is reported as a progress event (progress.emit).
+
+Recover a crashed run with: python record_sink.py amazon
+"""
+import json
+import os
+import sys
+
+import pandas as pd
+
+import progress
+
+OUTPUT_DIR = "outputs"
+
+
+def ndjson_path(name, output_dir=OUTPUT_DIR):
+    return os.path.join(output_dir, f"{name}_trending.ndjson")
+
+
+def read_records(path):
+    """Yield records from an NDJSON file, skipping a torn final line."""
+    if not os.path.exists(path):
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def compact_ndjson(path, csv_path, json_path, write_empty=False):
+    """Materialize an NDJSON sink as CSV + records JSON. Returns the row count."""
+    df = pd.DataFrame(list(read_records(path)))
+    if not df.empty or write_empty:
+        df.to_csv(csv_path, index=False)
+        df.to_json(json_path, orient="records")
+    return len(df)
+
+
+class RecordSink:
+    """Append-only NDJSON writer; use as a context manager around a scraper run."""
+
+    def __init__(self, name, output_dir=OUTPUT_DIR):
+        self.name = name
+        self.output_dir = output_dir
+        self.path = ndjson_path(name, output_dir)
+        self.count = 0
+        self._flushed_count = 0
+        self._file = None
+
+    def open(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        # Each run starts a fresh sink; the previous run's compacted CSV/JSON stay untouched
+        self._file = open(self.path, "w", encoding="utf-8")
+        return self
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def write(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        self.count += 1
+
+    def write_many(self, records):
+        for record in records:
+            self.write(record)
+
+    def flush(self, query=None):
+        """Make everything written so far durable (call once per query)."""
+        if self._file and not self._file.closed:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            if query is not None:
+                progress.emit(
+                    "records", source=self.name, query=query,
+                    new=self.count - self._flushed_count, records=self.count,
+                )
+            self._flushed_count = self.count
+
+    def close(self):
+        if self._file and not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def compact(self, csv_path, json_path, write_empty=False):
+        self.close()
+        rows = compact_ndjson(self.path, csv_path, json_path, write_empty=write_empty)
+        progress.emit("compacted", source=self.name, records=rows)
+        return rows
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python record_sink.py <source> [<source> ...]  e.g. amazon ebay")
+        sys.exit(1)
+    for source in sys.argv[1:]:
+        rows = compact_ndjson(
+            ndjson_path(source),
+            os.path.join(OUTPUT_DIR, f"{source}_trending.csv"),
+            os.path.join(OUTPUT_DIR, f"{source}_trending.json"),
+        )
+        print(f"{source}: compacted {rows} records")
@@ -0,0 +1,211 @@
+"""
+Retries with jittered exponential backoff and per-provider circuit breakers.
+Outbound scraper HTTP goes through resilient_get(), which applies the shared
+rate limiter, retries transient failures and fails fast while a breaker is open.
+"""
+import random
+import threading
+import time
+
+import requests
+
+import http_fixtures
+import quota_ledger
+import rate_limiter
+from logger import logger
+
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5  # seconds
+BACKOFF_MAX = 20  # seconds
+TRANSIENT_STATUSES = (429, 500, 502, 503, 504)
+# SerpApi answers 429 when a key's plan is exhausted: rotate keys instead of retrying.
+SERPAPI_TRANSIENT_STATUSES = (500, 502, 503, 504)
+# Network errors worth retrying; other RequestExceptions count as a failure and propagate
+TRANSIENT_ERRORS = (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)
+
+BREAKER_FAILURE_THRESHOLD = 5  # consecutive failures before the breaker opens
+BREAKER_RESET_TIMEOUT = 30  # seconds open before a half-open probe is allowed
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose breaker is open."""
+
+    def __init__(self, name, retry_in):
+        super().__init__(f"Circuit open for {name} (retry in {retry_in:.0f}s)")
+        self.name = name
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name, failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_timeout=BREAKER_RESET_TIMEOUT):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.stats = {"successes": 0, "failures": 0, "short_circuited": 0, "times_opened": 0}
+        self._lock = threading.Lock()
+
+    def _transition(self, new_state):
+        if new_state == self.state:
+            return
+        logger.warning(f"Circuit breaker | {self.name} | {self.state} -> {new_state}")
+        self.state = new_state
+        if new_state == self.OPEN:
+            self.opened_at = time.monotonic()
+            self.stats["times_opened"] += 1
+
+    def allow(self):
+        """Return True if a call may go out now; open breakers admit one probe after the timeout."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self._transition(self.HALF_OPEN)
+            if self.state == self.HALF_OPEN and not self.probe_in_flight:
+                self.probe_in_flight = True
+                return True
+            self.stats["short_circuited"] += 1
+            return False
+
+    def blocked(self):
+        """
+        True (counted as short-circuited) if allow() would refuse right now.
+        Unlike allow(), never claims the half-open probe.
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return False
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                return False
+            if self.state == self.HALF_OPEN and not self.probe_in_flight:
+                return False
+            self.stats["short_circuited"] += 1
+            return True
+
+    def release_probe(self):
+        """Give back a claimed half-open probe whose call never went out."""
+        with self._lock:
+            self.probe_in_flight = False
+
+    def retry_in(self):
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def record_success(self):
+        with self._lock:
+            self.stats["successes"] += 1
+            self.consecutive_failures = 0
+            self.probe_in_flight = False
+            self._transition(self.CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self.stats["failures"] += 1
+            self.consecutive_failures += 1
+            self.probe_in_flight = False
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                self._transition(self.OPEN)
+                self.opened_at = time.monotonic()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "retry_in_sec": round(self.retry_in(), 1) if self.state == self.OPEN else 0,
+                **self.stats,
+            }
+
+
+_BREAKERS = {}
+_BREAKERS_LOCK = threading.Lock()
+
+
+def get_breaker(name):
+    with _BREAKERS_LOCK:
+        if name not in _BREAKERS:
+            _BREAKERS[name] = CircuitBreaker(name)
+        return _BREAKERS[name]
+
+
+def breaker_states():
+    """Snapshot of every breaker created in this process."""
+    with _BREAKERS_LOCK:
+        breakers = list(_BREAKERS.values())
+    return {b.name: b.snapshot() for b in breakers}
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_MAX):
+    """Full-jitter exponential backoff for the given 0-based retry attempt."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def resilient_get(provider, url, breaker_key=None, retry_statuses=TRANSIENT_STATUSES,
+                  max_retries=MAX_RETRIES, quota_endpoint=None, quota_provider=None, **kwargs):
+    """
+    requests.get() with the provider's rate limit, retries and circuit breaker.
+    Returns the last response (callers keep handling non-2xx statuses themselves);
+    raises CircuitOpenError when the breaker is open, or the last network error
+    once retries are exhausted. With quota_endpoint set, every attempt is charged
+    to the daily quota ledger first (QuotaExceededError once the budget is spent),
+    under quota_provider when the budget is not the rate-limited provider's own.
+    """
+    if http_fixtures.replaying():
+        return http_fixtures.load_fixture(url, kwargs.get("params"))
+
+    breaker = get_breaker(breaker_key or provider)
+    target_url = http_fixtures.rewrite_url(url)
+    last_error = None
+    for attempt in range(max_retries + 1):
+        if breaker.blocked():
+            raise CircuitOpenError(breaker.name, breaker.retry_in())
+
+        # Quota and rate limit before claiming a half-open probe, so neither can leak it
+        if quota_endpoint:
+            quota_ledger.reserve(quota_provider or provider, quota_endpoint)
+        rate_limiter.acquire(provider)
+        if not breaker.allow():
+            raise CircuitOpenError(breaker.name, breaker.retry_in())
+        try:
+            response = requests.get(target_url, **kwargs)
+        except TRANSIENT_ERRORS as e:
+            breaker.record_failure()
+            last_error = e
+            logger.warning(f"Transient error | {provider} | attempt {attempt + 1}/{max_retries + 1} | {e}")
+        except requests.RequestException:
+            breaker.record_failure()
+            raise
+        except BaseException:
+            breaker.release_probe()
+            raise
+        else:
+            status = response.status_code
+            retry_after = response.headers.get("Retry-After")
+            if status == 429 and (retry_after or 429 in retry_statuses):
+                rate_limiter.note_retry_after(provider, retry_after)
+            if status not in retry_statuses:
+                breaker.record_success()
+                # 304s depend on the caller's cached body, so they are not replayable
+                if http_fixtures.recording() and status != 304:
+                    http_fixtures.save_fixture(url, kwargs.get("params"), response)
+                return response
+            if status == 429:
+                # Throttling is handled by the shared bucket, not counted against the breaker
+                breaker.record_success()
+            else:
+                breaker.record_failure()
+            last_error = None
+            logger.warning(f"Transient HTTP {status} | {provider} | attempt {attempt + 1}/{max_retries + 1}")
+            if attempt == max_retries:
+                return response
+
+        if attempt < max_retries:
+            time.sleep(backoff_delay(attempt))
+
+    raise last_error
@@ -2,10 +2,12 @@ import subprocess
 import sys
 import os
 import argparse
+import tempfile
 from logger import logger
 
 PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
 PYTHON_EXEC = sys.executable
+PIPELINE_STEP_NAME = "Trend Intelligence Pipeline"
 
 
 def build_steps(queries=None, subreddits=None):
@@ -48,7 +50,7 @@ def build_steps(queries=None, subreddits=None):
     # ...
 
 
-    steps.append(("Trend Intelligence Pipeline", [PYTHON_EXEC, "pipeline.py"]))
+    steps.append((PIPELINE_STEP_NAME, [PYTHON_EXEC, "pipeline.py"]))
     return steps
 
 
@@ -73,6 +75,53 @@ def run_step(name, command):
         logger.error(f"Execution error in step {name} | {e}")
 
 
+def run_pipelined(steps):
+    """
+    Run the scraper steps concurrently and let the pipeline aggregate their
+    NDJSON output while they are still producing (producer/consumer mode).
+    """
+    os.chdir(PROJECT_ROOT)
+    import pipeline
+
+    # Stale sinks from a previous run must not be consumed as new data
+    for path in pipeline.STREAM_SOURCES.values():
+        if os.path.exists(path):
+            os.remove(path)
+
+    producers = []
+    for name, command in steps:
+        if name == PIPELINE_STEP_NAME:
+            continue
+        logger.info(f"Starting step: {name}")
+        stderr = tempfile.TemporaryFile(mode="w+")
+        proc = subprocess.Popen(command, cwd=PROJECT_ROOT, stdout=subprocess.DEVNULL, stderr=stderr, text=True)
+        producers.append((name, proc, stderr))
+
+    finished = set()
+
+    def producers_running():
+        running = False
+        for name, proc, stderr in producers:
+            if proc.poll() is None:
+                running = True
+            elif name not in finished:
+                finished.add(name)
+                if proc.returncode != 0:
+                    stderr.seek(0)
+                    logger.error(f"Step failed: {name} | stderr: {stderr.read()}")
+                else:
+                    logger.info(f"Step completed successfully: {name}")
+                stderr.close()
+        return running
+
+    logger.info(f"Starting step: {PIPELINE_STEP_NAME} (streaming)")
+    try:
+        pipeline.run_streaming_pipeline(producers_running)
+        logger.info(f"Step completed successfully: {PIPELINE_STEP_NAME}")
+    except Exception as e:
+        logger.error(f"Execution error in step {PIPELINE_STEP_NAME} | {e}")
+
+
 def main():
     parser = argparse.ArgumentParser(description="Run full trend pipeline")
     parser.add_argument(
@@ -87,13 +136,21 @@ def main():
         default=None,
         help='Reddit subreddits as "vertical:sub1,sub2;vertical2:sub3"',
     )
+    parser.add_argument(
+        "--pipelined",
+        action="store_true",
+        help="Run scrapers concurrently and aggregate their output while they are still running",
+    )
     args = parser.parse_args()
 
     steps = build_steps(queries=args.queries, subreddits=args.subreddits)
     logger.info("Pipeline execution started")
 
-    for step_name, cmd in steps:
-        run_step(step_name, cmd)
+    if args.pipelined:
+        run_pipelined(steps)
+    else:
+        for step_name, cmd in steps:
+            run_step(step_name, cmd)
 
     logger.info("Pipeline execution completed")
     print("Pipeline run completed successfully. Check pipeline.log for details.")
@@ -1,9 +1,6 @@
 import os
 import sys
 import argparse
-import pandas as pd
-import requests
-import time
 
 from dotenv import load_dotenv
 
@@ -13,6 +10,8 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from logger import logger
 from query_config import get_amazon_queries  # Reuse same query config
 from country_config import COUNTRIES
+from record_sink import RecordSink
+from resilience import resilient_get, CircuitOpenError, SERPAPI_TRANSIENT_STATUSES
 
 # Load environment variables from scrapers/.env
 load_dotenv(os.path.join(os.path.dirname(__file__), '.env'))
@@ -40,7 +39,13 @@ def fetch_serpapi_aliexpress_results(query):
         
         try:
             logger.info(f"Fetching '{query}' on AliExpress via SerpApi (Key: ...{api_key[-4:]})")
-            response = requests.get("https://serpapi.com/search.json", params=params, timeout=10)
+            response = resilient_get(
+                "serpapi",
+                "https://serpapi.com/search.json",
+                params=params,
+                timeout=10,
+                retry_statuses=SERPAPI_TRANSIENT_STATUSES,
+            )
             
             if response.status_code == 200:
                 data = response.json()
@@ -54,6 +59,9 @@ def fetch_serpapi_aliexpress_results(query):
             else:
                  logger.error(f"SerpApi HTTP Error: {response.status_code}")
                  
+        except CircuitOpenError as e:
+            logger.warning(f"SerpApi unavailable, skipping '{query}': {e}")
+            return []
         except Exception as e:
             logger.error(f"Request Exception: {e}")
             
@@ -68,8 +76,6 @@ def run_aliexpress_scraper(queries=None):
         logger.warning("No queries provided.")
         return
 
-    rows = []
-    
     # Focus only on Iceland as the main market
     iceland_config = COUNTRIES.get("Iceland")
     if not iceland_config:
@@ -80,66 +86,67 @@ def run_aliexpress_scraper(queries=None):
     
     logger.info(f"--- Processing AliExpress (Global marketplace) ---")
     
-    for q in user_queries:
-        results = fetch_serpapi_aliexpress_results(q)
+    with RecordSink("aliexpress") as sink:
+        for q in user_queries:
+            results = fetch_serpapi_aliexpress_results(q)
         
-        if not results:
-             logger.warning(f"No results found for '{q}' on AliExpress")
-             continue
+            if not results:
+                 logger.warning(f"No results found for '{q}' on AliExpress")
+                 sink.flush(query=q)  # still report the query to job progress
+                 continue
         
-        # Limit to max 10 products per query
-        results = results[:10]
+            # Limit to max 10 products per query
+            results = results[:10]
              
-        for i, item in enumerate(results):
-            title = item.get("title", "N/A")
-            link = item.get("link", "")
+            for i, item in enumerate(results):
+                title = item.get("title", "N/A")
+                link = item.get("link", "")
             
-            # AliExpress pricing
-            price_data = item.get("price")
-            price = None
-            if isinstance(price_data, dict):
-                price = price_data.get("current") or price_data.get("value")
-            elif isinstance(price_data, (str, float, int)):
-                price = price_data
+                # AliExpress pricing
+                price_data = item.get("price")
+                price = None
+                if isinstance(price_data, dict):
+                    price = price_data.get("current") or price_data.get("value")
+                elif isinstance(price_data, (str, float, int)):
+                    price = price_data
             
-            # Rating information
-            rating = item.get("rating")
-            reviews = item.get("reviews")
+                # Rating information
+                rating = item.get("rating")
+                reviews = item.get("reviews")
             
-            # Orders (popularity indicator)
-            orders = item.get("orders", 0)
+                # Orders (popularity indicator)
+                orders = item.get("orders", 0)
             
-            # Simple trend score based on rank and orders
-            trend_score = max(1, 100 - i * 5)
-            if orders:
-                # Boost score based on order volume
-                try:
-                    order_count = int(str(orders).replace("+", "").replace("k", "000").replace("K", "000"))
-                    trend_score += min(order_count // 100, 50)
-                except:
-                    pass
+                # Simple trend score based on rank and orders
+                trend_score = max(1, 100 - i * 5)
+                if orders:
+                    # Boost score based on order volume
+                    try:
+                        order_count = int(str(orders).replace("+", "").replace("k", "000").replace("K", "000"))
+                        trend_score += min(order_count // 100, 50)
+                    except:
+                        pass
             
-            rows.append({
-                "product_title": title,
-                "product_url": link,
-                "price": price,
-                "rating": rating,
-                "reviews": reviews,
-                "orders": orders,
-                "trend_score": trend_score,
-                "country": "Iceland",
-                "marketplace": "AliExpress",
-                "market_type": market_type,
-                "category": "Inferred from Query"
-            })
-            
-        time.sleep(1)  # Polite delay between queries
+                sink.write({
+                    "product_title": title,
+                    "product_url": link,
+                    "price": price,
+                    "rating": rating,
+                    "reviews": reviews,
+                    "orders": orders,
+                    "trend_score": trend_score,
+                    "country": "Iceland",
+                    "marketplace": "AliExpress",
+                    "market_type": market_type,
+                    "category": "Inferred from Query"
+                })
+
+            sink.flush(query=q)  # durable per query
 
-    df = pd.DataFrame(rows)
-    if not df.empty:
-        df.to_csv(OUTPUT_CSV, index=False)
-        df.to_json(OUTPUT_JSON, orient="records")
-        logger.info(f"AliExpress scraper completed | records: {len(df)}")
+        # Compact the NDJSON sink into the CSV/JSON that pipeline.py reads
+        record_count = sink.compact(OUTPUT_CSV, OUTPUT_JSON)
+    if record_count:
+        logger.info(f"AliExpress scraper completed | records: {record_count}")
     else:
         logger.warning("AliExpress scraper completed but found NO records.")
 
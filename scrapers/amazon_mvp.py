@@ -1,9 +1,6 @@
 import os
 import sys
 import argparse
-import pandas as pd
-import requests
-import time
 import random
 
 from dotenv import load_dotenv
@@ -14,6 +11,8 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from logger import logger
 from query_config import get_amazon_queries
 from country_config import COUNTRIES
+from record_sink import RecordSink
+from resilience import resilient_get, CircuitOpenError, SERPAPI_TRANSIENT_STATUSES
 
 # Load environment variables from scrapers/.env
 load_dotenv(os.path.join(os.path.dirname(__file__), '.env'))
@@ -42,7 +41,13 @@ def fetch_serpapi_results(query, domain="amazon.com"):
         
         try:
             logger.info(f"Fetching '{query}' on {domain} via SerpApi (Key: ...{api_key[-4:]})")
-            response = requests.get("https://serpapi.com/search.json", params=params, timeout=10)
+            response = resilient_get(
+                "serpapi",
+                "https://serpapi.com/search.json",
+                params=params,
+                timeout=10,
+                retry_statuses=SERPAPI_TRANSIENT_STATUSES,
+            )
             
             if response.status_code == 200:
                 data = response.json()
@@ -56,6 +61,9 @@ def fetch_serpapi_results(query, domain="amazon.com"):
             else:
                  logger.error(f"SerpApi HTTP Error: {response.status_code}")
                  
+        except CircuitOpenError as e:
+            logger.warning(f"SerpApi unavailable, skipping '{query}': {e}")
+            return []
         except Exception as e:
             logger.error(f"Request Exception: {e}")
             
@@ -70,8 +78,6 @@ def run_amazon_scraper(queries=None):
         logger.warning("No queries provided.")
         return
 
-    rows = []
-    
     # Focus only on Iceland as the main market
     iceland_config = COUNTRIES.get("Iceland")
     if not iceland_config:
@@ -83,62 +89,63 @@ def run_amazon_scraper(queries=None):
     
     logger.info(f"--- Processing Iceland ({domain}) ---")
     
-    for q in user_queries:
-            results = fetch_serpapi_results(q, domain=domain)
+    with RecordSink("amazon") as sink:
+        for q in user_queries:
+                results = fetch_serpapi_results(q, domain=domain)
             
-            if not results:
-                 logger.warning(f"No results found for '{q}' in Iceland")
-                 continue
+                if not results:
+                     logger.warning(f"No results found for '{q}' in Iceland")
+                     sink.flush(query=q)  # still report the query to job progress
+                     continue
             
-            # Limit to max 10 products per query
-            results = results[:10]
+                # Limit to max 10 products per query
+                results = results[:10]
                  
-            for i, item in enumerate(results):
-                title = item.get("title", "N/A")
-                link = item.get("link", "")
+                for i, item in enumerate(results):
+                    title = item.get("title", "N/A")
+                    link = item.get("link", "")
                 
-                # Ensure absolute URL
-                if link.startswith("/"):
-                    url = f"https://www.{domain}{link}"
-                else:
-                    url = link
+                    # Ensure absolute URL
+                    if link.startswith("/"):
+                        url = f"https://www.{domain}{link}"
+                    else:
+                        url = link
 
-                price_data = item.get("price")
-                price = None
-                if isinstance(price_data, dict):
-                    price = price_data.get("value") # Extract numeric value if available
-                elif isinstance(price_data, (str, float, int)):
-                    price = price_data
+                    price_data = item.get("price")
+                    price = None
+                    if isinstance(price_data, dict):
+                        price = price_data.get("value") # Extract numeric value if available
+                    elif isinstance(price_data, (str, float, int)):
+                        price = price_data
                 
-                rating = item.get("rating")
+                    rating = item.get("rating")
                 
-                # Simple trend score based on rank
-                trend_score = max(1, 100 - i * 5)
+                    # Simple trend score based on rank
+                    trend_score = max(1, 100 - i * 5)
                 
-                rows.append({
-                    "product_title": title,
-                    "product_url": url,
-                    "price": price,
-                    "rating": rating,
-                    "trend_score": trend_score,
-                    "country": "Iceland",
-                    "amazon_market_type": market_type,
-                    "category": "Inferred from Query"
-                })
-                
-            time.sleep(1) # Polite delay between queries per country
+                    sink.write({
+                        "product_title": title,
+                        "product_url": url,
+                        "price": price,
+                        "rating": rating,
+                        "trend_score": trend_score,
+                        "country": "Iceland",
+                        "amazon_market_type": market_type,
+                        "category": "Inferred from Query"
+                    })
+
+                sink.flush(query=q)  # durable per query
 
-    def process_regional_countries(rows):
-        # Optional: For regional countries, mapped to a local domain, we could duplicate
-        # the local data or just let the dashboard handle it.
-        # For now, we only save the scraped "local" data.
-        pass
+        def process_regional_countries(rows):
+            # Optional: For regional countries, mapped to a local domain, we could duplicate
+            # the local data or just let the dashboard handle it.
+            # For now, we only save the scraped "local" data.
+            pass
 
-    df = pd.DataFrame(rows)
-    if not df.empty:
-        df.to_csv(OUTPUT_CSV, index=False)
-        df.to_json(OUTPUT_JSON, orient="records")
-        logger.info(f"Amazon scraper completed | records: {len(df)}")
+        # Compact the NDJSON sink into the CSV/JSON that pipeline.py reads
+        record_count = sink.compact(OUTPUT_CSV, OUTPUT_JSON)
+    if record_count:
+        logger.info(f"Amazon scraper completed | records: {record_count}")
     else:
         logger.warning("Amazon scraper completed but found NO records.")
 
@@ -1,9 +1,6 @@
 import os
 import sys
 import argparse
-import pandas as pd
-import requests
-import time
 
 from dotenv import load_dotenv
 
@@ -13,6 +10,8 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from logger import logger
 from query_config import get_amazon_queries  # Reuse same query config
 from country_config import COUNTRIES
+from record_sink import RecordSink
+from resilience import resilient_get, CircuitOpenError, SERPAPI_TRANSIENT_STATUSES
 
 # Load environment variables from scrapers/.env
 load_dotenv(os.path.join(os.path.dirname(__file__), '.env'))
@@ -41,7 +40,13 @@ def fetch_serpapi_ebay_results(query, ebay_domain="ebay.co.uk"):
         
         try:
             logger.info(f"Fetching '{query}' on {ebay_domain} via SerpApi (Key: ...{api_key[-4:]})")
-            response = requests.get("https://serpapi.com/search.json", params=params, timeout=10)
+            response = resilient_get(
+                "serpapi",
+                "https://serpapi.com/search.json",
+                params=params,
+                timeout=10,
+                retry_statuses=SERPAPI_TRANSIENT_STATUSES,
+            )
             
             if response.status_code == 200:
                 data = response.json()
@@ -55,6 +60,9 @@ def fetch_serpapi_ebay_results(query, ebay_domain="ebay.co.uk"):
             else:
                  logger.error(f"SerpApi HTTP Error: {response.status_code}")
                  
+        except CircuitOpenError as e:
+            logger.warning(f"SerpApi unavailable, skipping '{query}': {e}")
+            return []
         except Exception as e:
             logger.error(f"Request Exception: {e}")
             
@@ -69,8 +77,6 @@ def run_ebay_scraper(queries=None):
         logger.warning("No queries provided.")
         return
 
-    rows = []
-    
     # Focus only on Iceland as the main market
     iceland_config = COUNTRIES.get("Iceland")
     if not iceland_config:
@@ -82,53 +88,54 @@ def run_ebay_scraper(queries=None):
     
     logger.info(f"--- Processing Iceland ({ebay_domain}) ---")
     
-    for q in user_queries:
-        results = fetch_serpapi_ebay_results(q, ebay_domain=ebay_domain)
+    with RecordSink("ebay") as sink:
+        for q in user_queries:
+            results = fetch_serpapi_ebay_results(q, ebay_domain=ebay_domain)
         
-        if not results:
-             logger.warning(f"No results found for '{q}' on eBay Iceland")
-             continue
+            if not results:
+                 logger.warning(f"No results found for '{q}' on eBay Iceland")
+                 sink.flush(query=q)  # still report the query to job progress
+                 continue
         
-        # Limit to max 10 products per query
-        results = results[:10]
+            # Limit to max 10 products per query
+            results = results[:10]
              
-        for i, item in enumerate(results):
-            title = item.get("title", "N/A")
-            link = item.get("link", "")
+            for i, item in enumerate(results):
+                title = item.get("title", "N/A")
+                link = item.get("link", "")
             
-            # eBay pricing can be in different formats
-            price_data = item.get("price")
-            price = None
-            if isinstance(price_data, dict):
-                price = price_data.get("raw") or price_data.get("value")
-            elif isinstance(price_data, (str, float, int)):
-                price = price_data
+                # eBay pricing can be in different formats
+                price_data = item.get("price")
+                price = None
+                if isinstance(price_data, dict):
+                    price = price_data.get("raw") or price_data.get("value")
+                elif isinstance(price_data, (str, float, int)):
+                    price = price_data
             
-            # eBay may have condition (new, used, etc.)
-            condition = item.get("condition", "")
+                # eBay may have condition (new, used, etc.)
+                condition = item.get("condition", "")
             
-            # Simple trend score based on rank
-            trend_score = max(1, 100 - i * 5)
+                # Simple trend score based on rank
+                trend_score = max(1, 100 - i * 5)
             
-            rows.append({
-                "product_title": title,
-                "product_url": link,
-                "price": price,
-                "condition": condition,
-                "trend_score": trend_score,
-                "country": "Iceland",
-                "marketplace": "eBay",
-                "market_type": market_type,
-                "category": "Inferred from Query"
-            })
-            
-        time.sleep(1)  # Polite delay between queries
+                sink.write({
+                    "product_title": title,
+                    "product_url": link,
+                    "price": price,
+                    "condition": condition,
+                    "trend_score": trend_score,
+                    "country": "Iceland",
+                    "marketplace": "eBay",
+                    "market_type": market_type,
+                    "category": "Inferred from Query"
+                })
+
+            sink.flush(query=q)  # durable per query
 
-    df = pd.DataFrame(rows)
-    if not df.empty:
-        df.to_csv(OUTPUT_CSV, index=False)
-        df.to_json(OUTPUT_JSON, orient="records")
-        logger.info(f"eBay scraper completed | records: {len(df)}")
+        # Compact the NDJSON sink into the CSV/JSON that pipeline.py reads
+        record_count = sink.compact(OUTPUT_CSV, OUTPUT_JSON)
+    if record_count:
+        logger.info(f"eBay scraper completed | records: {record_count}")
     else:
         logger.warning("eBay scraper completed but found NO records.")
 
@@ -1,9 +1,7 @@
 import os
 import sys
 import argparse
-import pandas as pd
-import requests
-import time
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 # Add project root to path
@@ -12,6 +10,8 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from logger import logger
 from query_config import get_amazon_queries  # Reuse same query config
 from country_config import COUNTRIES
+from record_sink import RecordSink
+from resilience import resilient_get
 
 # Load environment variables from scrapers/.env
 load_dotenv(os.path.join(os.path.dirname(__file__), '.env'))
@@ -23,55 +23,108 @@ ETSY_SHARED_SECRET = os.getenv("ETSY_SHARED_SECRET")
 OUTPUT_CSV = "outputs/etsy_trending.csv"
 OUTPUT_JSON = "outputs/etsy_trending.json"
 
-def fetch_etsy_listings(query, limit=10):
-    """Fetch Etsy listings using official Etsy API v3."""
-    
-    if not ETSY_API_KEY:
-        logger.error("ETSY_API_KEY not found in environment variables!")
-        return []
-    
-    # Etsy API v3 endpoint for searching listings
-    url = "https://openapi.etsy.com/v3/public/listings/active"
-    
+PAGE_SIZE = 100  # Etsy v3 maximum per request
+MAX_PAGES_PER_QUERY = int(os.getenv("ETSY_MAX_PAGES", "3"))
+PAGE_WORKERS = 4  # concurrent page requests; all draw from the shared "etsy" token bucket
+HYDRATE_BATCH_SIZE = 100  # listing_ids per /listings/batch call
+HYDRATE_LISTINGS = os.getenv("ETSY_HYDRATE", "1").lower() in ("1", "true", "yes")
+
+def _etsy_get(url, params, what):
+    """GET with the shared Etsy handling; returns parsed JSON or None."""
     headers = {
         "x-api-key": ETSY_API_KEY,
     }
-    
-    params = {
-        "keywords": query,
-        "limit": limit,
-        "sort_on": "score",  # Sort by relevance
-        "sort_order": "desc"
-    }
-    
     try:
-        logger.info(f"Fetching '{query}' from Etsy API v3")
-        response = requests.get(url, headers=headers, params=params, timeout=10)
-        
+        # 429s are retried after the Retry-After pause; timeouts/5xx with backoff
+        response = resilient_get("etsy", url, headers=headers, params=params, timeout=10)
+
         if response.status_code == 200:
-            data = response.json()
-            results = data.get("results", [])
-            logger.info(f"Found {len(results)} results for '{query}'")
-            return results
+            return response.json()
         elif response.status_code == 401:
             logger.error(f"Etsy API authentication failed. Check your API key.")
-            return []
         elif response.status_code == 403:
             logger.error(f"Etsy API access forbidden. You may need commercial access.")
-            return []
         elif response.status_code == 429:
-            logger.warning(f"Etsy API rate limit exceeded. Waiting...")
-            time.sleep(5)
-            return []
+            logger.warning(f"Etsy API rate limit still exceeded for {what} after retries.")
         else:
             logger.error(f"Etsy API HTTP Error: {response.status_code} - {response.text}")
-            return []
-            
     except Exception as e:
         logger.error(f"Etsy API Request Exception: {e}")
+    return None
+
+def fetch_etsy_page(query, offset=0, limit=PAGE_SIZE):
+    """One offset page of active listings. Returns (results, total match count)."""
+    # Etsy API v3 endpoint for searching listings
+    url = "https://openapi.etsy.com/v3/public/listings/active"
+    params = {
+        "keywords": query,
+        "limit": limit,
+        "offset": offset,
+        "sort_on": "score",  # Sort by relevance
+        "sort_order": "desc"
+    }
+    data = _etsy_get(url, params, f"'{query}' offset {offset}")
+    if not data:
+        return [], 0
+    return data.get("results", []), data.get("count", 0)
+
+def fetch_etsy_listings(query, limit=PAGE_SIZE, max_pages=MAX_PAGES_PER_QUERY):
+    """
+    Fetch up to max_pages offset pages for a query using Etsy API v3.
+    The first page gives the total count; the remaining pages go out concurrently.
+    A page that still fails after retries is skipped, the rest of the query is kept.
+    """
+    if not ETSY_API_KEY:
+        logger.error("ETSY_API_KEY not found in environment variables!")
         return []
 
-def run_etsy_scraper(queries=None):
+    logger.info(f"Fetching '{query}' from Etsy API v3")
+    results, total = fetch_etsy_page(query, 0, limit)
+
+    offsets = [page * limit for page in range(1, max_pages) if page * limit < total] if len(results) == limit else []
+    if offsets:
+        with ThreadPoolExecutor(max_workers=PAGE_WORKERS) as pool:
+            for page_results in pool.map(lambda offset: fetch_etsy_page(query, offset, limit)[0], offsets):
+                results.extend(page_results)
+
+    # Offset pages can shift while we read them; keep the first (best ranked) copy
+    seen = set()
+    unique = []
+    for item in results:
+        listing_id = item.get("listing_id")
+        if listing_id in seen:
+            continue
+        seen.add(listing_id)
+        unique.append(item)
+
+    logger.info(f"Found {len(unique)} results for '{query}' ({1 + len(offsets)} pages, {total} matches)")
+    return unique
+
+def hydrate_listings(results):
+    """Add shop name and primary image via /listings/batch, up to 100 listing ids per call."""
+    url = "https://openapi.etsy.com/v3/application/listings/batch"
+    ids = [item["listing_id"] for item in results if item.get("listing_id")]
+    details = {}
+    for start in range(0, len(ids), HYDRATE_BATCH_SIZE):
+        batch = ids[start:start + HYDRATE_BATCH_SIZE]
+        params = {"listing_ids": ",".join(str(i) for i in batch), "includes": "Shop,Images"}
+        data = _etsy_get(url, params, f"batch of {len(batch)} listings")
+        for listing in (data or {}).get("results", []):
+            details[listing.get("listing_id")] = listing
+
+    for item in results:
+        listing = details.get(item.get("listing_id"))
+        if not listing:
+            continue
+        images = listing.get("images") or []
+        item["shop_name"] = (listing.get("shop") or {}).get("shop_name")
+        item["image_url"] = images[0].get("url_570xN") if images else None
+
+def rank_score(rank, result_count):
+    """1-100 relevance score for a 0-based rank, spread over however many results came back."""
+    return max(1, round(100 * (1 - rank / max(result_count, 1))))
+
+def run_etsy_scraper(queries=None, max_pages=MAX_PAGES_PER_QUERY):
     logger.info("Etsy scraper started (Official API v3)")
     
     if not ETSY_API_KEY:
@@ -83,8 +136,6 @@ def run_etsy_scraper(queries=None):
         logger.warning("No queries provided.")
         return
 
-    rows = []
-    
     # Focus only on Iceland as the main market
     iceland_config = COUNTRIES.get("Iceland")
     if not iceland_config:
@@ -95,66 +146,73 @@ def run_etsy_scraper(queries=None):
     
     logger.info(f"--- Processing Etsy (Global marketplace) ---")
     
-    for q in user_queries:
-        results = fetch_etsy_listings(q, limit=10)
-        
-        if not results:
-             logger.warning(f"No results found for '{q}' on Etsy")
-             continue
-             
-        for i, item in enumerate(results):
-            # Extract listing details
-            listing_id = item.get("listing_id")
-            title = item.get("title", "N/A")
-            
-            # Build product URL
-            url = f"https://www.etsy.com/listing/{listing_id}"
-            
-            # Price information
-            price_data = item.get("price")
-            price = None
-            if price_data:
-                # Price is in format like {"amount": 2500, "divisor": 100, "currency_code": "USD"}
-                amount = price_data.get("amount", 0)
-                divisor = price_data.get("divisor", 100)
-                currency = price_data.get("currency_code", "USD")
-                price = f"{currency} {amount / divisor:.2f}"
-            
-            # Shop information
-            shop_id = item.get("shop_id")
-            
-            # Number of favorers (popularity indicator)
-            num_favorers = item.get("num_favorers", 0)
+    with RecordSink("etsy") as sink:
+        for q in user_queries:
+            results = fetch_etsy_listings(q, max_pages=max_pages)
             
-            # Simple trend score based on rank and popularity
-            trend_score = max(1, 100 - i * 5) + min(num_favorers // 10, 50)
-            
-            rows.append({
-                "product_title": title,
-                "product_url": url,
-                "price": price,
-                "shop_id": shop_id,
-                "num_favorers": num_favorers,
-                "trend_score": trend_score,
-                "country": "Iceland",
-                "marketplace": "Etsy",
-                "market_type": market_type,
-                "category": "Inferred from Query"
-            })
-            
-        time.sleep(1)  # Polite delay between queries
+            if not results:
+                 logger.warning(f"No results found for '{q}' on Etsy")
+                 sink.flush(query=q)  # still report the query to job progress
+                 continue
+
+            if HYDRATE_LISTINGS:
+                hydrate_listings(results)
+                 
+            for i, item in enumerate(results):
+                # Extract listing details
+                listing_id = item.get("listing_id")
+                title = item.get("title", "N/A")
+                
+                # Build product URL
+                url = f"https://www.etsy.com/listing/{listing_id}"
+                
+                # Price information
+                price_data = item.get("price")
+                price = None
+                if price_data:
+                    # Price is in format like {"amount": 2500, "divisor": 100, "currency_code": "USD"}
+                    amount = price_data.get("amount", 0)
+                    divisor = price_data.get("divisor", 100)
+                    currency = price_data.get("currency_code", "USD")
+                    price = f"{currency} {amount / divisor:.2f}"
+                
+                # Shop information
+                shop_id = item.get("shop_id")
+                
+                # Number of favorers (popularity indicator)
+                num_favorers = item.get("num_favorers", 0)
+                
+                # Simple trend score based on rank and popularity
+                trend_score = rank_score(i, len(results)) + min(num_favorers // 10, 50)
+                
+                sink.write({
+                    "product_title": title,
+                    "product_url": url,
+                    "price": price,
+                    "shop_id": shop_id,
+                    "shop_name": item.get("shop_name"),
+                    "image_url": item.get("image_url"),
+                    "num_favorers": num_favorers,
+                    "trend_score": trend_score,
+                    "country": "Iceland",
+                    "marketplace": "Etsy",
+                    "market_type": market_type,
+                    "category": "Inferred from Query"
+                })
 
-    df = pd.DataFrame(rows)
-    if not df.empty:
-        df.to_csv(OUTPUT_CSV, index=False)
-        df.to_json(OUTPUT_JSON, orient="records")
-        logger.info(f"Etsy scraper completed | records: {len(df)}")
+            sink.flush(query=q)  # durable per query
+
+        # Compact the NDJSON sink into the CSV/JSON that pipeline.py reads
+        record_count = sink.compact(OUTPUT_CSV, OUTPUT_JSON)
+    if record_count:
+        logger.info(f"Etsy scraper completed | records: {record_count}")
     else:
         logger.warning("Etsy scraper completed but found NO records.")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Scrape Etsy trending products")
     parser.add_argument("--queries", nargs="+", help="Custom search queries")
+    parser.add_argument("--max-pages", type=int, default=MAX_PAGES_PER_QUERY, help=f"Offset pages of {PAGE_SIZE} per query")
     args = parser.parse_args()
-    
-    run_etsy_scraper(queries=args.queries)
+
+    run_etsy_scraper(queries=args.queries, max_pages=args.max_pages)
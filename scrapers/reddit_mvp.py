@@ -1,18 +1,20 @@
 import sys
 import os
+import re
 import argparse
-import requests
-from bs4 import BeautifulSoup
-import pandas as pd
+import heapq
+from bs4 import BeautifulSoup, SoupStrainer
 from datetime import datetime, timedelta
-from collections import defaultdict
-import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from logger import logger
 from country_config import COUNTRIES
 from query_config import get_reddit_subreddits
+from record_sink import RecordSink
+from resilience import resilient_get
 
 # -----------------------------
 # CONFIG
@@ -20,7 +22,16 @@ from query_config import get_reddit_subreddits
 
 CUTOFF_DAYS = 24
 MAX_RESULTS_PER_COUNTRY = 5
-REQUEST_SLEEP = 2  # seconds (rate-limit safe)
+MAX_PAGES_PER_SUB = 4  # 25 posts per old.reddit page; follows after= cursors up to this depth
+SUBREDDIT_WORKERS = 4  # subreddits scraped concurrently (all share the "reddit" token bucket)
+PAGE_SIZE = 25
+JSON_PAGE_SIZE = 100  # .json listings accept limit up to 100, so the same depth costs fewer requests
+
+# html     - full BeautifulSoup parse of the old.reddit page (original path)
+# strained - BeautifulSoup restricted to div.thing subtrees via SoupStrainer
+# json     - the listing's .json endpoint; no HTML parsing at all
+INGEST_MODES = ("html", "strained", "json")
+REDDIT_INGEST_MODE = os.getenv("REDDIT_INGEST_MODE", "html").lower()
 
 HEADERS = {
     "User-Agent": "trend-intelligence/1.0"
@@ -47,126 +58,332 @@ def build_country_keywords():
 
 COUNTRY_KEYWORDS = build_country_keywords()
 
-cutoff_date = datetime.utcnow() - timedelta(days=CUTOFF_DAYS)
+RELEVANCE_BOOST = 5  # per country keyword found in a title
 
-# -----------------------------
-# MAIN SCRAPER
-# -----------------------------
 
-def run_reddit_scraper(subreddits=None):
-    subreddits_config = get_reddit_subreddits(subreddits)
-    logger.info("Reddit scraper started (global scrape + country relevance layer)")
-
-    global_posts = []
-    seen_posts = set()
+def build_keyword_matcher(country_keywords):
+    """
+    One regex for every country keyword. The lookahead reports the longest
+    keyword starting at each position; `implied` adds the keywords contained in
+    it (e.g. "indi" inside "india"), so the found set equals a per-keyword `in`
+    check. `credits` keeps duplicates so a keyword listed twice counts twice.
+    """
+    credits = defaultdict(Counter)
+    for country, kws in country_keywords.items():
+        for kw in kws:
+            credits[kw][country] += 1
+    keywords = sorted(credits, key=len, reverse=True)
+    pattern = re.compile("(?=(" + "|".join(re.escape(kw) for kw in keywords) + "))")
+    implied = {kw: [other for other in keywords if other in kw] for kw in keywords}
+    return pattern, implied, credits
 
-    # -------- STEP 1: Global scrape (ONCE per subreddit) --------
-    for vertical, subs in subreddits_config.items():
-        for sub in subs:
-            try:
-                logger.info(f"Reddit | Global scrape | {sub}")
-                url = f"https://old.reddit.com/r/{sub}/top/?t=month"
-                res = requests.get(url, headers=HEADERS, timeout=15)
-                res.raise_for_status()
 
-                soup = BeautifulSoup(res.text, "html.parser")
+KEYWORD_PATTERN, KEYWORD_IMPLIED, KEYWORD_CREDITS = build_keyword_matcher(COUNTRY_KEYWORDS)
 
-                for post in soup.select("div.thing"):
-                    post_id = post.get("data-fullname")
-                    if not post_id or post_id in seen_posts:
-                        continue
 
-                    title_tag = post.select_one("a.title")
-                    if not title_tag:
-                        continue
+def country_boosts(title_lower):
+    """Sparse {country: boost} for one title; countries with no match are absent."""
+    found = set()
+    for match in KEYWORD_PATTERN.finditer(title_lower):
+        found.update(KEYWORD_IMPLIED[match.group(1)])
+    boosts = Counter()
+    for kw in found:
+        for country, times in KEYWORD_CREDITS[kw].items():
+            boosts[country] += RELEVANCE_BOOST * times
+    return boosts
 
-                    created_ts = post.get("data-timestamp")
-                    if not created_ts:
-                        continue
+cutoff_date = datetime.utcnow() - timedelta(days=CUTOFF_DAYS)
 
-                    created = datetime.utcfromtimestamp(int(created_ts) / 1000)
-                    if created < cutoff_date:
-                        continue
+NEXT_CURSOR_RE = re.compile(r'<span class="next-button"><a[^>]*href="[^"]*[?&;]after=([^"&]+)')
 
-                    upvotes = int(post.get("data-score", 0))
-                    comments = int(post.get("data-comments-count", 0))
-                    permalink = post.get("data-permalink", "")
+# -----------------------------
+# LISTING FETCH + PARSE
+# -----------------------------
 
-                    trend_score = upvotes + (comments * 2)
+def fetch_listing_page(sub, after=None, count=0):
+    """Download one old.reddit top-of-month listing page."""
+    params = {"t": "month"}
+    if after:
+        params.update({"after": after, "count": count})
+    res = resilient_get("reddit", f"https://old.reddit.com/r/{sub}/top/", params=params, headers=HEADERS, timeout=15)
+    res.raise_for_status()
+    return res.text
+
+
+def extract_next_cursor(html):
+    """Cheaply pull the after= cursor so the next page can be requested before parsing."""
+    match = NEXT_CURSOR_RE.search(html)
+    return match.group(1) if match else None
+
+
+def fetch_listing_json(sub, after=None, count=0):
+    """Download one top-of-month listing from the .json endpoint."""
+    params = {"t": "month", "limit": JSON_PAGE_SIZE, "raw_json": 1}
+    if after:
+        params.update({"after": after, "count": count})
+    res = resilient_get("reddit", f"https://old.reddit.com/r/{sub}/top/.json", params=params, headers=HEADERS, timeout=15)
+    res.raise_for_status()
+    return res.json()
+
+
+def json_next_cursor(payload):
+    return (payload.get("data") or {}).get("after")
+
+
+def build_post(post_id, title, created_ms, upvotes, comments, permalink):
+    """Shared post shape for every ingest mode; None when outside CUTOFF_DAYS."""
+    created = datetime.utcfromtimestamp(int(created_ms) / 1000)
+    if created < cutoff_date:
+        return None
+    return {
+        "post_id": post_id,
+        "title": title.strip(),
+        "upvotes": upvotes,
+        "comments": comments,
+        "post_url": "https://reddit.com" + permalink,
+        "base_score": upvotes + (comments * 2)
+    }
+
+
+# Keyed on data-fullname rather than class_: strainers see the raw multi-valued class string
+THING_STRAINER = SoupStrainer("div", attrs={"data-fullname": True})
+
+
+def parse_listing_page(html, strained=False):
+    """
+    Parse the div.thing posts of a listing page.
+    Returns (posts, any_recent) where posts are already cutoff-filtered.
+    strained=True only builds the post subtrees instead of the whole page.
+    """
+    if strained:
+        soup = BeautifulSoup(html, "html.parser", parse_only=THING_STRAINER)
+    else:
+        soup = BeautifulSoup(html, "html.parser")
+    posts = []
+    any_recent = False
+
+    for post in soup.select("div.thing"):
+        post_id = post.get("data-fullname")
+        if not post_id:
+            continue
+
+        title_tag = post.select_one("a.title")
+        if not title_tag:
+            continue
+
+        created_ts = post.get("data-timestamp")
+        if not created_ts:
+            continue
+
+        parsed = build_post(
+            post_id,
+            title_tag.text,
+            created_ts,
+            int(post.get("data-score", 0)),
+            int(post.get("data-comments-count", 0)),
+            post.get("data-permalink", ""),
+        )
+        if parsed is None:
+            continue
+        any_recent = True
+        posts.append(parsed)
+
+    return posts, any_recent
+
+
+def parse_listing_strained(html):
+    return parse_listing_page(html, strained=True)
+
+
+def parse_listing_json(payload):
+    """Same output as parse_listing_page, read straight from the listing JSON."""
+    posts = []
+    any_recent = False
+
+    for child in (payload.get("data") or {}).get("children", []):
+        data = child.get("data") or {}
+        post_id = data.get("name")
+        created_utc = data.get("created_utc")
+        if not post_id or not data.get("title") or created_utc is None:
+            continue
+
+        parsed = build_post(
+            post_id,
+            data["title"],
+            created_utc * 1000,
+            int(data.get("score", 0)),
+            int(data.get("num_comments", 0)),
+            data.get("permalink", ""),
+        )
+        if parsed is None:
+            continue
+        any_recent = True
+        posts.append(parsed)
+
+    return posts, any_recent
+
+
+# mode -> (fetch, next cursor, parse, page size used for count=)
+INGESTERS = {
+    "html": (fetch_listing_page, extract_next_cursor, parse_listing_page, PAGE_SIZE),
+    "strained": (fetch_listing_page, extract_next_cursor, parse_listing_strained, PAGE_SIZE),
+    "json": (fetch_listing_json, json_next_cursor, parse_listing_json, JSON_PAGE_SIZE),
+}
 
-                    global_posts.append({
-                        "title": title_tag.text.strip(),
-                        "vertical": vertical,
-                        "subreddit": sub,
-                        "upvotes": upvotes,
-                        "comments": comments,
-                        "post_url": "https://reddit.com" + permalink,
-                        "base_score": trend_score
-                    })
 
-                    seen_posts.add(post_id)
+def scrape_subreddit(sub, page_pool, max_pages=MAX_PAGES_PER_SUB, mode=None):
+    """
+    Follow after= cursors up to max_pages. The next page is requested as soon
+    as its cursor is known, so downloading page N+1 overlaps parsing page N.
+    Stops early once a whole page falls outside CUTOFF_DAYS.
+    """
+    fetch, next_cursor, parse, page_size = INGESTERS[mode or REDDIT_INGEST_MODE]
+    # max_pages counts 25-post pages; larger JSON pages cover the same depth in fewer requests
+    max_pages = max(1, -(-max_pages * PAGE_SIZE // page_size))
+    posts = []
+    pending = page_pool.submit(fetch, sub)
+    for page in range(max_pages):
+        body = pending.result()
+        pending = None
+
+        after = next_cursor(body)
+        if after and page + 1 < max_pages:
+            pending = page_pool.submit(fetch, sub, after, (page + 1) * page_size)
+
+        page_posts, any_recent = parse(body)
+        posts.extend(page_posts)
+
+        if pending is None or not any_recent:
+            if pending is not None:
+                pending.cancel()
+            break
+
+    logger.info(f"Reddit | Global scrape | {sub} | pages: {page + 1} | posts: {len(posts)}")
+    return posts
 
-                time.sleep(REQUEST_SLEEP)
+# -----------------------------
+# COUNTRY RELEVANCE + TOP-N
+# -----------------------------
 
-            except Exception as e:
-                logger.warning(f"Reddit failed | {sub} | {e}")
+def select_country_top_posts(global_posts, max_results=MAX_RESULTS_PER_COUNTRY):
+    """
+    Top max_results posts per (country, vertical) by base_score + relevance boost.
+
+    Titles are scanned once into a sparse boost map. An unboosted post can only
+    make a country's top-N if it is already in the vertical's top-N by
+    base_score, so each country only ranks those plus its own boosted posts.
+    Ties keep collection order, as the previous stable sort did.
+    """
+    boosts = [country_boosts(post["title"].lower()) for post in global_posts]
+
+    by_vertical = defaultdict(list)
+    boosted = defaultdict(lambda: defaultdict(list))  # country -> vertical -> post indices
+    for i, post in enumerate(global_posts):
+        by_vertical[post["vertical"]].append(i)
+        for country in boosts[i]:
+            boosted[country][post["vertical"]].append(i)
+
+    base_top = {
+        vertical: heapq.nlargest(max_results, indices, key=lambda i: (global_posts[i]["base_score"], -i))
+        for vertical, indices in by_vertical.items()
+    }
 
-    logger.info(f"Global Reddit posts collected: {len(global_posts)}")
+    final_rows = []
+    for country in COUNTRIES.keys():
+        for vertical, top_base in base_top.items():
+            candidates = set(top_base).union(boosted[country].get(vertical, ()))
+            top = heapq.nlargest(
+                max_results,
+                candidates,
+                key=lambda i: (global_posts[i]["base_score"] + boosts[i].get(country, 0), -i),
+            )
+            for i in top:
+                post = global_posts[i]
+                final_rows.append({
+                    "title": post["title"],
+                    "vertical": post["vertical"],
+                    "subreddit": post["subreddit"],
+                    "upvotes": post["upvotes"],
+                    "comments": post["comments"],
+                    "post_url": post["post_url"],
+                    "trend_score": post["base_score"] + boosts[i].get(country, 0),
+                    "country": country
+                })
+
+    return final_rows
 
-    # -------- STEP 2: Country relevance scoring --------
-    country_buckets = defaultdict(list)
+# -----------------------------
+# MAIN SCRAPER
+# -----------------------------
 
-    for post in global_posts:
-        title_lower = post["title"].lower()
+def run_reddit_scraper(subreddits=None, max_pages=MAX_PAGES_PER_SUB, mode=None):
+    subreddits_config = get_reddit_subreddits(subreddits)
+    mode = mode or REDDIT_INGEST_MODE
+    if mode not in INGESTERS:
+        raise ValueError(f"Unknown Reddit ingest mode: {mode} (expected one of {INGEST_MODES})")
+    logger.info(f"Reddit scraper started (global scrape + country relevance layer) | ingest: {mode}")
 
-        for country in COUNTRIES.keys():
-            relevance_boost = 0
-            for kw in COUNTRY_KEYWORDS[country]:
-                if kw in title_lower:
-                    relevance_boost += 5
-
-            adjusted_score = post["base_score"] + relevance_boost
-
-            country_buckets[country].append({
-                "title": post["title"],
-                "vertical": post["vertical"],
-                "subreddit": post["subreddit"],
-                "upvotes": post["upvotes"],
-                "comments": post["comments"],
-                "post_url": post["post_url"],
-                "trend_score": adjusted_score,
-                "country": country
-            })
-
-    # -------- STEP 3: Top-N selection per country --------
-    final_rows = []
+    global_posts = []
+    seen_posts = set()
 
-    for country, posts in country_buckets.items():
-        grouped = defaultdict(list)
+    # -------- STEP 1: Global scrape (ONCE per subreddit, subreddits in parallel) --------
+    targets = [(vertical, sub) for vertical, subs in subreddits_config.items() for sub in subs]
+    with ThreadPoolExecutor(max_workers=SUBREDDIT_WORKERS) as sub_pool, \
+            ThreadPoolExecutor(max_workers=SUBREDDIT_WORKERS * 2) as page_pool:
+        futures = [(vertical, sub, sub_pool.submit(scrape_subreddit, sub, page_pool, max_pages, mode)) for vertical, sub in targets]
 
-        for p in posts:
-            grouped[p["vertical"]].append(p)
+        # Merge in config order so the first subreddit to see a post keeps it
+        for vertical, sub, future in futures:
+            try:
+                sub_posts = future.result()
+            except Exception as e:
+                logger.warning(f"Reddit failed | {sub} | {e}")
+                continue
+
+            for post in sub_posts:
+                post_id = post.pop("post_id")
+                if post_id in seen_posts:
+                    continue
+                seen_posts.add(post_id)
+                global_posts.append({
+                    "title": post["title"],
+                    "vertical": vertical,
+                    "subreddit": sub,
+                    "upvotes": post["upvotes"],
+                    "comments": post["comments"],
+                    "post_url": post["post_url"],
+                    "base_score": post["base_score"]
+                })
 
-        for vertical, items in grouped.items():
-            top_items = sorted(
-                items,
-                key=lambda x: x["trend_score"],
-                reverse=True
-            )[:MAX_RESULTS_PER_COUNTRY]
+    logger.info(f"Global Reddit posts collected: {len(global_posts)}")
 
-            final_rows.extend(top_items)
+    # -------- STEP 2 + 3: Country relevance and top-N per country/vertical --------
+    final_rows = select_country_top_posts(global_posts)
 
     # -------- OUTPUT --------
-    df = pd.DataFrame(final_rows)
-
-    df.to_csv(OUTPUT_CSV, index=False)
-    df.to_json(OUTPUT_JSON, orient="records")
+    # Ranking needs every subreddit first, so rows go to the sink per country afterwards
+    with RecordSink("reddit") as sink:
+        for country in COUNTRIES.keys():
+            sink.write_many(row for row in final_rows if row["country"] == country)
+            sink.flush(query=country)
+        record_count = sink.compact(OUTPUT_CSV, OUTPUT_JSON, write_empty=True)
 
-    logger.info(f"Reddit scraper completed | records saved: {len(df)}")
+    logger.info(f"Reddit scraper completed | records saved: {record_count}")
 
 # -----------------------------
 # ENTRY POINT
 # -----------------------------
 
 if __name__ == "__main__":
-    run_reddit_scraper()
+    parser = argparse.ArgumentParser(description="Reddit trend scraper")
+    parser.add_argument(
+        "--subreddits",
+        type=str,
+        default=None,
+        help='Reddit subreddits as "vertical:sub1,sub2;vertical2:sub3"',
+    )
+    parser.add_argument("--max-pages", type=int, default=MAX_PAGES_PER_SUB, help="Listing pages per subreddit")
+    parser.add_argument("--mode", choices=INGEST_MODES, default=None, help="Listing ingest path (default: REDDIT_INGEST_MODE or html)")
+    args = parser.parse_args()
+    subs = [s for s in args.subreddits.split(";") if s.strip()] if args.subreddits else None
+    run_reddit_scraper(subreddits=subs, max_pages=args.max_pages, mode=args.mode)
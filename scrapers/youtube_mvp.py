@@ -1,17 +1,19 @@
 import os
 import sys
 import argparse
-import requests
-import pandas as pd
+import json
 from datetime import datetime
 
 from dotenv import load_dotenv
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import quota_ledger
 from logger import logger
 from country_config import COUNTRIES
 from query_config import get_youtube_queries
+from record_sink import RecordSink
+from resilience import resilient_get
 
 # Load environment variables from scrapers/.env
 load_dotenv(os.path.join(os.path.dirname(__file__), '.env'))
@@ -25,6 +27,12 @@ OUTPUT_CSV = "outputs/youtube_trending.csv"
 OUTPUT_JSON = "outputs/youtube_trending.json"
 
 MAX_RESULTS = 15
+MAX_ITEMS_PER_COUNTRY = 5
+VIDEOS_BATCH_SIZE = 50  # videos.list takes up to 50 ids per call for 1 quota unit
+
+# Search is global by default, so every search-proxy region shares one result set per query.
+# Set YOUTUBE_REGION_SCOPED_SEARCH=1 to send regionCode and fetch per proxy instead.
+REGION_SCOPED_SEARCH = os.getenv("YOUTUBE_REGION_SCOPED_SEARCH", "0").lower() in ("1", "true", "yes")
 
 TRENDING_SUPPORTED = {
     "IN", "JP", "AU", "CA", "BR", "MX"
@@ -88,11 +96,21 @@ def fetch_trending_videos(region_code):
         "maxResults": MAX_RESULTS,
         "key": YOUTUBE_API_KEY
     }
-    res = requests.get(url, params=params, timeout=10)
+    # Charts change slowly: revalidate the last body with If-None-Match instead of re-downloading it
+    cache_key = f"youtube:videos.list:chart:{region_code}:{MAX_RESULTS}"
+    cached = quota_ledger.get_cached_response(cache_key)
+    headers = {"If-None-Match": cached["etag"]} if cached else None
+    res = resilient_get("youtube", url, params=params, headers=headers, timeout=10, quota_endpoint="videos.list")
+    if res.status_code == 304 and cached:
+        logger.info(f"{region_code} | trending chart unchanged (304), reusing cached body")
+        return json.loads(cached["body"]).get("items", [])
     res.raise_for_status()
+    etag = res.headers.get("ETag") or res.json().get("etag")
+    if etag:
+        quota_ledger.store_cached_response(cache_key, etag, res.text)
     return res.json().get("items", [])
 
-def fetch_search_videos(query):
+def fetch_search_videos(query, region_code=None):
     url = "https://www.googleapis.com/youtube/v3/search"
     params = {
         "part": "snippet",
@@ -101,83 +119,140 @@ def fetch_search_videos(query):
         "maxResults": MAX_RESULTS,
         "key": YOUTUBE_API_KEY
     }
-    res = requests.get(url, params=params, timeout=10)
+    if region_code:
+        params["regionCode"] = region_code
+    res = resilient_get("youtube", url, params=params, timeout=10, quota_endpoint="search.list")
     res.raise_for_status()
     return res.json().get("items", [])
 
+def fetch_video_statistics(video_ids):
+    """videos.list statistics for up to VIDEOS_BATCH_SIZE ids -> {video_id: statistics}."""
+    url = "https://www.googleapis.com/youtube/v3/videos"
+    params = {
+        "part": "statistics",
+        "id": ",".join(video_ids),
+        "maxResults": len(video_ids),
+        "key": YOUTUBE_API_KEY
+    }
+    res = resilient_get("youtube", url, params=params, timeout=10, quota_endpoint="videos.list")
+    res.raise_for_status()
+    return {item["id"]: item.get("statistics", {}) for item in res.json().get("items", [])}
+
+def video_id_of(item):
+    video_id = item.get("id")
+    if isinstance(video_id, dict):
+        video_id = video_id.get("videoId")
+    return video_id
+
+def hydrate_statistics(items, stats_cache):
+    """
+    Search results carry no statistics; fill them in place with batched
+    videos.list calls. stats_cache (video_id -> statistics) is shared across
+    proxies so a video is only looked up once per run.
+    """
+    missing = []
+    for item in items:
+        video_id = video_id_of(item)
+        if "statistics" in item or not video_id or video_id in stats_cache or video_id in missing:
+            continue
+        missing.append(video_id)
+
+    for start in range(0, len(missing), VIDEOS_BATCH_SIZE):
+        batch = missing[start:start + VIDEOS_BATCH_SIZE]
+        try:
+            stats_cache.update(fetch_video_statistics(batch))
+        except Exception as e:
+            logger.warning(f"YouTube statistics failed | {len(batch)} ids | {e}")
+
+    for item in items:
+        video_id = video_id_of(item)
+        if "statistics" not in item and video_id in stats_cache:
+            item["statistics"] = stats_cache[video_id]
+
+def select_items(items):
+    """First MAX_ITEMS_PER_COUNTRY items whose titles pass the exclusion filter."""
+    selected = []
+    for item in items:
+        if len(selected) >= MAX_ITEMS_PER_COUNTRY:
+            break
+        title_lower = item.get("snippet", {}).get("title", "").lower()
+        if any(kw in title_lower for kw in EXCLUDED_KEYWORDS):
+            continue
+        selected.append(item)
+    return selected
+
 def run_youtube_scraper(queries=None):
     logger.info("YouTube scraper started | proxy-based regional model")
 
     search_queries = get_youtube_queries(queries)
-    rows = []
     proxy_cache = {}
+    search_cache = {}  # (query, regionCode or None) -> items
+    stats_cache = {}
 
-    for country in COUNTRIES.keys():
-        proxy = PROXY_MAP.get(country)
-        if not proxy:
-            continue
-
-        if proxy not in proxy_cache:
-            try:
-                if proxy in TRENDING_SUPPORTED:
-                    logger.info(f"{proxy} | using TRENDING feed")
-                    items = fetch_trending_videos(proxy)
-                    confidence = "high"
-                else:
-                    logger.info(f"{proxy} | SEARCH proxy feed (queries: {search_queries})")
-                    items = []
-                    for q in search_queries:
-                        items.extend(fetch_search_videos(q))
-                    confidence = "medium"
-
-                proxy_cache[proxy] = (items, confidence)
-
-            except Exception as e:
-                logger.warning(f"YouTube failed | proxy={proxy} | {e}")
-                proxy_cache[proxy] = ([], "low")
-
-        items, confidence = proxy_cache[proxy]
-
-        count = 0 
-        for item in items:
-            if count >= 5: # Keep target of 5 valid items per country
-                break
-                
-            snippet = item.get("snippet", {})
-            stats = item.get("statistics", {})
-            video_id = item.get("id")
-            if isinstance(video_id, dict):
-                video_id = video_id.get("videoId")
-            
-            title = snippet.get("title", "")
-            title_lower = title.lower()
-            
-            # Filter Logic
-            if any(kw in title_lower for kw in EXCLUDED_KEYWORDS):
+    with RecordSink("youtube") as sink:
+        for country in COUNTRIES.keys():
+            proxy = PROXY_MAP.get(country)
+            if not proxy:
                 continue
-                
-            view_count = int(stats.get("viewCount", 0) or 0)
-            trend_score = view_count if view_count else max(1, 100 - count * 10) # Use 'count' for rank fallback
-
-            rows.append({
-                "video_title": title,
-                "channel": snippet.get("channelTitle"),
-                "published_at": snippet.get("publishedAt"),
-                "video_url": f"https://www.youtube.com/watch?v={video_id}" if video_id else None,
-                "trend_score": trend_score,
-                "country": country,
-                "proxy_region": proxy,
-                "signal_source": "youtube",
-                "confidence": confidence,
-                "collected_at": datetime.utcnow().isoformat()
-            })
-            count += 1
-
-    df = pd.DataFrame(rows)
-    df.to_csv(OUTPUT_CSV, index=False)
-    df.to_json(OUTPUT_JSON, orient="records")
-
-    logger.info(f"YouTube scraper completed | total records: {len(df)}")
+
+            if proxy not in proxy_cache:
+                try:
+                    if proxy in TRENDING_SUPPORTED:
+                        logger.info(f"{proxy} | using TRENDING feed")
+                        items = fetch_trending_videos(proxy)
+                        confidence = "high"
+                    else:
+                        region = proxy if REGION_SCOPED_SEARCH else None
+                        logger.info(f"{proxy} | SEARCH proxy feed (queries: {search_queries}, region scoped: {bool(region)})")
+                        items = []
+                        for q in search_queries:
+                            if (q, region) not in search_cache:
+                                search_cache[(q, region)] = fetch_search_videos(q, region)
+                            items.extend(search_cache[(q, region)])
+                            # Later queries could only add items past the per-country cap
+                            if len(select_items(items)) >= MAX_ITEMS_PER_COUNTRY:
+                                break
+                        confidence = "medium"
+
+                    # Only the kept items need view counts; trending items already have them
+                    selected = select_items(items)
+                    hydrate_statistics(selected, stats_cache)
+                    proxy_cache[proxy] = (selected, confidence)
+
+                except Exception as e:
+                    logger.warning(f"YouTube failed | proxy={proxy} | {e}")
+                    proxy_cache[proxy] = ([], "low")
+
+            items, confidence = proxy_cache[proxy]
+
+            for count, item in enumerate(items):
+                snippet = item.get("snippet", {})
+                stats = item.get("statistics", {})
+                video_id = video_id_of(item)
+                title = snippet.get("title", "")
+
+                view_count = int(stats.get("viewCount", 0) or 0)
+                trend_score = view_count if view_count else max(1, 100 - count * 10) # Use 'count' for rank fallback
+
+                sink.write({
+                    "video_title": title,
+                    "channel": snippet.get("channelTitle"),
+                    "published_at": snippet.get("publishedAt"),
+                    "video_url": f"https://www.youtube.com/watch?v={video_id}" if video_id else None,
+                    "trend_score": trend_score,
+                    "country": country,
+                    "proxy_region": proxy,
+                    "signal_source": "youtube",
+                    "confidence": confidence,
+                    "collected_at": datetime.utcnow().isoformat()
+                })
+
+            sink.flush(query=country)  # durable per country
+
+        record_count = sink.compact(OUTPUT_CSV, OUTPUT_JSON, write_empty=True)
+
+    spent = quota_ledger.usage_today("youtube")["youtube"]
+    logger.info(f"YouTube scraper completed | total records: {record_count} | quota today: {spent['units']}/{spent['budget']} units")
 
 
 if __name__ == "__main__":
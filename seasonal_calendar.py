@@ -0,0 +1,136 @@
+"""
+Compiled index over seasonal_config.json.
+
+The raw file is parsed once per (mtime, size) and festival dates once per
+load. Festivals are kept as date intervals sorted by start, per country and
+globally, so "which festivals overlap [today-7, today+180]" is a bisect
+instead of a scan with strptime on every entry.
+"""
+import json
+import os
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple, Tuple
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+SEASONAL_CONFIG_PATH = os.path.join(PROJECT_ROOT, "seasonal_config.json")
+
+DEFAULT_PAST_DAYS = 7
+DEFAULT_FUTURE_DAYS = 180
+
+
+class Festival(NamedTuple):
+    country: str
+    name: str
+    start: object  # datetime.date
+    end: object  # datetime.date
+    keywords: Tuple[str, ...]
+    raw: dict
+
+    def to_dict(self, today=None):
+        today = today or datetime.now(timezone.utc).date()
+        return {
+            "country": self.country,
+            "festival_name": self.name,
+            "expected_start_date": self.start.isoformat(),
+            "expected_end_date": self.end.isoformat(),
+            "days_until": max(0, (self.start - today).days),
+            "in_progress": self.start <= today <= self.end,
+            "related_keywords": list(self.keywords),
+        }
+
+
+class _IntervalIndex:
+    """Festivals sorted by start; overlap queries look back by the longest duration."""
+
+    def __init__(self, festivals):
+        self.items = sorted(festivals, key=lambda f: (f.start, f.end))
+        self.starts = [f.start for f in self.items]
+        self.max_span = max(((f.end - f.start) for f in self.items), default=timedelta(0))
+
+    def overlapping(self, window_start, window_end):
+        lo = bisect_left(self.starts, window_start - self.max_span)
+        hi = bisect_right(self.starts, window_end)
+        return [f for f in self.items[lo:hi] if f.end >= window_start]
+
+
+def _parse_date(value):
+    try:
+        return datetime.strptime(value or "", "%Y-%m-%d").date()
+    except (ValueError, TypeError):
+        return None
+
+
+class SeasonalCalendar:
+    def __init__(self, data):
+        self.data = data
+        self.by_country = {}
+        self._indexes = {}
+        everything = []
+        for country, country_data in data.items():
+            festivals = (country_data.get("festivals") or []) if isinstance(country_data, dict) else []
+            parsed = []
+            for festival in festivals:
+                if not isinstance(festival, dict):
+                    continue
+                start = _parse_date(festival.get("expected_start_date"))
+                end = _parse_date(festival.get("expected_end_date"))
+                if start is None or end is None:
+                    continue
+                parsed.append(Festival(
+                    country,
+                    festival.get("festival_name", "?"),
+                    start,
+                    end,
+                    tuple(festival.get("related_keywords") or ()),
+                    festival,
+                ))
+            self.by_country[country] = parsed  # calendar order
+            self._indexes[country] = _IntervalIndex(parsed)
+            everything.extend(parsed)
+        self._global = _IntervalIndex(everything)
+
+    def countries(self):
+        return list(self.by_country)
+
+    def festivals(self, country):
+        """Every festival with valid dates for a country, in calendar order."""
+        return list(self.by_country.get(country, []))
+
+    def in_window(self, window_start, window_end, country=None):
+        """Festivals overlapping [window_start, window_end], sorted by start."""
+        index = self._global if country is None else self._indexes.get(country)
+        if index is None:
+            return []
+        return index.overlapping(window_start, window_end)
+
+    def upcoming(self, today=None, past_days=DEFAULT_PAST_DAYS, future_days=DEFAULT_FUTURE_DAYS, country=None):
+        today = today or datetime.now(timezone.utc).date()
+        return self.in_window(today - timedelta(days=past_days), today + timedelta(days=future_days), country)
+
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def get_calendar(path=SEASONAL_CONFIG_PATH):
+    """Compiled calendar for `path`, rebuilt only when the file's mtime or size changes."""
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached and cached[0] == stamp:
+            return cached[1]
+    with open(path, "r", encoding="utf-8") as f:
+        calendar = SeasonalCalendar(json.load(f))
+    with _cache_lock:
+        _cache[path] = (stamp, calendar)
+    return calendar
+
+
+if __name__ == "__main__":
+    calendar = get_calendar()
+    for festival in calendar.upcoming(future_days=30):
+        print(f"{festival.start}  {festival.country:15s} {festival.name}")
@@ -0,0 +1,102 @@
+"""
+Persistent SerpAPI result cache shared by festival discovery and the prewarmer.
+
+Raw result lists are stored per (keyword, domain, sort) with a fetch time;
+entries older than SERP_CACHE_TTL_SECONDS are ignored. festival_prewarm.py
+fills it off-peak so live /festivals/search calls are mostly cache hits.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+STATE_DIR = os.path.join(PROJECT_ROOT, "state")
+SERP_CACHE_DB = os.getenv("SERP_CACHE_DB", os.path.join(STATE_DIR, "serp_cache.sqlite"))
+SERP_CACHE_TTL_SECONDS = int(os.getenv("SERP_CACHE_TTL_SECONDS", str(48 * 3600)))
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _connect():
+    os.makedirs(os.path.dirname(SERP_CACHE_DB), exist_ok=True)
+    conn = sqlite3.connect(SERP_CACHE_DB, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS serp_results ("
+        " keyword TEXT NOT NULL,"
+        " domain TEXT NOT NULL,"
+        " sort TEXT NOT NULL,"
+        " results TEXT NOT NULL,"
+        " fetched_at REAL NOT NULL,"
+        " PRIMARY KEY (keyword, domain, sort))"
+    )
+    return conn
+
+
+def _key(keyword, domain, sort_by_bestsellers):
+    return str(keyword).strip().lower(), domain, "bestsellers" if sort_by_bestsellers else "relevance"
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def get(keyword, domain, sort_by_bestsellers=False, max_age=None):
+    """Cached raw results if younger than max_age (default TTL), else None."""
+    max_age = SERP_CACHE_TTL_SECONDS if max_age is None else max_age
+    conn = _connect()
+    try:
+        row = conn.execute(
+            "SELECT results, fetched_at FROM serp_results WHERE keyword = ? AND domain = ? AND sort = ?",
+            _key(keyword, domain, sort_by_bestsellers),
+        ).fetchone()
+    finally:
+        conn.close()
+    if row is None or time.time() - row[1] > max_age:
+        _count("misses")
+        return None
+    _count("hits")
+    return json.loads(row[0])
+
+
+def put(keyword, domain, sort_by_bestsellers, results):
+    conn = _connect()
+    try:
+        conn.execute(
+            "INSERT OR REPLACE INTO serp_results (keyword, domain, sort, results, fetched_at) VALUES (?, ?, ?, ?, ?)",
+            (*_key(keyword, domain, sort_by_bestsellers), json.dumps(results, ensure_ascii=False), time.time()),
+        )
+    finally:
+        conn.close()
+
+
+def is_fresh(keyword, domain, sort_by_bestsellers=False, min_remaining=0):
+    """True if an entry exists and stays valid for at least min_remaining more seconds."""
+    conn = _connect()
+    try:
+        row = conn.execute(
+            "SELECT fetched_at FROM serp_results WHERE keyword = ? AND domain = ? AND sort = ?",
+            _key(keyword, domain, sort_by_bestsellers),
+        ).fetchone()
+    finally:
+        conn.close()
+    return row is not None and time.time() - row[0] + min_remaining <= SERP_CACHE_TTL_SECONDS
+
+
+def cache_stats():
+    """Entry counts plus this process's hit/miss counters."""
+    conn = _connect()
+    try:
+        total, fresh = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(fetched_at >= ?), 0) FROM serp_results",
+            (time.time() - SERP_CACHE_TTL_SECONDS,),
+        ).fetchone()
+    finally:
+        conn.close()
+    with _stats_lock:
+        return {"entries": total, "fresh": fresh, "ttl_sec": SERP_CACHE_TTL_SECONDS, **_stats}
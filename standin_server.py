@@ -0,0 +1,311 @@
+"""
+Local stand-in for the APIs the scrapers call, for offline benchmarks and tests.
+
+Mimics serpapi.com/search.json (amazon/ebay/aliexpress engines), the YouTube v3
+videos/search endpoints, the Etsy v3 active listings endpoint and old.reddit
+top listings (HTML and .json). Responses are synthetic but deterministic per query.
+
+    python standin_server.py --port 8765 --latency-ms 150 --error-rate 0.05 --rate-429 0.1
+    HTTP_BASE_OVERRIDE=http://127.0.0.1:8765 SERP_API_KEYS=dummy python scrapers/amazon_mvp.py
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+DEFAULT_CONFIG = {
+    "latency_ms": 0,
+    "jitter_ms": 0,
+    "error_rate": 0.0,  # fraction of requests answered with HTTP 500
+    "rate_429": 0.0,  # fraction of requests answered with HTTP 429
+    "retry_after": 1,  # seconds advertised on injected 429s
+    "results_per_page": 20,
+    "seed": 0,
+}
+
+
+def _rng(*parts):
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+    return random.Random(int(digest[:12], 16))
+
+
+def serpapi_payload(params, per_page):
+    engine = params.get("engine", "amazon")
+    query = params.get("k") or params.get("_nkw") or params.get("query") or params.get("q") or ""
+    domain = params.get("amazon_domain") or params.get("ebay_domain") or f"{engine}.com"
+    rng = _rng(engine, query, domain, params.get("s", ""))
+    results = []
+    for i in range(per_page):
+        price = round(rng.uniform(5, 250), 2)
+        results.append({
+            "position": i + 1,
+            "title": f"{query.title()} Model {rng.randint(100, 999)} ({engine} #{i + 1})",
+            "link": f"https://www.{domain}/dp/{rng.randint(10 ** 9, 10 ** 10 - 1)}",
+            "price": {"raw": f"${price}", "value": price, "current": price},
+            "rating": round(rng.uniform(3.0, 5.0), 1),
+            "reviews": rng.randint(0, 5000),
+            "orders": f"{rng.randint(1, 900)}+",
+            "condition": rng.choice(["Brand New", "Pre-owned"]),
+            "is_prime": rng.random() < 0.5,
+        })
+    return {"search_metadata": {"status": "Success"}, "organic_results": results}
+
+
+def _video(video_id, rng, title):
+    return {
+        "id": video_id,
+        "snippet": {
+            "title": title,
+            "channelTitle": f"Channel {rng.randint(1, 99)}",
+            "publishedAt": "2026-01-15T12:00:00Z",
+        },
+        "statistics": {"viewCount": str(rng.randint(1_000, 5_000_000))},
+    }
+
+
+def youtube_videos_payload(params, per_page):
+    if params.get("id"):
+        ids = [v for v in params["id"].split(",") if v]
+        return {"items": [_video(v, _rng("video", v), f"Video {v}") for v in ids]}
+    region = params.get("regionCode", "US")
+    count = min(int(params.get("maxResults", per_page)), 50)
+    items = []
+    for i in range(count):
+        rng = _rng("chart", region, i)
+        items.append(_video(f"{region}{i:09d}", rng, f"{region} popular gadget review #{i + 1}"))
+    return {"items": items}
+
+
+def youtube_search_payload(params, per_page):
+    query = params.get("q", "")
+    count = min(int(params.get("maxResults", per_page)), 50)
+    items = []
+    for i in range(count):
+        video_id = hashlib.sha1(f"{query}|{params.get('regionCode', '')}|{i}".encode()).hexdigest()[:11]
+        items.append({
+            "id": {"kind": "youtube#video", "videoId": video_id},
+            "snippet": {"title": f"{query.title()} review #{i + 1}", "channelTitle": "Stand-in", "publishedAt": "2026-01-15T12:00:00Z"},
+        })
+    return {"items": items}
+
+
+def etsy_batch_payload(params):
+    """/v3/application/listings/batch with includes=Shop,Images."""
+    results = []
+    for listing_id in [v for v in params.get("listing_ids", "").split(",") if v]:
+        rng = _rng("etsy-batch", listing_id)
+        results.append({
+            "listing_id": int(listing_id),
+            "shop": {"shop_id": rng.randint(1000, 9999), "shop_name": f"StandInShop{rng.randint(1, 500)}"},
+            "images": [{"url_570xN": f"https://i.etsystatic.com/stand-in/{listing_id}.jpg"}],
+        })
+    return {"count": len(results), "results": results}
+
+
+def etsy_listings_payload(params, per_page):
+    query = params.get("keywords", "")
+    limit = min(int(params.get("limit", 25)), 100)
+    offset = int(params.get("offset", 0))
+    total = per_page * 10
+    results = []
+    for i in range(offset, min(offset + limit, total)):
+        rng = _rng("etsy", query, i)
+        results.append({
+            "listing_id": 10 ** 9 + int(hashlib.sha1(f"{query}|{i}".encode()).hexdigest()[:8], 16) % 10 ** 9,
+            "title": f"Handmade {query} #{i + 1}",
+            "price": {"amount": rng.randint(500, 20000), "divisor": 100, "currency_code": "USD"},
+            "shop_id": rng.randint(1000, 9999),
+            "num_favorers": rng.randint(0, 2000),
+        })
+    return {"count": total, "results": results}
+
+
+def reddit_listing_posts(subreddit, page, per_page):
+    """Synthetic posts for one listing page; shared by the HTML and JSON renderings."""
+    now_ms = int(time.time() * 1000)
+    posts = []
+    for i in range(per_page):
+        rng = _rng("reddit", subreddit, page, i)
+        fullname = f"t3_{subreddit[:3].lower()}{page}{i:04d}"
+        posts.append({
+            "name": fullname,
+            "title": f"{subreddit} post {page * per_page + i + 1}: {rng.choice(['India', 'UK', 'Japan', 'deal', 'review'])}",
+            "score": rng.randint(0, 5000),
+            "num_comments": rng.randint(0, 800),
+            "created_utc": (now_ms - rng.randint(0, 20) * 86_400_000) / 1000,
+            "permalink": f"/r/{subreddit}/comments/{fullname[3:]}/post/",
+            "subreddit": subreddit,
+            "author": f"user{rng.randint(1, 10 ** 6)}",
+        })
+    return posts
+
+
+def reddit_top_html(subreddit, params, per_page, chrome_kb=0):
+    """old.reddit-style listing markup; chrome_kb pads the page with sidebar/header noise."""
+    page = int(params.get("count", 0)) // max(per_page, 1)
+    posts = reddit_listing_posts(subreddit, page, per_page)
+    things = []
+    for post in posts:
+        things.append(
+            f'<div class="thing id-{post["name"]} link" id="thing_{post["name"]}" data-fullname="{post["name"]}"'
+            f' data-subreddit="{subreddit}" data-author="{post["author"]}" data-score="{post["score"]}"'
+            f' data-comments-count="{post["num_comments"]}" data-timestamp="{int(post["created_utc"] * 1000)}"'
+            f' data-permalink="{post["permalink"]}" data-type="link">'
+            f'<div class="midcol unvoted"><div class="arrow up" role="button"></div>'
+            f'<div class="score unvoted" title="{post["score"]}">{post["score"]}</div><div class="arrow down" role="button"></div></div>'
+            f'<div class="entry unvoted"><div class="top-matter"><p class="title">'
+            f'<a class="title may-blank" data-event-action="title" href="{post["permalink"]}">{escape(post["title"])}</a></p>'
+            f'<p class="tagline">submitted <time class="live-timestamp">recently</time> by '
+            f'<a class="author may-blank">{post["author"]}</a></p>'
+            f'<ul class="flat-list buttons"><li class="first"><a class="bylink comments may-blank" href="{post["permalink"]}">'
+            f'{post["num_comments"]} comments</a></li><li class="share"><a class="post-sharing-button">share</a></li>'
+            f'<li class="link-save-button save-button"><a href="#">save</a></li><li><a class="reportbtn access-required">report</a></li>'
+            f'</ul></div></div><div class="child"></div><div class="clearleft"></div></div>'
+        )
+    next_link = (f'<span class="next-button"><a rel="nofollow next" href="https://old.reddit.com/r/{subreddit}/top/'
+                 f'?t=month&amp;count={(page + 1) * per_page}&amp;after={posts[-1]["name"]}">next &rsaquo;</a></span>')
+    chrome = ('<div class="side"><div class="md"><p>' + "sidebar rules and links " * 40 + '</p></div></div>') * max(0, int(chrome_kb))
+    return (f'<html><head><title>r/{subreddit}</title></head><body><div id="header"></div>{chrome}'
+            f'<div id="siteTable" class="sitetable linklisting">{"".join(things)}</div>'
+            f'<div class="nav-buttons">{next_link}</div></body></html>')
+
+
+def reddit_top_json(subreddit, params, per_page):
+    """Subreddit .json listing in the shape old.reddit returns."""
+    page = int(params.get("count", 0)) // max(per_page, 1)
+    limit = min(int(params.get("limit", per_page)), 100)
+    posts = reddit_listing_posts(subreddit, page, limit)
+    return {
+        "kind": "Listing",
+        "data": {
+            "after": posts[-1]["name"] if posts else None,
+            "dist": len(posts),
+            "children": [{"kind": "t3", "data": post} for post in posts],
+        },
+    }
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    config = DEFAULT_CONFIG
+    stats = {"requests": 0, "errors_injected": 0, "throttled": 0}
+    stats_lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, content_type="application/json", headers=None):
+        data = body.encode("utf-8") if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _count(self, key):
+        with self.stats_lock:
+            self.stats[key] += 1
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        params = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        path = parts.path
+        cfg = self.config
+
+        if path == "/__stats":
+            with self.stats_lock:
+                return self._send(200, json.dumps(self.stats))
+
+        self._count("requests")
+        delay = cfg["latency_ms"] + random.uniform(0, cfg["jitter_ms"])
+        if delay:
+            time.sleep(delay / 1000)
+
+        roll = random.random()
+        if roll < cfg["rate_429"]:
+            self._count("throttled")
+            return self._send(429, json.dumps({"error": "Too many requests"}),
+                              headers={"Retry-After": str(cfg["retry_after"])})
+        if roll < cfg["rate_429"] + cfg["error_rate"]:
+            self._count("errors_injected")
+            return self._send(500, json.dumps({"error": "Injected failure"}))
+
+        per_page = cfg["results_per_page"]
+        if path == "/search.json":
+            return self._send(200, json.dumps(serpapi_payload(params, per_page)))
+        if path == "/youtube/v3/videos":
+            body = json.dumps(youtube_videos_payload(params, per_page))
+            etag = '"' + hashlib.sha1(body.encode("utf-8")).hexdigest()[:16] + '"'
+            if self.headers.get("If-None-Match") == etag:
+                return self._send(304, b"", headers={"ETag": etag})
+            return self._send(200, body, headers={"ETag": etag})
+        if path == "/youtube/v3/search":
+            return self._send(200, json.dumps(youtube_search_payload(params, per_page)))
+        if path == "/v3/application/listings/batch":
+            return self._send(200, json.dumps(etsy_batch_payload(params)))
+        if path in ("/v3/public/listings/active", "/v3/application/listings/active"):
+            return self._send(200, json.dumps(etsy_listings_payload(params, per_page)))
+        if path.startswith("/r/") and "/top" in path:
+            subreddit = path.split("/")[2]
+            if path.endswith(".json"):
+                return self._send(200, json.dumps(reddit_top_json(subreddit, params, per_page)))
+            return self._send(200, reddit_top_html(subreddit, params, per_page), "text/html; charset=utf-8")
+        return self._send(404, json.dumps({"error": f"Unknown stand-in route {path}"}))
+
+
+def make_server(host="127.0.0.1", port=0, **config):
+    """Create a stand-in server; port=0 picks a free port."""
+    handler = type("ConfiguredStandInHandler", (StandInHandler,), {
+        "config": {**DEFAULT_CONFIG, **config},
+        "stats": {"requests": 0, "errors_injected": 0, "throttled": 0},
+        "stats_lock": threading.Lock(),
+    })
+    if handler.config["seed"]:
+        random.seed(handler.config["seed"])
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def serve_in_thread(**config):
+    """Start a stand-in on a free port in a daemon thread. Returns (server, base_url)."""
+    server = make_server(**config)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for SerpApi / YouTube / Etsy / old.reddit")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--results-per-page", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = make_server(
+        host=args.host,
+        port=args.port,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        rate_429=args.rate_429,
+        retry_after=args.retry_after,
+        results_per_page=args.results_per_page,
+        seed=args.seed,
+    )
+    print(f"Stand-in listening on http://{args.host}:{args.port} (stats at /__stats)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -6,8 +6,25 @@ import pytest
 import pandas as pd
 from unittest.mock import patch, MagicMock
 
+import festival_store
+import job_manager
+import main
+import trend_snapshot
+
 client = TestClient(app)
 
+
+@pytest.fixture(autouse=True)
+def temp_jobs_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(job_manager, "JOBS_DB", str(tmp_path / "jobs.sqlite"))
+
+
+@pytest.fixture(autouse=True)
+def fresh_trend_snapshot():
+    trend_snapshot.clear_cache()
+    yield
+    trend_snapshot.clear_cache()
+
 def test_health_check():
     response = client.get("/health")
     assert response.status_code == 200
@@ -74,17 +91,118 @@ def test_get_trends_missing_file(mock_exists):
 
 
 
+def test_trends_summary(tmp_path, monkeypatch):
+    csv_path = tmp_path / "trends.csv"
+    pd.DataFrame({
+        "item": ["Smart Watch", "Yoga Mat", "Desk Lamp", "Mystery Box"],
+        "country": ["USA", "USA", "India", "India"],
+        "market_type": ["regional", None, "regional", "regional"],
+        "trend_strength": [95.0, 85.0, 40.0, 20.0],
+        "marketplace": ["Amazon", "eBay", "Amazon", "Etsy"],
+        "urls": ["['http://a.com']", "[]", "[]", "[]"],
+        "lifecycle_stage": ["Validated", "Validated", "Emerging", "Weak"],
+    }).to_csv(csv_path, index=False)
+    monkeypatch.setattr(main, "FINAL_OUTPUT_FILE", str(csv_path))
+
+    summary = client.get("/trends/summary").json()
+    assert summary["signals"] == 4
+    assert summary["countries"] == 2
+    assert summary["validated"] == 2
+    assert summary["avg_trend_strength"] == 60.0
+    assert summary["lifecycle_counts"] == {"Validated": 2, "Emerging": 1, "Weak": 1}
+    assert [row["item"] for row in summary["top_performers"]] == ["Smart Watch", "Yoga Mat"]
+    assert summary["options"]["market_type"] == ["Global", "regional"]
+
+    filtered = client.get(
+        "/trends/summary", params={"country": "usa", "category": ["Electronics", "Fitness"], "marketplace": ["Amazon"]}
+    ).json()
+    assert filtered["signals"] == 1
+    assert filtered["category_counts"] == {"Electronics": 1}
+    assert filtered["options"] == summary["options"]
+
+    # Cached per snapshot version: no re-read until the file changes
+    with patch("pandas.read_csv") as mock_read_csv:
+        assert client.get("/trends/summary").json() == summary
+        mock_read_csv.assert_not_called()
+    pd.read_csv(csv_path).head(1).to_csv(csv_path, index=False)
+    assert client.get("/trends/summary").json()["signals"] == 1
+
+def test_trends_cursor_pagination(tmp_path, monkeypatch):
+    csv_path = tmp_path / "trends.csv"
+    pd.DataFrame({
+        "item": ["A", "B", "C", "D", "E", "F"],
+        "country": ["USA", "USA", "India", "USA", "India", "USA"],
+        "trend_strength": [50.0, 90.0, 50.0, None, 70.0, 50.0],
+        "marketplace": ["Amazon", "eBay", "amazon", "Amazon", "Etsy", "Amazon"],
+        "urls": ["['http://a.com']"] * 6,
+        "lifecycle_stage": ["Emerging", "Validated", "Emerging", "Weak", "Validated", "Emerging"],
+    }).to_csv(csv_path, index=False)
+    monkeypatch.setattr(main, "FINAL_OUTPUT_FILE", str(csv_path))
+
+    items, cursor = [], None
+    while True:
+        response = client.get("/trends", params={"limit": 2, "fields": "item,trend_strength", "cursor": cursor})
+        assert response.status_code == 200
+        assert response.headers["X-Total-Count"] == "6"
+        assert all(set(row) == {"item", "trend_strength"} for row in response.json())
+        items += [row["item"] for row in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    # Strongest first, ties in CSV order, missing strength last
+    assert items == ["B", "E", "A", "C", "F", "D"]
+
+    response = client.get("/trends", params={"marketplace": "Amazon", "min_strength": 50, "limit": 1})
+    assert [row["item"] for row in response.json()] == ["A"]
+    assert response.headers["X-Total-Count"] == "3"
+    response = client.get("/trends", params={"marketplace": "Amazon", "min_strength": 50, "cursor": response.headers["X-Next-Cursor"]})
+    assert [row["item"] for row in response.json()] == ["C", "F"]
+    assert "X-Next-Cursor" not in response.headers
+
+    assert client.get("/trends", params={"fields": "item,nope"}).status_code == 400
+    assert client.get("/trends", params={"cursor": "not-a-cursor"}).status_code == 400
+
+def test_conditional_get_and_compression(tmp_path, monkeypatch):
+    csv_path = tmp_path / "trends.csv"
+    pd.DataFrame({
+        "item": [f"Product {i}" for i in range(50)],
+        "country": ["USA"] * 50,
+        "trend_strength": list(range(50)),
+        "urls": ["['http://a.com']"] * 50,
+    }).to_csv(csv_path, index=False)
+    monkeypatch.setattr(main, "FINAL_OUTPUT_FILE", str(csv_path))
+
+    for path in ("/trends", "/trends/summary"):
+        first = client.get(path, headers={"Accept-Encoding": "gzip"})
+        assert first.status_code == 200
+        assert "ETag" in first.headers and "Last-Modified" in first.headers
+        assert client.get(path, headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+        assert client.get(path, headers={"If-Modified-Since": first.headers["Last-Modified"]}).status_code == 304
+    assert first.headers.get("Content-Encoding") is None  # summary is under the compression threshold
+    assert client.get("/trends", headers={"Accept-Encoding": "gzip"}).headers["Content-Encoding"] == "gzip"
+
+    # New snapshot -> new validator, full response
+    etag = client.get("/trends").headers["ETag"]
+    pd.read_csv(csv_path).head(10).to_csv(csv_path, index=False)
+    response = client.get("/trends", headers={"If-None-Match": etag})
+    assert response.status_code == 200 and len(response.json()) == 10
+
+    monkeypatch.setattr(festival_store, "FESTIVAL_STORE_DB", str(tmp_path / "festivals.sqlite"))
+    monkeypatch.setattr(festival_store, "FESTIVAL_OUTPUT_FILE", str(tmp_path / "missing.json"))
+    festival_store.append([{"country": "India", "product_url": "https://a.example/1"}])
+    etag = client.get("/festivals").headers["ETag"]
+    assert client.get("/festivals", headers={"If-None-Match": etag}).status_code == 304
+    festival_store.append([{"country": "India", "product_url": "https://a.example/1"}])  # duplicate: unchanged
+    assert client.get("/festivals", headers={"If-None-Match": etag}).status_code == 304
+    festival_store.append([{"country": "India", "product_url": "https://a.example/2"}])
+    response = client.get("/festivals", headers={"If-None-Match": etag})
+    assert response.status_code == 200 and len(response.json()) == 2
+
 @patch("festival_product_discovery.run_pipeline")
-@patch("festival_product_discovery._load_existing_results")
-@patch("builtins.open")
-@patch("json.dump")
-def test_trigger_festival_fetch(mock_json_dump, mock_open, mock_load, mock_run):
+@patch("festival_store.compact")
+@patch("festival_store.append")
+def test_trigger_festival_fetch(mock_append, mock_compact, mock_run):
     mock_run.return_value = [{"product": "test"}]
-    mock_load.return_value = []
-    
-    # Mock open context manager
-    mock_result_file = MagicMock()
-    mock_open.return_value.__enter__.return_value = mock_result_file
     
     payload = {
         "countries": ["India"],
@@ -94,6 +212,9 @@ def test_trigger_festival_fetch(mock_json_dump, mock_open, mock_load, mock_run):
     response = client.post("/festivals/fetch", json=payload)
     assert response.status_code == 200
     assert "India" in response.json()["message"]
+    job = job_manager.wait(response.json()["job_id"], timeout=5)
+    assert job["status"] == "done"
+    assert [step["name"] for step in job["steps"]] == ["discover", "store"]
     
     # Verify run_pipeline called with correct args
     # Note: sets are unordered, so equating sets is robust.
@@ -101,3 +222,75 @@ def test_trigger_festival_fetch(mock_json_dump, mock_open, mock_load, mock_run):
     call_args = mock_run.call_args
     assert call_args.kwargs['target_countries'] == {"India"}
     assert call_args.kwargs['festival_filter'] == {"India": {"Diwali"}}
+    mock_append.assert_called_once_with([{"product": "test"}])
+
+def test_upcoming_festivals():
+    response = client.get("/festivals/upcoming", params={"country": "india", "future_days": 366})
+    assert response.status_code == 200
+    data = response.json()
+    assert data and all(f["country"] == "India" for f in data)
+    starts = [f["expected_start_date"] for f in data]
+    assert starts == sorted(starts)
+
+
+@patch("festival_store.compact")
+@patch("festival_store.append")
+@patch("festival_product_discovery.fetch_amazon_products")
+def test_festival_search_batch(mock_fetch, mock_append, mock_compact):
+    mock_fetch.side_effect = lambda keyword, domain, **kwargs: (
+        [{"product_title": f"{keyword} item", "product_url": f"https://{domain}/{keyword}"}] if keyword != "nothing" else []
+    )
+    mock_append.side_effect = lambda rows: len(rows)
+    payload = {"items": [
+        {"keyword": "diya", "festival_name": "Diwali", "country": "India"},
+        {"keyword": "Diya ", "festival_name": "diwali", "country": "amazon.in"},
+        {"keyword": "nothing", "festival_name": "Diwali", "country": "India"},
+        {"keyword": "lantern", "festival_name": "Diwali", "country": "Atlantis"},
+    ]}
+
+    response = client.post("/festivals/search/batch", json=payload)
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["items"], body["duplicates"]) == (3, 1)
+
+    job_manager.wait(body["job_id"], timeout=5)
+    job = client.get(f"/festivals/search/batch/{body['job_id']}").json()
+    assert job["status"] == "done" and job["added"] == 1
+    assert [item["status"] for item in job["items"]] == ["done", "empty", "skipped"]
+    assert mock_fetch.call_count == 2
+    mock_append.assert_called_once()
+
+    assert client.get("/festivals/search/batch/unknown").status_code == 404
+
+
+def _parse_sse(text):
+    events = []
+    for block in text.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if ": " in line and not line.startswith(":"))
+        if "event" in fields:
+            events.append((int(fields["id"]), fields["event"], json.loads(fields["data"])))
+    return events
+
+
+@patch("festival_product_discovery.run_custom_festival_search")
+def test_job_events_stream(mock_search):
+    mock_search.return_value = [{"product_title": "diya"}]
+    job_id = client.post(
+        "/festivals/search", json={"keyword": "diya", "festival_name": "Diwali", "country": "India"}
+    ).json()["job_id"]
+    job_manager.wait(job_id, timeout=5)
+
+    response = client.get(f"/jobs/{job_id}/events")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _parse_sse(response.text)
+    assert [(kind, data.get("name") or data.get("status")) for _, kind, data in events] == [
+        ("status", "queued"), ("status", "running"), ("step_started", "search"),
+        ("step_finished", "search"), ("status", "done"),
+    ]
+    assert events[-1][2]["result"] == {"products": 1}
+
+    # Resume after the second event (EventSource reconnect)
+    resumed = _parse_sse(client.get(f"/jobs/{job_id}/events", headers={"Last-Event-ID": str(events[1][0])}).text)
+    assert [e[0] for e in resumed] == [e[0] for e in events[2:]]
+    assert client.get("/jobs/unknown/events").status_code == 404
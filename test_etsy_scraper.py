@@ -0,0 +1,137 @@
+import os
+import sys
+
+import pytest
+import requests
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "scrapers"))
+
+import etsy_mvp
+import http_fixtures
+import rate_limiter
+import record_sink
+import resilience
+import standin_server
+
+
+@pytest.fixture
+def etsy_calls(tmp_path, monkeypatch):
+    """Etsy stand-in (250 matches per query); returns the (endpoint, params) of each call."""
+    server, base_url = standin_server.serve_in_thread(results_per_page=25)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(http_fixtures, "HTTP_BASE_OVERRIDE", base_url)
+    monkeypatch.setattr(rate_limiter, "RATE_LIMIT_DB", str(tmp_path / "rate_limits.sqlite"))
+    monkeypatch.setenv("RATE_LIMIT_ETSY", "1000,1000")
+    monkeypatch.setattr(resilience, "_BREAKERS", {})
+    monkeypatch.setattr(resilience, "backoff_delay", lambda attempt: 0)
+    monkeypatch.setattr(etsy_mvp, "ETSY_API_KEY", "test-key")
+    calls = []
+
+    def recording_get(provider, url, **kwargs):
+        calls.append((url.rsplit("/", 1)[1], dict(kwargs.get("params") or {})))
+        return resilience.resilient_get(provider, url, **kwargs)
+
+    monkeypatch.setattr(etsy_mvp, "resilient_get", recording_get)
+    yield calls
+    server.shutdown()
+
+
+def throttle(monkeypatch, offset, times):
+    """Answer the first `times` requests for a listings offset with a stand-in 429."""
+    server, base_url = standin_server.serve_in_thread(rate_429=1.0, retry_after=0)
+    real_get = requests.get
+    throttled = []
+
+    def get(url, params=None, **kwargs):
+        if (params or {}).get("offset") == offset and len(throttled) < times:
+            throttled.append(offset)
+            url = base_url + "/v3/public/listings/active"
+        return real_get(url, params=params, **kwargs)
+
+    monkeypatch.setattr(resilience.requests, "get", get)
+    return server, throttled
+
+
+def test_fetch_listings_follows_offsets_up_to_total(etsy_calls):
+    results = etsy_mvp.fetch_etsy_listings("candle", max_pages=5)
+
+    # 250 matches: offsets past the total are never requested
+    pages = sorted((p["offset"], p["limit"]) for endpoint, p in etsy_calls if endpoint == "active")
+    assert pages == [(0, 100), (100, 100), (200, 100)]
+    assert len(results) == 250
+    assert len({item["listing_id"] for item in results}) == 250
+    assert results[0]["title"] == "Handmade candle #1"
+
+
+def test_fetch_listings_respects_max_pages(etsy_calls):
+    results = etsy_mvp.fetch_etsy_listings("candle", max_pages=2)
+
+    assert sorted(p["offset"] for endpoint, p in etsy_calls if endpoint == "active") == [0, 100]
+    assert len(results) == 200
+
+
+def test_throttled_page_is_retried_after_retry_after(etsy_calls, monkeypatch):
+    server, throttled = throttle(monkeypatch, 100, times=2)
+    try:
+        results = etsy_mvp.fetch_etsy_listings("candle", max_pages=3)
+    finally:
+        server.shutdown()
+
+    assert throttled == [100, 100]
+    assert len(results) == 250
+    assert [item["title"] for item in results[:3]] == ["Handmade candle #1", "Handmade candle #2", "Handmade candle #3"]
+
+
+def test_page_still_throttled_after_retries_is_skipped(etsy_calls, monkeypatch):
+    server, throttled = throttle(monkeypatch, 100, times=resilience.MAX_RETRIES + 1)
+    try:
+        results = etsy_mvp.fetch_etsy_listings("candle", max_pages=3)
+    finally:
+        server.shutdown()
+
+    assert len(throttled) == resilience.MAX_RETRIES + 1
+    # Offsets 0 and 200 are kept
+    assert len(results) == 150
+    assert {"Handmade candle #1", "Handmade candle #201"} <= {item["title"] for item in results}
+    assert "Handmade candle #101" not in {item["title"] for item in results}
+
+
+def test_hydrate_listings_batches_ids(etsy_calls):
+    results = etsy_mvp.fetch_etsy_listings("candle", max_pages=3)
+    etsy_calls.clear()
+
+    etsy_mvp.hydrate_listings(results)
+
+    batches = [p["listing_ids"].split(",") for endpoint, p in etsy_calls if endpoint == "batch"]
+    assert [len(ids) for ids in batches] == [100, 100, 50]
+    assert all(item["shop_name"].startswith("StandInShop") for item in results)
+    assert results[0]["image_url"].endswith(f"/{results[0]['listing_id']}.jpg")
+
+
+def test_rank_score_spans_every_result():
+    assert [etsy_mvp.rank_score(i, 20) for i in (0, 1, 19)] == [100, 95, 5]
+    scores = [etsy_mvp.rank_score(i, 300) for i in range(300)]
+    assert scores[0] == 100 and scores[150] == 50 and scores[-1] == 1
+    assert scores == sorted(scores, reverse=True)
+    # Unlike the old 100 - rank * 5, ranks 20+ are still told apart
+    assert len(set(scores[20:])) > 50
+
+
+def test_run_writes_ranked_records(etsy_calls):
+    etsy_mvp.run_etsy_scraper(queries=["candle"], max_pages=3)
+
+    records = list(record_sink.read_records(record_sink.ndjson_path("etsy")))
+    assert len(records) == 250
+    rank_scores = [r["trend_score"] - min(r["num_favorers"] // 10, 50) for r in records]
+    assert rank_scores[0] == 100 and rank_scores[125] == 50
+    assert all(r["shop_name"] for r in records)
+    assert os.path.exists(etsy_mvp.OUTPUT_CSV)
+
+
+def test_run_without_iceland_config_leaves_no_sink(etsy_calls, monkeypatch):
+    monkeypatch.setattr(etsy_mvp, "COUNTRIES", {})
+
+    etsy_mvp.run_etsy_scraper(queries=["candle"])
+
+    assert not os.path.exists(record_sink.ndjson_path("etsy"))
+    assert etsy_calls == []
@@ -0,0 +1,312 @@
+import time
+from collections import Counter
+from datetime import date
+
+import pytest
+
+import festival_product_discovery as fpd
+import seasonal_calendar
+import serp_cache
+
+
+@pytest.fixture(autouse=True)
+def temp_serp_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(serp_cache, "SERP_CACHE_DB", str(tmp_path / "serp_cache.sqlite"))
+
+
+def _festival(name, start, keywords):
+    raw = {"festival_name": name, "expected_start_date": start, "expected_end_date": start, "related_keywords": keywords}
+    return seasonal_calendar.SeasonalCalendar({"India": {"festivals": [raw]}}).festivals("India")[0]
+
+
+def test_keyword_plan_is_deterministic_deduped_and_capped():
+    eligible = [
+        _festival("Far", "2026-12-20", ["gifts", "far only"]),
+        _festival("Past", "2026-01-05", ["lanterns"]),
+        _festival("Near", "2026-10-25", ["sweets", "Gifts", "lamps"]),
+    ]
+    history = Counter({("India", "lamps"): 3})
+    today = date(2026, 10, 19)
+
+    plan = fpd.plan_country_keywords("India", eligible, history, today=today, limit=5)
+    keywords = [kw for _, kw in plan]
+
+    assert plan == fpd.plan_country_keywords("India", eligible, history, today=today, limit=5)
+    assert keywords == ["lamps", "sweets", "far only", "Gifts", "lanterns"]
+    assert len({kw.lower() for kw in keywords}) == len(keywords)
+    assert fpd.days_until_festival(date(2026, 1, 5), date(2026, 1, 5), today) == 78
+
+
+def test_singleflight_runs_identical_searches_once():
+    import threading
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    flight = fpd.SingleFlight(ttl=60)
+    calls = []
+    gate = threading.Event()
+
+    def slow_search():
+        calls.append(1)
+        gate.wait(2)
+        return [{"title": "lantern"}]
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(flight.do, ("lantern", "amazon.in", False), slow_search) for _ in range(4)]
+        time.sleep(0.1)
+        gate.set()
+        results = [f.result() for f in futures]
+
+    assert len(calls) == 1
+    assert all(r == [{"title": "lantern"}] for r in results)
+    assert flight.do(("lantern", "amazon.in", False), slow_search) == results[0]
+    assert len(calls) == 1 and flight.stats["coalesced"] + flight.stats["memo_hits"] == 4
+
+
+def test_failed_search_is_not_memoised(monkeypatch):
+    responses = [[], [{"title": "lantern", "link": "https://amazon.in/l"}]]
+    calls = []
+
+    def flaky_search(keyword, domain, sort_by_bestsellers=False, quota_provider=None):
+        calls.append(keyword)
+        return responses[len(calls) - 1]  # first attempt fails (returns []), second succeeds
+
+    monkeypatch.setattr(fpd, "_search_domain", flaky_search)
+    monkeypatch.setattr(fpd, "_searches", fpd.SingleFlight(ttl=60))
+
+    assert fpd.search_domain("lantern", "amazon.in") == []
+    assert fpd.search_domain("lantern", "amazon.in") == responses[1]
+    assert fpd.search_domain("lantern", "amazon.in") == responses[1]
+    assert len(calls) == 2
+
+
+def test_hedged_fetch_returns_fallback_when_primary_is_slow(monkeypatch):
+    import time
+
+    def fake_search(keyword, domain, sort_by_bestsellers=False, quota_provider=None):
+        if domain == "amazon.in":
+            time.sleep(1.0)
+            return [{"title": "slow local", "link": "https://amazon.in/x"}]
+        return [{"title": "fast fallback", "link": "https://amazon.com/y"}]
+
+    monkeypatch.setattr(fpd, "SERP_API_KEYS", ["k"])
+    monkeypatch.setattr(fpd, "_search_domain", fake_search)
+    monkeypatch.setattr(fpd, "_searches", fpd.SingleFlight(ttl=60))
+
+    start = time.monotonic()
+    products = fpd.fetch_amazon_products("hedge lantern", "amazon.in", limit=1, hedge_delay=0.2)
+    assert time.monotonic() - start < 0.8
+    assert products[0]["product_title"] == "fast fallback"
+    assert products[0]["amazon_domain"] == "amazon.com"
+    # Without hedging the country's own domain wins, however slow
+    products = fpd.fetch_amazon_products("hedge lamp", "amazon.in", limit=1)
+    assert products[0]["product_title"] == "slow local" and products[0]["amazon_domain"] == "amazon.in"
+
+
+def test_custom_search_rows_store_the_domain_that_answered(monkeypatch):
+    def fake_search(keyword, domain, sort_by_bestsellers=False, quota_provider=None):
+        if domain == "amazon.in":
+            return []
+        return [{"title": "fallback lantern", "link": "https://amazon.com/l"}]
+
+    monkeypatch.setattr(fpd, "SERP_API_KEYS", ["k"])
+    monkeypatch.setattr(fpd, "_search_domain", fake_search)
+    monkeypatch.setattr(fpd, "_searches", fpd.SingleFlight(ttl=60))
+
+    rows = fpd._custom_search_rows("lantern", "Diwali", "India", "amazon.in")
+    assert [(r["product_title"], r["amazon_domain"]) for r in rows] == [("fallback lantern", "amazon.com")]
+
+
+def test_calendar_window_matches_linear_scan():
+    import os
+    from datetime import timedelta
+
+    calendar = seasonal_calendar.get_calendar(os.path.join(os.path.dirname(os.path.abspath(__file__)), "seasonal_config.json"))
+    today = date(2026, 10, 19)
+    lo, hi = today - timedelta(days=7), today + timedelta(days=180)
+
+    expected = sorted(
+        (f.country, f.name, f.start)
+        for country in calendar.countries()
+        for f in calendar.festivals(country)
+        if not (f.end < lo or f.start > hi)
+    )
+    assert sorted((f.country, f.name, f.start) for f in calendar.upcoming(today)) == expected
+    india = calendar.upcoming(today, country="India")
+    assert india and all(f.country == "India" for f in india)
+    assert india == sorted(india, key=lambda f: (f.start, f.end))
+
+
+def test_prewarm_fills_cache_under_quota_cap(tmp_path, monkeypatch):
+    import festival_prewarm
+    import http_fixtures
+    import quota_ledger
+    import rate_limiter
+    import requests
+    import resilience
+    import standin_server
+
+    server, base_url = standin_server.serve_in_thread()
+    throttled_server, throttled_url = standin_server.serve_in_thread(rate_429=1.0, retry_after=0)
+    monkeypatch.setattr(http_fixtures, "HTTP_BASE_OVERRIDE", base_url)
+    monkeypatch.setattr(rate_limiter, "RATE_LIMIT_DB", str(tmp_path / "rate_limits.sqlite"))
+    monkeypatch.setenv("RATE_LIMIT_SERPAPI", "1000,1000")
+    monkeypatch.setattr(resilience, "_BREAKERS", {})
+    monkeypatch.setattr(quota_ledger, "QUOTA_DB", str(tmp_path / "quota.sqlite"))
+    monkeypatch.setenv("QUOTA_BUDGET_SERPAPI_PREWARM", "5")
+    monkeypatch.setattr(festival_prewarm.festival_store, "query", lambda country=None: [])
+    # The first key is out of plan searches, so every warmed search costs two SerpAPI requests
+    monkeypatch.setattr(fpd, "SERP_API_KEYS", ["spent", "k"])
+    monkeypatch.setattr(fpd, "_searches", fpd.SingleFlight(ttl=60))
+    real_get = requests.get
+
+    def get(url, params=None, **kwargs):
+        if (params or {}).get("api_key") == "spent":
+            url = throttled_url + "/search.json"
+        return real_get(url, params=params, **kwargs)
+
+    monkeypatch.setattr(resilience.requests, "get", get)
+    live_calls = []
+
+    def recording_get(provider, url, **kwargs):
+        live_calls.append(kwargs["params"]["k"])
+        return resilience.resilient_get(provider, url, **kwargs)
+
+    monkeypatch.setattr(fpd, "resilient_get", recording_get)
+
+    plan = festival_prewarm.plan_prewarm(lead_days=60)
+    assert len(plan) >= 3
+    starts = [festival.start for festival, _, _ in plan]
+    assert starts == sorted(starts)
+
+    try:
+        summary = festival_prewarm.run_prewarm(force=True)
+    finally:
+        server.shutdown()
+        throttled_server.shutdown()
+    # Budget 5: two searches at 2 requests each, the third stops on its second request
+    assert summary["warmed"] == 2 and summary["quota_stopped"]
+    assert quota_ledger.usage_today("serpapi_prewarm")["serpapi_prewarm"]["units"] == 5
+    # The sixth request was refused by the ledger before it went out
+    assert len(live_calls) == 6
+
+    # A warmed search is now served from the cache, not SerpAPI
+    festival, keyword, domain = plan[0]
+    live_calls.clear()
+    products = fpd.fetch_amazon_products(keyword, domain, limit=1, sort_by_bestsellers=True)
+    assert products and live_calls == []
+
+
+def test_keyword_quality_skips_generic_and_fragment_keywords():
+    import keyword_quality
+
+    calendar = seasonal_calendar.SeasonalCalendar({
+        "India": {"festivals": [
+            {"festival_name": "Makar Sankranti", "expected_start_date": "2026-10-25", "expected_end_date": "2026-10-25",
+             "related_keywords": ["makar sankranti", "kite festival", "celebration", "makar", "til ladoo"]},
+            {"festival_name": "Republic Day", "expected_start_date": "2026-11-26", "expected_end_date": "2026-11-26",
+             "related_keywords": ["republic day", "celebration", "republic", "tricolour flag"]},
+        ] + [
+            {"festival_name": f"Fest {i}", "expected_start_date": "2026-12-01", "expected_end_date": "2026-12-01",
+             "related_keywords": ["celebration", f"item {i}"]}
+            for i in range(20)
+        ]},
+    })
+    eligible = calendar.festivals("India")[:2]
+    stats = {("India", "til ladoo"): (6, 0), ("India", "tricolour flag"): (4, 4)}
+    scorer = keyword_quality.KeywordScorer(calendar, results=(), stats=stats)
+    today = date(2026, 10, 19)
+
+    skipped = []
+    plan = fpd.plan_country_keywords("India", eligible, today=today, limit=10, scorer=scorer, skipped=skipped)
+    keywords = [kw for _, kw in plan]
+
+    assert {e["keyword"] for e in skipped} == {"celebration", "makar", "republic", "til ladoo"}
+    assert keywords == ["makar sankranti", "kite festival", "tricolour flag", "republic day"]
+
+    festival_filter = {"India": {"Makar Sankranti", "Republic Day"}}
+    report = fpd.keyword_plan_report(calendar, scorer, {"India"}, festival_filter, today=today)
+    assert (report["planned_before"], report["planned_after"], report["calls_saved"]) == (8, 4, 4)
+
+
+def test_keyword_attempts_accumulate(tmp_path, monkeypatch):
+    import keyword_quality
+
+    monkeypatch.setattr(keyword_quality, "KEYWORD_STATS_DB", str(tmp_path / "keyword_stats.sqlite"))
+    keyword_quality.record_attempts([("India", "Diya", True), ("India", "diya ", False)])
+    keyword_quality.record_attempts([("India", "diya", True)])
+    assert keyword_quality.attempt_stats() == {("India", "diya"): (3, 2)}
+
+
+def test_serpapi_outage_does_not_blacklist_keywords(tmp_path, monkeypatch):
+    import keyword_quality
+    import requests
+
+    monkeypatch.setattr(keyword_quality, "KEYWORD_STATS_DB", str(tmp_path / "keyword_stats.sqlite"))
+    monkeypatch.setattr(fpd, "SERP_API_KEYS", ["k1", "k2"])
+    monkeypatch.setattr(fpd, "_searches", fpd.SingleFlight(ttl=60))
+
+    def outage(provider, url, **kwargs):
+        raise requests.ConnectionError("SerpAPI unreachable")
+
+    monkeypatch.setattr(fpd, "resilient_get", outage)
+    festival = _festival("Diwali", "2026-11-08", ["diya", "rangoli colours"])
+    plan = [(festival, "diya"), (festival, "rangoli colours")]
+
+    for _ in range(5):
+        assert fpd._run_country("India", "amazon.in", plan) == []
+    with pytest.raises(fpd.SearchFailed):
+        fpd.fetch_amazon_products("diya", "amazon.in")
+
+    def circuit_open(provider, url, **kwargs):
+        raise fpd.CircuitOpenError("serpapi", 30)
+
+    monkeypatch.setattr(fpd, "resilient_get", circuit_open)
+    assert fpd._run_country("India", "amazon.in", plan) == []
+
+    # Nothing was recorded, so both keywords stay in the plan
+    assert keyword_quality.attempt_stats() == {}
+    scorer = keyword_quality.KeywordScorer(seasonal_calendar.SeasonalCalendar({}), stats=keyword_quality.attempt_stats())
+    kept, skipped = scorer.rank("India", festival, festival.keywords)
+    assert kept == ["diya", "rangoli colours"] and skipped == []
+
+
+def test_completed_empty_search_is_a_miss(tmp_path, monkeypatch):
+    import keyword_quality
+
+    class EmptyResponse:
+        status_code = 200
+
+        def json(self):
+            return {"search_metadata": {"status": "Success"}, "organic_results": []}
+
+    monkeypatch.setattr(keyword_quality, "KEYWORD_STATS_DB", str(tmp_path / "keyword_stats.sqlite"))
+    monkeypatch.setattr(fpd, "SERP_API_KEYS", ["k"])
+    monkeypatch.setattr(fpd, "_searches", fpd.SingleFlight(ttl=60))
+    monkeypatch.setattr(fpd, "resilient_get", lambda provider, url, **kwargs: EmptyResponse())
+
+    festival = _festival("Diwali", "2026-11-08", ["diya"])
+    assert fpd._run_country("India", "amazon.in", [(festival, "diya")]) == []
+    assert keyword_quality.attempt_stats() == {("India", "diya"): (1, 0)}
+
+
+def test_keyword_misses_decay_until_the_keyword_is_reprobed(tmp_path, monkeypatch):
+    import keyword_quality
+
+    monkeypatch.setattr(keyword_quality, "KEYWORD_STATS_DB", str(tmp_path / "keyword_stats.sqlite"))
+    keyword_quality.record_attempts([("India", "diya", False)] * 10)
+    festival = _festival("Diwali", "2026-11-08", ["diya"])
+    calendar = seasonal_calendar.SeasonalCalendar({})
+    day = 86400
+
+    now = keyword_quality.attempt_stats()
+    assert now == {("India", "diya"): (10, 0)}
+    kept, skipped = keyword_quality.KeywordScorer(calendar, stats=now).rank("India", festival, ["diya"])
+    assert kept == [] and skipped[0]["reason"].startswith("score below")
+
+    half_life = keyword_quality.STATS_HALF_LIFE_DAYS
+    later = keyword_quality.attempt_stats(now=time.time() + half_life * day)
+    assert later[("India", "diya")][0] == pytest.approx(5, abs=0.01)
+    much_later = keyword_quality.attempt_stats(now=time.time() + 4 * half_life * day)
+    kept, _ = keyword_quality.KeywordScorer(calendar, stats=much_later).rank("India", festival, ["diya"])
+    assert kept == ["diya"]
@@ -0,0 +1,69 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+
+import festival_store
+
+
+@pytest.fixture(autouse=True)
+def temp_store(tmp_path):
+    legacy = [
+        {"country": "India", "product_url": "https://a", "festival_name": "Diwali"},
+        {"country": "India", "product_url": "https://a", "festival_name": "Diwali (dupe)"},
+        {"country": "Japan", "product_url": None, "festival_name": "Obon"},
+    ]
+    json_path = tmp_path / "festival_trending_products.json"
+    json_path.write_text(json.dumps(legacy))
+    with patch.object(festival_store, "FESTIVAL_STORE_DB", str(tmp_path / "festival.sqlite")), \
+            patch.object(festival_store, "FESTIVAL_OUTPUT_FILE", str(json_path)):
+        yield json_path
+        festival_store.flush_pending_export()  # never let a trailing export outlive the temp store
+
+
+def test_migrates_legacy_json_and_ignores_duplicates():
+    assert [r["festival_name"] for r in festival_store.query()] == ["Diwali", "Obon"]
+    assert festival_store.append([
+        {"country": "India", "product_url": "https://a"},
+        {"country": "India", "product_url": "https://b"},
+        {"country": "Japan", "product_url": None},
+    ]) == 1
+    assert [r["product_url"] for r in festival_store.query("INDIA")] == ["https://a", "https://b"]
+
+
+def test_concurrent_appends_and_compaction(temp_store):
+    batches = [[{"country": "UK", "product_url": f"https://uk/{i % 25}"}] for i in range(100)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        added = sum(pool.map(festival_store.append, batches))
+    assert added == 25
+
+    assert festival_store.compact(force=True)
+    exported = json.loads(temp_store.read_text())
+    assert len(exported) == festival_store.count() == 27
+    assert festival_store.compact() is False  # nothing new since the export
+
+
+def test_throttled_rows_get_a_trailing_export(temp_store, monkeypatch):
+    import time
+
+    monkeypatch.setattr(festival_store, "EXPORT_INTERVAL_SECONDS", 0.3)
+    assert festival_store.compact(force=True)
+    festival_store.append([{"country": "UK", "product_url": "https://uk/late"}])
+
+    assert festival_store.compact() is False  # inside the throttle window
+    assert len(json.loads(temp_store.read_text())) == 2
+    deadline = time.time() + 5
+    while len(json.loads(temp_store.read_text())) < 3 and time.time() < deadline:
+        time.sleep(0.05)
+    assert [r["product_url"] for r in json.loads(temp_store.read_text())][-1] == "https://uk/late"
+
+
+def test_flush_pending_export_writes_throttled_rows(temp_store):
+    assert festival_store.compact(force=True)
+    festival_store.append([{"country": "UK", "product_url": "https://uk/late"}])
+
+    assert festival_store.compact() is False
+    assert festival_store.flush_pending_export()
+    assert len(json.loads(temp_store.read_text())) == 3
+    assert festival_store.flush_pending_export() is False
@@ -0,0 +1,61 @@
+import pytest
+import requests
+
+import http_fixtures
+import rate_limiter
+import resilience
+import standin_server
+
+
+@pytest.fixture
+def standin(tmp_path, monkeypatch):
+    server, base_url = standin_server.serve_in_thread()
+    monkeypatch.setattr(http_fixtures, "HTTP_BASE_OVERRIDE", base_url)
+    monkeypatch.setattr(http_fixtures, "HTTP_FIXTURE_DIR", str(tmp_path / "fixtures"))
+    monkeypatch.setattr(rate_limiter, "RATE_LIMIT_DB", str(tmp_path / "rate_limits.sqlite"))
+    monkeypatch.setattr(resilience, "_BREAKERS", {})
+    yield server
+    server.shutdown()
+
+
+def test_record_then_replay_without_network(standin, monkeypatch, tmp_path):
+    params = {"engine": "amazon", "k": "smart watch", "amazon_domain": "amazon.com", "api_key": "secret"}
+
+    monkeypatch.setattr(http_fixtures, "HTTP_FIXTURE_MODE", "record")
+    live = resilience.resilient_get("serpapi", "https://serpapi.com/search.json", params=params, timeout=5)
+    assert live.status_code == 200
+    assert live.json()["organic_results"]
+
+    standin.shutdown()
+    monkeypatch.setattr(http_fixtures, "HTTP_FIXTURE_MODE", "replay")
+    # A different api_key must hit the same recording, and the key is never stored
+    replayed = resilience.resilient_get(
+        "serpapi", "https://serpapi.com/search.json", params={**params, "api_key": "other"}, timeout=5
+    )
+    assert replayed.json() == live.json()
+    stored = "".join(p.read_text() for p in (tmp_path / "fixtures").glob("*.json"))
+    assert "secret" not in stored
+
+    with pytest.raises(http_fixtures.FixtureMissingError):
+        resilience.resilient_get("serpapi", "https://serpapi.com/search.json", params={"k": "unrecorded"})
+
+
+def test_standin_injects_429_with_retry_after(tmp_path):
+    server, base_url = standin_server.serve_in_thread(rate_429=1.0, retry_after=7)
+    try:
+        response = requests.get(f"{base_url}/v3/public/listings/active", params={"keywords": "mug"}, timeout=5)
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "7"
+        assert requests.get(f"{base_url}/__stats", timeout=5).json()["throttled"] == 1
+    finally:
+        server.shutdown()
+
+
+def test_standin_mimics_provider_shapes(standin):
+    base = http_fixtures.HTTP_BASE_OVERRIDE
+    etsy = requests.get(f"{base}/v3/public/listings/active", params={"keywords": "mug", "limit": 5, "offset": 5}).json()
+    assert len(etsy["results"]) == 5 and "listing_id" in etsy["results"][0]
+    videos = requests.get(f"{base}/youtube/v3/videos", params={"id": "a,b"}).json()
+    assert [v["id"] for v in videos["items"]] == ["a", "b"]
+    html = requests.get(f"{base}/r/gadgets/top/", params={"t": "month"}).text
+    assert 'class="thing ' in html and "data-fullname" in html
@@ -0,0 +1,80 @@
+import threading
+
+import pytest
+
+import job_manager
+
+
+@pytest.fixture(autouse=True)
+def temp_jobs_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(job_manager, "JOBS_DB", str(tmp_path / "jobs.sqlite"))
+
+
+def test_identical_jobs_are_deduplicated_and_steps_timed():
+    gate = threading.Event()
+    runs = []
+
+    def work(ctx):
+        runs.append(ctx.job_id)
+        with ctx.step("fetch"):
+            gate.wait(5)
+        ctx.progress(0.5, "halfway")
+        return {"rows": 3}
+
+    first, created = job_manager.submit("festival_search", {"keyword": "diya"}, work)
+    second, created_again = job_manager.submit("festival_search", {"keyword": "diya"}, work)
+    assert created and not created_again
+    assert second["job_id"] == first["job_id"]
+
+    gate.set()
+    job = job_manager.wait(first["job_id"], timeout=5)
+    assert runs == [first["job_id"]]
+    assert job["status"] == "done" and job["result"] == {"rows": 3} and job["progress"] == 1
+    assert job["steps"][0]["name"] == "fetch" and job["steps"][0]["status"] == "done"
+    assert job["steps"][0]["seconds"] is not None
+
+    # Finished jobs no longer absorb new submissions
+    third, created = job_manager.submit("festival_search", {"keyword": "diya"}, work)
+    assert created and third["job_id"] != first["job_id"]
+    job_manager.wait(third["job_id"], timeout=5)
+
+
+def test_pipeline_jobs_queue_behind_each_other_and_failures_are_recorded():
+    gate = threading.Event()
+    order = []
+
+    def slow(ctx):
+        order.append("a")
+        gate.wait(5)
+
+    def failing(ctx):
+        order.append("b")
+        with ctx.step("scrape"):
+            raise RuntimeError("scraper exited with code 1")
+
+    a, _ = job_manager.submit("pipeline", {"queries": "a"}, slow)
+    b, _ = job_manager.submit("pipeline", {"queries": "b"}, failing)
+    assert job_manager.get_job(b["job_id"])["status"] == "queued"
+
+    gate.set()
+    job_manager.wait(a["job_id"], timeout=5)
+    job = job_manager.wait(b["job_id"], timeout=5)
+    assert order == ["a", "b"]
+    assert job["status"] == "failed" and "code 1" in job["error"]
+    assert job["steps"][0]["status"] == "failed"
+    assert [j["job_id"] for j in job_manager.list_jobs(kind="pipeline")] == [b["job_id"], a["job_id"]]
+
+
+def test_progress_events_from_subprocess_reach_the_job():
+    import subprocess
+    import sys
+
+    code = "import progress; progress.emit('records', source='amazon', query='lamps', records=3)"
+    subprocess.run(
+        [sys.executable, "-c", code], env=job_manager.subprocess_env("job-sub"),
+        cwd=job_manager.PROJECT_ROOT, check=True,
+    )
+
+    assert [(kind, data) for _, kind, data in job_manager.get_events("job-sub")] == [
+        ("records", {"source": "amazon", "query": "lamps", "records": 3}),
+    ]
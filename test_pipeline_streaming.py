@@ -0,0 +1,69 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+import pipeline
+
+
+AMAZON_ROWS = [
+    {"product_title": "Sony WH-1000XM5 Headphones", "product_url": "https://a/1", "trend_score": 100, "country": "Iceland", "amazon_market_type": "regional"},
+    {"product_title": "Apple Watch Series 9", "product_url": "https://a/2", "trend_score": 95, "country": "Iceland", "amazon_market_type": "regional"},
+    {"product_title": "Sony WH-1000XM5 Headphones", "product_url": "https://a/3", "trend_score": 60, "country": "Iceland", "amazon_market_type": "regional"},
+    {"product_title": "N/A", "product_url": "https://a/4", "trend_score": 55, "country": "Iceland", "amazon_market_type": "regional"},
+]
+EBAY_ROWS = [
+    {"product_title": "Sony WH-1000XM5 Headphones", "product_url": "https://e/1", "trend_score": 100, "country": "Iceland", "market_type": "regional"},
+    {"product_title": "Yoga Mat Non Slip", "product_url": "https://e/2", "trend_score": 70, "country": "Iceland", "market_type": "regional"},
+    {"product_title": "Apple Watch Series 9 (GPS)", "product_url": "https://e/3", "trend_score": 40, "country": "Iceland", "market_type": "regional"},
+]
+
+
+def write_ndjson(path, rows):
+    with open(path, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row) + "\n")
+
+
+def test_streaming_matches_batch_aggregation(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("outputs")
+    pd.DataFrame(AMAZON_ROWS).to_csv("outputs/amazon_trending.csv", index=False)
+    pd.DataFrame(EBAY_ROWS).to_csv("outputs/ebay_trending.csv", index=False)
+    write_ndjson("outputs/amazon_trending.ndjson", AMAZON_ROWS)
+    write_ndjson("outputs/ebay_trending.ndjson", EBAY_ROWS)
+
+    batch = pipeline.aggregate_and_score(pipeline.load_and_merge())
+    stream = pipeline.consume_stream(lambda: False).finalize()
+
+    cols = ["item", "country", "amazon_market_type", "platform_count", "sources", "trend_strength"]
+    assert stream[cols].reset_index(drop=True).equals(batch[cols].reset_index(drop=True))
+    assert sorted(map(sorted, stream["urls"])) == sorted(map(sorted, batch["urls"]))
+
+    # Canonicalization done on arrival is what deduplicate() would compute
+    deduped = pipeline.deduplicate(stream.copy())
+    assert len(deduped) == len(pipeline.deduplicate(batch.copy()))
+
+
+def test_tail_only_returns_complete_lines(tmp_path):
+    path = tmp_path / "s.ndjson"
+    path.write_text('{"a": 1}\n{"a": ')
+    tail = pipeline.NDJSONTail(str(path))
+    assert tail.read_new() == [{"a": 1}]
+    with open(path, "a") as f:
+        f.write('2}\n')
+    assert tail.read_new() == [{"a": 2}]
+    assert tail.read_new() == []
+
+
+def test_tail_handles_flush_inside_multibyte_character(tmp_path):
+    path = tmp_path / "s.ndjson"
+    line = '{"item": "☕ mug"}\n'.encode("utf-8")
+    cut = line.index("☕".encode("utf-8")) + 1  # between the bytes of "☕"
+    path.write_bytes(line[:cut])
+    tail = pipeline.NDJSONTail(str(path))
+    assert tail.read_new() == []
+    with open(path, "ab") as f:
+        f.write(line[cut:])
+    assert tail.read_new() == [{"item": "☕ mug"}]
@@ -0,0 +1,62 @@
+import json
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "scrapers"))
+
+import quota_ledger
+import rate_limiter
+import resilience
+import standin_server
+
+
+@pytest.fixture(autouse=True)
+def temp_dbs(tmp_path):
+    with patch.object(quota_ledger, "QUOTA_DB", str(tmp_path / "quota.sqlite")), \
+            patch.object(rate_limiter, "RATE_LIMIT_DB", str(tmp_path / "rate_limits.sqlite")):
+        yield
+
+
+def test_budget_refuses_calls_that_would_overspend(monkeypatch):
+    monkeypatch.setenv("QUOTA_BUDGET_YOUTUBE", "250")
+    quota_ledger.reserve("youtube", "search.list")
+    quota_ledger.reserve("youtube", "search.list")
+    with pytest.raises(quota_ledger.QuotaExceededError):
+        quota_ledger.reserve("youtube", "search.list")
+    quota_ledger.reserve("youtube", "videos.list")
+
+    usage = quota_ledger.usage_today("youtube")["youtube"]
+    assert usage["units"] == 201
+    assert usage["endpoints"]["search.list"] == {"units": 200, "calls": 2}
+    assert quota_ledger.remaining("youtube") == 49
+
+
+def test_trending_chart_revalidates_with_etag():
+    import youtube_mvp
+
+    sent = []
+
+    def recording_get(provider, url, **kwargs):
+        res = resilience.resilient_get(provider, url, **kwargs)
+        sent.append((kwargs.get("headers"), res.status_code))
+        return res
+
+    server, base_url = standin_server.serve_in_thread()
+    try:
+        with patch("http_fixtures.HTTP_BASE_OVERRIDE", base_url), \
+                patch.dict(resilience._BREAKERS, clear=True), \
+                patch.object(youtube_mvp, "resilient_get", recording_get):
+            first = youtube_mvp.fetch_trending_videos("JP")
+            cached = quota_ledger.get_cached_response(f"youtube:videos.list:chart:JP:{youtube_mvp.MAX_RESULTS}")
+            second = youtube_mvp.fetch_trending_videos("JP")
+    finally:
+        server.shutdown()
+
+    assert cached and cached["etag"]
+    # The second request is conditional on the stored ETag and answered from the cached body
+    assert sent == [(None, 200), ({"If-None-Match": cached["etag"]}, 304)]
+    assert first and second == first == json.loads(cached["body"])["items"]
+    assert quota_ledger.usage_today("youtube")["youtube"]["endpoints"]["videos.list"]["calls"] == 2
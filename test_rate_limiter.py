@@ -0,0 +1,84 @@
+import time
+import pytest
+from unittest.mock import patch
+
+import rate_limiter
+
+
+@pytest.fixture(autouse=True)
+def temp_db(tmp_path):
+    with patch.object(rate_limiter, "RATE_LIMIT_DB", str(tmp_path / "rate_limits.sqlite")):
+        yield
+
+
+def test_bucket_allows_burst_then_waits():
+    with patch.dict(rate_limiter.PROVIDER_LIMITS, {"test": {"rate": 1.0, "capacity": 2}}):
+        assert rate_limiter.try_acquire("test") == 0
+        assert rate_limiter.try_acquire("test") == 0
+        wait = rate_limiter.try_acquire("test")
+        assert 0 < wait <= 1.0
+
+
+def test_env_override(monkeypatch):
+    monkeypatch.setenv("RATE_LIMIT_SERPAPI", "0.5,3")
+    assert rate_limiter.get_limits("serpapi") == {"rate": 0.5, "capacity": 3.0}
+
+
+def test_retry_after_pauses_bucket():
+    delay = rate_limiter.note_retry_after("etsy", "30")
+    assert delay == 30
+    wait = rate_limiter.try_acquire("etsy")
+    assert 29 < wait <= 30
+    assert rate_limiter.get_token_levels()["etsy"]["paused_for_sec"] > 29
+
+
+def test_parse_retry_after_http_date():
+    when = time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime(time.time() + 60))
+    assert 55 < rate_limiter.parse_retry_after(when) <= 60
+    assert rate_limiter.parse_retry_after("garbage") is None
+
+
+def test_token_levels_lists_known_providers():
+    levels = rate_limiter.get_token_levels()
+    assert {"serpapi", "reddit", "youtube", "etsy"} <= set(levels)
+    assert levels["serpapi"]["tokens"] == levels["serpapi"]["capacity"]
+
+
+def test_batch_yields_to_waiting_interactive_request():
+    with patch.dict(rate_limiter.PROVIDER_LIMITS, {"test": {"rate": 1.0, "capacity": 2}}):
+        assert rate_limiter.try_acquire("test", priority_class="batch") == 0
+        assert rate_limiter.try_acquire("test", priority_class="batch") == 0
+        waiter = rate_limiter._register_waiter("test", "interactive")
+
+        time.sleep(1.05)  # one token refilled
+        assert rate_limiter.try_acquire("test", priority_class="batch") > 0
+        assert rate_limiter.try_acquire("test", priority_class="interactive", waiter_id=waiter) == 0
+        assert rate_limiter.try_acquire("test", priority_class="batch") > 0  # bucket empty again
+
+        stats = rate_limiter.get_wait_stats()["test"]
+        assert stats["batch"]["requests"] == 2 and stats["batch"]["waited"] == 0
+        assert stats["interactive"]["requests"] == 1 and stats["interactive"]["max_wait_sec"] >= 1.0
+        assert stats["interactive"]["queued"] == 0
+
+
+def test_priority_semaphore_serves_interactive_first():
+    import threading
+
+    slots = rate_limiter.PrioritySemaphore(1)
+    order = []
+    slots.acquire()  # hold the only slot
+
+    def worker(name, cls):
+        with rate_limiter.priority(cls), slots:
+            order.append(name)
+
+    threads = [threading.Thread(target=worker, args=("bulk", "batch"))]
+    threads[0].start()
+    time.sleep(0.05)
+    threads.append(threading.Thread(target=worker, args=("user", "interactive")))
+    threads[1].start()
+    time.sleep(0.05)
+    slots.release()
+    for t in threads:
+        t.join(2)
+    assert order == ["user", "bulk"]
@@ -0,0 +1,73 @@
+import json
+import pandas as pd
+
+from record_sink import RecordSink, compact_ndjson, read_records
+
+
+def test_sink_streams_and_compacts(tmp_path):
+    csv_path, json_path = tmp_path / "x.csv", tmp_path / "x.json"
+    with RecordSink("amazon", output_dir=str(tmp_path)) as sink:
+        sink.write({"product_title": "A", "price": None, "trend_score": 100})
+        sink.flush()
+        # Visible on disk before the run finishes
+        assert len(list(read_records(sink.path))) == 1
+        sink.write({"product_title": "B", "price": 9.5, "trend_score": 95})
+
+    assert sink.compact(str(csv_path), str(json_path)) == 2
+    df = pd.read_csv(csv_path)
+    assert df["product_title"].tolist() == ["A", "B"]
+    assert json.loads(json_path.read_text())[1]["price"] == 9.5
+
+
+def test_torn_last_line_is_skipped(tmp_path):
+    path = tmp_path / "crashed.ndjson"
+    path.write_text('{"product_title": "A"}\n{"product_tit')
+    assert compact_ndjson(str(path), str(tmp_path / "c.csv"), str(tmp_path / "c.json")) == 1
+
+
+def test_empty_sink_does_not_overwrite_outputs(tmp_path):
+    csv_path = tmp_path / "keep.csv"
+    csv_path.write_text("product_title\nold\n")
+    with RecordSink("ebay", output_dir=str(tmp_path)) as sink:
+        pass
+    assert sink.compact(str(csv_path), str(tmp_path / "keep.json")) == 0
+    assert "old" in csv_path.read_text()
+
+
+def test_flush_reports_query_progress_to_current_job(tmp_path, monkeypatch):
+    import job_manager
+
+    monkeypatch.setattr(job_manager, "JOBS_DB", str(tmp_path / "jobs.sqlite"))
+    monkeypatch.setenv(job_manager.JOB_ID_ENV, "job-1")
+    sink = RecordSink("amazon", output_dir=str(tmp_path)).open()
+    sink.write({"product_title": "a"})
+    sink.write({"product_title": "b"})
+    sink.flush(query="lamps")
+    sink.flush(query="kites")
+    sink.compact(str(tmp_path / "a.csv"), str(tmp_path / "a.json"))
+
+    events = [(kind, data) for _, kind, data in job_manager.get_events("job-1")]
+    assert events == [
+        ("records", {"source": "amazon", "query": "lamps", "new": 2, "records": 2}),
+        ("records", {"source": "amazon", "query": "kites", "new": 0, "records": 2}),
+        ("compacted", {"source": "amazon", "records": 2}),
+    ]
+
+
+def test_sink_reports_through_progress_without_job_manager(tmp_path):
+    import progress
+
+    events = []
+
+    def listener(event_type, **data):
+        events.append((event_type, data))
+
+    progress.subscribe(listener)
+    try:
+        with RecordSink("ebay", output_dir=str(tmp_path)) as sink:
+            sink.write({"product_title": "a"})
+            sink.flush(query="kites")
+    finally:
+        progress.unsubscribe(listener)
+
+    assert events == [("records", {"source": "ebay", "query": "kites", "new": 1, "records": 1})]
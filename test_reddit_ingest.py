@@ -0,0 +1,138 @@
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "scrapers"))
+
+import http_fixtures
+import rate_limiter
+import reddit_mvp
+import resilience
+import standin_server
+
+
+@pytest.fixture
+def standin(tmp_path, monkeypatch):
+    """Reddit pages from the stand-in server; returns the list of listing requests made."""
+    server, base_url = standin_server.serve_in_thread(results_per_page=25)
+    monkeypatch.setattr(http_fixtures, "HTTP_BASE_OVERRIDE", base_url)
+    monkeypatch.setattr(rate_limiter, "RATE_LIMIT_DB", str(tmp_path / "rate_limits.sqlite"))
+    monkeypatch.setenv("RATE_LIMIT_REDDIT", "1000,1000")
+    monkeypatch.setattr(resilience, "_BREAKERS", {})
+    requests_made = []
+
+    def recording_get(provider, url, **kwargs):
+        requests_made.append((url.split("/r/")[1].split("/")[0], dict(kwargs.get("params") or {})))
+        return resilience.resilient_get(provider, url, **kwargs)
+
+    monkeypatch.setattr(reddit_mvp, "resilient_get", recording_get)
+    yield requests_made
+    server.shutdown()
+
+
+def test_ingest_modes_produce_identical_posts():
+    params = {"count": 0, "limit": 25}
+    html = standin_server.reddit_top_html("gadgets", params, 25, chrome_kb=2)
+    payload = json.loads(json.dumps(standin_server.reddit_top_json("gadgets", params, 25)))
+
+    full = reddit_mvp.parse_listing_page(html)
+    assert full[0], "stand-in page should contain recent posts"
+    assert reddit_mvp.parse_listing_strained(html) == full
+    assert reddit_mvp.parse_listing_json(payload) == full
+    assert reddit_mvp.json_next_cursor(payload) == reddit_mvp.extract_next_cursor(html)
+
+
+def _dense_country_top_posts(global_posts, max_results):
+    """The original posts x countries x keywords scoring, kept as a reference."""
+    from collections import defaultdict
+
+    rows = []
+    for country in reddit_mvp.COUNTRIES:
+        grouped = defaultdict(list)
+        for post in global_posts:
+            title_lower = post["title"].lower()
+            boost = sum(5 for kw in reddit_mvp.COUNTRY_KEYWORDS[country] if kw in title_lower)
+            row = {k: post[k] for k in ("title", "vertical", "subreddit", "upvotes", "comments", "post_url")}
+            row.update(trend_score=post["base_score"] + boost, country=country)
+            grouped[post["vertical"]].append(row)
+        for items in grouped.values():
+            rows.extend(sorted(items, key=lambda x: x["trend_score"], reverse=True)[:max_results])
+    return rows
+
+
+def test_sparse_country_relevance_matches_dense_scoring():
+    import random
+
+    rng = random.Random(7)
+    countries = list(reddit_mvp.COUNTRIES)
+    posts = []
+    for i in range(400):
+        words = [rng.choice(["deal", "review", "new", "best"]) for _ in range(3)]
+        words += [rng.choice(countries) for _ in range(rng.randint(0, 3))]
+        rng.shuffle(words)
+        upvotes, comments = rng.randint(0, 60), rng.randint(0, 20)
+        posts.append({
+            "title": " ".join(words),
+            "vertical": rng.choice(["tech", "beauty", "home"]),
+            "subreddit": "sub",
+            "upvotes": upvotes,
+            "comments": comments,
+            "post_url": f"https://reddit.com/{i}",
+            "base_score": upvotes + comments * 2,
+        })
+
+    assert reddit_mvp.select_country_top_posts(posts, 5) == _dense_country_top_posts(posts, 5)
+    assert reddit_mvp.select_country_top_posts([], 5) == []
+
+
+@pytest.mark.parametrize("mode", ["html", "json"])
+def test_scrape_subreddit_follows_after_cursors(standin, mode):
+    with ThreadPoolExecutor(max_workers=2) as page_pool:
+        posts = reddit_mvp.scrape_subreddit("gadgets", page_pool, max_pages=8, mode=mode)
+
+    # 8 pages of 25 posts = 200 posts: 8 HTML requests or 2 JSON requests of 100
+    expected_requests = 8 if mode == "html" else 2
+    page_size = 200 // expected_requests
+    assert len(standin) == expected_requests
+    assert "after" not in standin[0][1]
+    for n, (_, params) in enumerate(standin[1:], start=1):
+        assert params["count"] == n * page_size
+        assert params["after"] == posts[n * page_size - 1]["post_id"]
+    assert len(posts) == len({p["post_id"] for p in posts}) == 200
+
+
+def test_scrape_subreddit_stops_when_page_is_outside_cutoff(standin, monkeypatch):
+    monkeypatch.setattr(reddit_mvp, "cutoff_date", datetime.utcnow() + timedelta(days=1))
+    with ThreadPoolExecutor(max_workers=2) as page_pool:
+        posts = reddit_mvp.scrape_subreddit("gadgets", page_pool, max_pages=4, mode="html")
+    assert posts == []
+    # Page 2 may already be prefetched, but no further pages are followed
+    assert len(standin) <= 2
+
+
+def test_run_dedupes_posts_across_concurrent_subreddits(standin, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)  # the NDJSON sink lives under ./outputs
+    monkeypatch.setattr(reddit_mvp, "OUTPUT_CSV", str(tmp_path / "reddit.csv"))
+    monkeypatch.setattr(reddit_mvp, "OUTPUT_JSON", str(tmp_path / "reddit.json"))
+    collected = []
+    monkeypatch.setattr(reddit_mvp, "select_country_top_posts", lambda posts: collected.extend(posts) or [])
+
+    # The stand-in derives post ids from the first three letters of the subreddit,
+    # so "gadgets" and "gadgetry" list the same posts
+    reddit_mvp.run_reddit_scraper(
+        subreddits={"tech": ["gadgets", "gadgetry"], "home": ["homeimprovement"]}, max_pages=2, mode="html"
+    )
+
+    assert sorted(sub for sub, _ in standin) == ["gadgetry"] * 2 + ["gadgets"] * 2 + ["homeimprovement"] * 2
+    by_sub = {}
+    for post in collected:
+        by_sub.setdefault(post["subreddit"], []).append(post)
+    # Config order wins: the duplicates stay with the first subreddit listed
+    assert len(by_sub["gadgets"]) == 50 and "gadgetry" not in by_sub
+    assert len(by_sub["homeimprovement"]) == 50
+    assert len({p["post_url"] for p in collected}) == len(collected)
+    assert (tmp_path / "reddit.csv").exists() and (tmp_path / "outputs" / "reddit_trending.ndjson").exists()
@@ -0,0 +1,98 @@
+import pytest
+import requests
+from unittest.mock import patch, MagicMock
+
+import resilience
+from resilience import CircuitBreaker, CircuitOpenError
+
+
+def make_response(status, headers=None):
+    response = MagicMock()
+    response.status_code = status
+    response.headers = headers or {}
+    return response
+
+
+@pytest.fixture(autouse=True)
+def isolated(monkeypatch):
+    monkeypatch.setattr(resilience, "_BREAKERS", {})
+    monkeypatch.setattr(resilience.rate_limiter, "acquire", lambda provider: 0)
+    monkeypatch.setattr(resilience.time, "sleep", lambda s: None)
+
+
+def test_breaker_opens_and_half_open_probe_restores():
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    # reset_timeout=0: the next call is admitted as a single half-open probe
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+@patch("resilience.requests.get")
+def test_retries_transient_status_then_succeeds(mock_get):
+    mock_get.side_effect = [make_response(503), make_response(200)]
+    response = resilience.resilient_get("etsy", "http://example.test")
+    assert response.status_code == 200
+    assert mock_get.call_count == 2
+
+
+@patch("resilience.requests.get")
+def test_non_retryable_status_is_returned(mock_get):
+    mock_get.return_value = make_response(429)
+    response = resilience.resilient_get(
+        "serpapi", "http://example.test", retry_statuses=resilience.SERPAPI_TRANSIENT_STATUSES
+    )
+    assert response.status_code == 429
+    assert mock_get.call_count == 1
+
+
+@patch("resilience.requests.get")
+def test_open_breaker_fails_fast(mock_get):
+    mock_get.side_effect = requests.Timeout("slow")
+    with pytest.raises(requests.Timeout):
+        resilience.resilient_get("youtube", "http://example.test", max_retries=4)
+    assert resilience.breaker_states()["youtube"]["state"] == "open"
+
+    mock_get.reset_mock()
+    with pytest.raises(CircuitOpenError):
+        resilience.resilient_get("youtube", "http://example.test")
+    mock_get.assert_not_called()
+
+
+@patch("resilience.requests.get")
+def test_half_open_probe_is_not_leaked_by_quota_or_request_errors(mock_get, monkeypatch):
+    import quota_ledger
+
+    breaker = resilience.get_breaker("youtube")
+    breaker.reset_timeout = 0
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    def over_budget(provider, endpoint):
+        raise quota_ledger.QuotaExceededError(provider, endpoint, 100, 100, 3600)
+
+    monkeypatch.setattr(resilience.quota_ledger, "reserve", over_budget)
+    with pytest.raises(quota_ledger.QuotaExceededError):
+        resilience.resilient_get("youtube", "http://example.test", quota_endpoint="search.list")
+    assert not breaker.probe_in_flight
+    mock_get.assert_not_called()
+
+    monkeypatch.setattr(resilience.quota_ledger, "reserve", lambda provider, endpoint: 1)
+    mock_get.side_effect = requests.TooManyRedirects("loop")
+    with pytest.raises(requests.TooManyRedirects):
+        resilience.resilient_get("youtube", "http://example.test", quota_endpoint="search.list")
+    assert not breaker.probe_in_flight and breaker.state == CircuitBreaker.OPEN
+
+    # The next probe still goes out and closes the breaker
+    mock_get.side_effect = None
+    mock_get.return_value = make_response(200)
+    assert resilience.resilient_get("youtube", "http://example.test").status_code == 200
+    assert breaker.state == CircuitBreaker.CLOSED
@@ -1,38 +1,46 @@
+"""
+SerpApi Amazon smoke test.
+Runs against the local stand-in by default; set SERPAPI_LIVE=1 (with SERP_API_KEYS)
+to spend a real search against serpapi.com.
+"""
+import os
 import requests
-import json
+import pytest
+
+import standin_server
 
-SERP_API_KEY = "13b700df766fb5eaaacc4afebc175579cf1f96aca2e9b67b207631741bebd36e" # Using the first key from the list
 SERP_ENDPOINT = "https://serpapi.com/search.json"
+LIVE = os.getenv("SERPAPI_LIVE") == "1"
+
+
+@pytest.fixture
+def endpoint():
+    if LIVE:
+        yield SERP_ENDPOINT
+        return
+    server, base_url = standin_server.serve_in_thread()
+    yield f"{base_url}/search.json"
+    server.shutdown()
+
 
-def test_serpapi():
+def test_serpapi(endpoint):
+    api_key = (os.getenv("SERP_API_KEYS", "").split(",")[0].strip() or "standin") if LIVE else "standin"
     params = {
         "engine": "amazon",
         "k": "smart watch",
-        "api_key": SERP_API_KEY,
+        "api_key": api_key,
         "amazon_domain": "amazon.com"
     }
-    
-    print(f"Testing SerpApi with key: {SERP_API_KEY[:5]}...")
-    try:
-        response = requests.get(SERP_ENDPOINT, params=params, timeout=10)
-        print(f"Status: {response.status_code}")
-        
-        if response.status_code == 200:
-            data = response.json()
-            if "organic_results" in data:
-                print(f"Success! Found {len(data['organic_results'])} organic results.")
-                print("First item:", data['organic_results'][0].get("title"))
-            elif "shopping_results" in data:
-                 print(f"Success! Found {len(data['shopping_results'])} shopping results.")
-            elif "error" in data:
-                print(f"API Error: {data['error']}")
-            else:
-                 print("Response keys:", data.keys())
-        else:
-            print("Error response:", response.text)
-            
-    except Exception as e:
-        print(f"Exception: {e}")
+
+    response = requests.get(endpoint, params=params, timeout=10)
+    assert response.status_code == 200, response.text
+
+    data = response.json()
+    assert "error" not in data, data.get("error")
+    results = data.get("organic_results") or data.get("shopping_results") or []
+    assert results, f"No results. Response keys: {list(data.keys())}"
+    print(f"Found {len(results)} results. First item: {results[0].get('title')}")
+
 
 if __name__ == "__main__":
-    test_serpapi()
+    raise SystemExit(pytest.main([__file__, "-s", "-q"]))
@@ -0,0 +1,86 @@
+import os
+import sys
+from collections import Counter
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "scrapers"))
+
+import http_fixtures
+import quota_ledger
+import rate_limiter
+import resilience
+import standin_server
+import youtube_mvp
+
+
+@pytest.fixture
+def youtube_calls(tmp_path, monkeypatch):
+    """Scraper runs in tmp_path against the stand-in; returns the (endpoint, params) of each call."""
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("outputs")
+    monkeypatch.setattr(http_fixtures, "HTTP_FIXTURE_DIR", str(tmp_path / "fixtures"))
+    monkeypatch.setattr(rate_limiter, "RATE_LIMIT_DB", str(tmp_path / "rate_limits.sqlite"))
+    monkeypatch.setattr(quota_ledger, "QUOTA_DB", str(tmp_path / "quota.sqlite"))
+    monkeypatch.setenv("RATE_LIMIT_YOUTUBE", "1000,1000")
+    monkeypatch.setattr(resilience, "_BREAKERS", {})
+    calls = []
+
+    def recording_get(provider, url, **kwargs):
+        calls.append((url.rsplit("/", 1)[1], dict(kwargs.get("params") or {})))
+        return resilience.resilient_get(provider, url, **kwargs)
+
+    monkeypatch.setattr(youtube_mvp, "resilient_get", recording_get)
+    return calls
+
+
+def test_shared_search_and_batched_hydration_replay(youtube_calls, monkeypatch):
+    # 2 queries x 40 results, all kept: 80 search results need statistics
+    monkeypatch.setattr(youtube_mvp, "MAX_RESULTS", 40)
+    monkeypatch.setattr(youtube_mvp, "MAX_ITEMS_PER_COUNTRY", 100)
+    queries = ["air fryer", "yoga mat"]
+
+    server, base_url = standin_server.serve_in_thread()
+    monkeypatch.setattr(http_fixtures, "HTTP_BASE_OVERRIDE", base_url)
+    monkeypatch.setattr(http_fixtures, "HTTP_FIXTURE_MODE", "record")
+    try:
+        youtube_mvp.run_youtube_scraper(queries=queries)
+    finally:
+        server.shutdown()
+    recorded = list(youtube_calls)
+
+    # Replay the recorded run with no server at all
+    youtube_calls.clear()
+    monkeypatch.setattr(http_fixtures, "HTTP_FIXTURE_MODE", "replay")
+    youtube_mvp.run_youtube_scraper(queries=queries)
+    assert youtube_calls == recorded
+
+    search_proxies = {p for p in youtube_mvp.PROXY_MAP.values() if p not in youtube_mvp.TRENDING_SUPPORTED}
+    assert len(search_proxies) > 1
+    # One global search per query, shared by every search-proxy region
+    searches = Counter(params["q"] for endpoint, params in youtube_calls if endpoint == "search")
+    assert searches == Counter(queries)
+
+    hydration = [params["id"].split(",") for endpoint, params in youtube_calls if endpoint == "videos" and "id" in params]
+    assert [len(ids) for ids in hydration] == [50, 30]
+    assert len({i for ids in hydration for i in ids}) == 80
+
+    assert os.path.getsize(youtube_mvp.OUTPUT_CSV) > 0
+
+
+def test_hydrate_statistics_batches_at_most_50_ids(monkeypatch):
+    batches = []
+
+    def fake_statistics(video_ids):
+        batches.append(list(video_ids))
+        return {video_id: {"viewCount": "7"} for video_id in video_ids}
+
+    monkeypatch.setattr(youtube_mvp, "fetch_video_statistics", fake_statistics)
+    items = [{"id": {"videoId": f"v{i}"}} for i in range(120)] + [{"id": {"videoId": "v0"}}]
+    stats_cache = {"v119": {"viewCount": "1"}}
+
+    youtube_mvp.hydrate_statistics(items, stats_cache)
+
+    assert [len(b) for b in batches] == [50, 50, 19]
+    assert all(item["statistics"] for item in items)
+    assert items[119]["statistics"] == {"viewCount": "1"}
@@ -0,0 +1,266 @@
+"""
+Parsed view of the deduplicated trends CSV shared by /trends and /trends/summary.
+
+The CSV is re-read only when its mtime or size changes (the snapshot version).
+Rows are normalized once per version: market_type defaults to "Global",
+category is inferred from the item name when the pipeline did not save one
+and urls are parsed into lists. Summaries are cached per (version, filters),
+so dashboard reruns with unchanged filters do not touch pandas at all.
+
+Each snapshot keeps its rows in keyset order (trend_strength descending, then
+CSV row) plus lazily built value -> row-position indexes for the filter
+columns, so a /trends page is a few index intersections and a binary search
+for the cursor rather than a scan-filter-sort of the whole frame.
+"""
+import ast
+import base64
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+SUMMARY_CACHE_SIZE = int(os.getenv("TREND_SUMMARY_CACHE_SIZE", "64"))
+TOP_PERFORMER_MIN_STRENGTH = 80
+TOP_PERFORMER_LIMIT = 5
+
+CATEGORY_KEYWORDS = {
+    "Electronics": ["earbuds", "headphone", "laptop", "phone", "camera", "charger", "smart", "tech", "device", "usb", "cable"],
+    "Fitness": ["fitness", "gym", "workout", "dumbbell", "yoga", "treadmill", "protein", "supplement", "weight", "training", "sport", "mat", "bottle"],
+    "Beauty": ["skincare", "serum", "cream", "beauty", "makeup", "shampoo", "conditioner", "soap", "lotion", "perfume", "fragrance", "oil", "balm"],
+    "Fashion": ["shoes", "sneaker", "watch", "jacket", "clothing", "sweater", "hoodie", "shirt", "pants", "dress", "jeans", "coat", "wool", "wear"],
+    "Home & Kitchen": ["kitchen", "mixer", "cookware", "vacuum", "air fryer", "decor", "light", "lamp", "desk", "chair", "organizer", "cup", "muga"]
+}
+
+# Filters shared by /trends and /trends/summary: query parameter -> column
+FILTER_COLUMNS = {
+    "category": "category",
+    "market_type": "market_type",
+    "marketplace": "marketplace",
+    "lifecycle_stage": "lifecycle_stage",
+}
+
+
+class InvalidCursorError(ValueError):
+    """Raised for a /trends cursor that was not produced by encode_cursor()."""
+
+
+_lock = threading.Lock()
+_snapshots = {}  # path -> Snapshot
+_summaries = {}  # (path, version, filters) -> summary dict
+
+
+def infer_category(item):
+    text = str(item).lower()
+    for cat, keywords in CATEGORY_KEYWORDS.items():
+        if any(k in text for k in keywords):
+            return cat
+    return "Others"
+
+
+def parse_urls(url_str):
+    # The CSV stores lists as their repr, e.g. "['url1', 'url2']"
+    try:
+        return ast.literal_eval(url_str)
+    except Exception:
+        return []
+
+
+def snapshot_version(path):
+    """("<mtime_ns>-<size>", mtime) of the CSV, or (None, None) when it cannot be stat'ed."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None, None
+    return f"{st.st_mtime_ns}-{st.st_size}", st.st_mtime
+
+
+def normalize(df):
+    if "market_type" in df.columns:
+        df["market_type"] = df["market_type"].fillna("Global")
+    else:
+        df["market_type"] = "Global"
+    if "category" not in df.columns:
+        df["category"] = df["item"].apply(infer_category)
+    if "urls" in df.columns:
+        df["urls"] = df["urls"].apply(parse_urls)
+    return df
+
+
+def encode_cursor(strength, row):
+    raw = json.dumps([None if pd.isna(strength) else float(strength), int(row)])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """(trend_strength, csv row) of the last row of the previous page."""
+    try:
+        strength, row = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return (np.nan if strength is None else float(strength)), int(row)
+    except Exception:
+        raise InvalidCursorError(f"Invalid cursor: {cursor!r}")
+
+
+class Snapshot:
+    """
+    One version of the trends CSV. df is in keyset order; positions used by
+    select() / page() are row numbers into it. Shared between requests, so
+    callers must not modify df in place.
+    """
+
+    def __init__(self, version, df, last_modified=None):
+        self.version = version
+        self.last_modified = last_modified
+        strength = pd.to_numeric(df["trend_strength"], errors="coerce") if "trend_strength" in df.columns else pd.Series(np.nan, index=df.index)
+        # Keyset: trend_strength descending (missing last), then original CSV row
+        self._rows = np.arange(len(df))
+        self._neg_strength = -strength.to_numpy(dtype=float)
+        order = np.lexsort((self._rows, self._neg_strength))
+        self.df = df.iloc[order].reset_index(drop=True)
+        self._rows = self._rows[order]
+        self._neg_strength = self._neg_strength[order]
+        self._indexes = {}
+
+    def __len__(self):
+        return len(self.df)
+
+    def _index(self, column):
+        """{lowercased value: sorted positions}, built on first use."""
+        index = self._indexes.get(column)
+        if index is None:
+            index = {}
+            if column in self.df.columns:
+                values = self.df[column].dropna().astype(str).str.lower()
+                for value, positions in values.groupby(values).indices.items():
+                    index[value] = values.index.to_numpy()[positions]
+            self._indexes[column] = index
+        return index
+
+    def select(self, min_strength=None, **filters):
+        """
+        Sorted positions of rows matching every filter: column -> value or
+        list of values (case-insensitive, any of), min_strength inclusive.
+        Empty filters match everything.
+        """
+        selected = np.arange(len(self.df))
+        if min_strength is not None:
+            selected = selected[: np.searchsorted(self._neg_strength, -float(min_strength), side="right")]
+        for column, values in filters.items():
+            if values is None or (isinstance(values, (list, tuple)) and not values):
+                continue
+            values = [values] if isinstance(values, str) else values
+            index = self._index(column)
+            matches = [index[str(v).lower()] for v in values if str(v).lower() in index]
+            positions = np.unique(np.concatenate(matches)) if matches else np.array([], dtype=int)
+            selected = np.intersect1d(selected, positions, assume_unique=True)
+        return selected
+
+    def page(self, positions, cursor=None, limit=50):
+        """
+        (page positions, next cursor or None): up to limit of positions that
+        come after cursor in keyset order.
+        """
+        start = 0
+        if cursor:
+            strength, row = decode_cursor(cursor)
+            lo = np.searchsorted(self._neg_strength, -strength, side="left")
+            hi = np.searchsorted(self._neg_strength, -strength, side="right")
+            boundary = lo + np.searchsorted(self._rows[lo:hi], row, side="right")
+            start = np.searchsorted(positions, boundary, side="left")
+        page = positions[start:start + limit]
+        next_cursor = None
+        if start + limit < len(positions) and len(page):
+            last = page[-1]
+            next_cursor = encode_cursor(-self._neg_strength[last], self._rows[last])
+        return page, next_cursor
+
+
+def load(path):
+    """Snapshot of the CSV at path, re-read only when the file changes."""
+    version, last_modified = snapshot_version(path)
+    with _lock:
+        cached = _snapshots.get(path)
+        if version is not None and cached and cached.version == version:
+            return cached
+    snapshot = Snapshot(version, normalize(pd.read_csv(path)), last_modified)
+    if version is not None:
+        with _lock:
+            _snapshots[path] = snapshot
+            for key in [k for k in _summaries if k[0] == path and k[1] != version]:
+                del _summaries[key]
+    return snapshot
+
+
+def _counts(df, column):
+    if column not in df.columns:
+        return {}
+    return {str(k): int(v) for k, v in df[column].value_counts().items()}
+
+
+def _options(df, column):
+    if column not in df.columns:
+        return []
+    return sorted(str(v) for v in df[column].dropna().unique())
+
+
+def summarize_frame(df, options_df=None):
+    """
+    Overview aggregates for a (filtered) trends frame: headline counts,
+    category and lifecycle distributions, top performers and, from options_df
+    (default: df), the distinct values each filter can take.
+    """
+    options_df = df if options_df is None else options_df
+    strength = df["trend_strength"] if "trend_strength" in df.columns else pd.Series(dtype=float)
+    top = df.iloc[0:0]
+    if "trend_strength" in df.columns:
+        top = df[strength >= TOP_PERFORMER_MIN_STRENGTH].sort_values("trend_strength", ascending=False)
+    top_columns = [c for c in ("item", "category", "country", "trend_strength") if c in top.columns]
+    lifecycle = df["lifecycle_stage"] if "lifecycle_stage" in df.columns else pd.Series(dtype=object)
+    return {
+        "signals": int(len(df)),
+        "countries": int(df["country"].nunique()) if "country" in df.columns else 0,
+        "marketplaces": int(df["marketplace"].nunique()) if "marketplace" in df.columns else 0,
+        "avg_trend_strength": round(float(strength.mean()), 2) if strength.notna().any() else None,
+        "validated": int((lifecycle == "Validated").sum()),
+        "category_counts": _counts(df, "category"),
+        "lifecycle_counts": _counts(df, "lifecycle_stage"),
+        "top_performers": json.loads(top[top_columns].head(TOP_PERFORMER_LIMIT).to_json(orient="records")),
+        "options": {
+            "country": _options(options_df, "country"),
+            **{name: _options(options_df, column) for name, column in FILTER_COLUMNS.items()},
+        },
+    }
+
+
+def summarize(path, country=None, **filters):
+    """Cached summarize_frame() of the filtered snapshot, plus its version and row count."""
+    snapshot = load(path)
+    version = snapshot.version
+    key = (
+        path,
+        version,
+        (country or "").lower(),
+        tuple((name, tuple(sorted(filters.get(name) or ()))) for name in FILTER_COLUMNS),
+    )
+    if version is not None:
+        with _lock:
+            cached = _summaries.get(key)
+        if cached is not None:
+            return cached
+
+    positions = snapshot.select(country=country, **{FILTER_COLUMNS[name]: values for name, values in filters.items()})
+    summary = summarize_frame(snapshot.df.iloc[positions], options_df=snapshot.df)
+    summary["snapshot"] = {"version": version, "rows": len(snapshot)}
+    if version is not None:
+        with _lock:
+            if len(_summaries) >= SUMMARY_CACHE_SIZE:
+                _summaries.pop(next(iter(_summaries)))
+            _summaries[key] = summary
+    return summary
+
+
+def clear_cache():
+    with _lock:
+        _snapshots.clear()
+        _summaries.clear()